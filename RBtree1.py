@@ -1,256 +1,528 @@
+import bloom_filter
+import lazy_delete
+import tree_profiler
+import tree_stats
+
+RED = True
+BLACK = False
+
+
 class Node:
+    # colour is a bool (True = red); child side and root-ness are derived
+    # from the parent pointer so rotations only have to relink pointers.
+    # sort_key is what the tree compares: the value itself, or key(value)
+    # computed once on insert when the tree has a key function.
+    # count is the number of copies held by the node (only >1 in multiset mode)
+    # and total the copies held by the whole subtree rooted here (for rank)
+    __slots__ = ('value', 'sort_key', 'count', 'total', 'red', 'left', 'right', 'parent')
+
     def __init__(self, value=None, color='red'):
         self.value = value
-        self.color = color  # 'red' or 'black'
+        self.sort_key = value
+        self.count = 1
+        self.total = 1
+        self.red = (color == 'red') if isinstance(color, str) else bool(color)
         self.left = None
         self.right = None
         self.parent = None
-        self.is_right_child = False
-        self.isRoot = False
+
+    @property
+    def color(self):
+        return 'red' if self.red else 'black'
+
+    @color.setter
+    def color(self, color):
+        self.red = (color == 'red') if isinstance(color, str) else bool(color)
+
+    @property
+    def is_right_child(self):
+        parent = self.parent
+        return parent is not None and parent.right is self
+
+    @property
+    def isRoot(self):
+        return self.parent is None
 
     def recolor_to_black(self):
-        self.color = 'black'
+        self.red = BLACK
 
     def recolor_to_red(self):
-        if self.isRoot == True:
-            self.color = 'black' ##root must stay black
-        else:    
-            self.color = 'red'
+        if self.parent is None:
+            self.red = BLACK ##root must stay black
+        else:
+            self.red = RED
 
 
 
 class RBtree:
-    def __init__(self):
+    # search / insert / delete entry points wrapped by enable_path_histogram
+    PATH_OPS = {'search': 'searchTree', 'insert': 'insertInTree', 'delete': 'deleteFromTree'}
+    # helpers timed as separate phases by enable_profiling (module functions included)
+    PROFILE_PHASES = ('findNode', '_removeNode', 'checkRotations', 'checkRotationsForDeletion',
+                      'rotateLeft', 'rotateRight')
+
+    def __init__(self, key=None, multiset=False):
         # the root of the tree; empty tree starts with no root
         self.root = None
+        # optional key function (like sorted(key=...)); None compares values directly
+        self.key_func = key
+        # multiset mode keeps one node per distinct key and counts duplicates
+        # in node.count; size is then the total number of copies
+        self.multiset = multiset
         self.size = 0
         self.leftSubtree = None
         self.rightSubtree = None
+        # telemetry: mutation counter for stats() caching, optional path histogram
+        self.mutations = 0
+        self.path_histogram = None
+        # telemetry for the profiler, counted only while one is attached: nodes
+        # whose key a search / insert / delete descent compared, the key
+        # comparisons it made, and colour changes made by the fixups
+        self.visits = 0
+        self.comparisons = 0
+        self.recolors = 0
+        # optional counting Bloom filter in front of searches
+        self.bloom_filter = None
+        # tombstone state while lazy deletion is enabled
+        self.lazy_delete = None
+        # per-operation profiler while profiling is enabled
+        self.profiler = None
 
     def is_empty(self):
         return self.size == 0
 
+    def stats(self, max_staleness=0.1):
+        """Height, black height, depth, node count and memory estimate (see tree_stats)."""
+        return tree_stats.tree_stats(self, max_staleness)
+
+    def enable_bloom_filter(self, fp_rate=0.01, capacity=None):
+        """Short-circuit definite misses with a counting Bloom filter (see bloom_filter)."""
+        return bloom_filter.enable_bloom_filter(self, fp_rate, capacity)
+
+    def disable_bloom_filter(self):
+        bloom_filter.disable_bloom_filter(self)
+
+    def enable_lazy_delete(self, threshold=0.25):
+        """Delete by marking tombstones and compact past a threshold (see lazy_delete)."""
+        return lazy_delete.enable_lazy_delete(self, threshold)
+
+    def disable_lazy_delete(self):
+        lazy_delete.disable_lazy_delete(self)
+
+    def enable_profiling(self, capacity=65536):
+        """Record phase timings and counts of every operation in a ring buffer (see tree_profiler)."""
+        return tree_profiler.enable_profiling(self, capacity)
+
+    def disable_profiling(self):
+        tree_profiler.disable_profiling(self)
+
+    def freeze(self):
+        """Read-only Eytzinger-layout snapshot for fast lookups (see frozen_index; needs NumPy)."""
+        from frozen_index import freeze
+        return freeze(self)
+
+    def enable_path_histogram(self):
+        return tree_stats.enable_path_histogram(self)
+
+    def disable_path_histogram(self):
+        tree_stats.disable_path_histogram(self)
+
 
     def searchTree(self, valueToBeSearched):
+        k = valueToBeSearched if self.key_func is None else self.key_func(valueToBeSearched)
         node = self.root
+        # a left step costs one comparison, a right step or a match two
+        lefts = rights = 0
         while node is not None:
-            if valueToBeSearched < node.value:
+            nk = node.sort_key
+            if k < nk:
+                lefts += 1
                 node = node.left
-            elif valueToBeSearched > node.value:
+            elif k > nk:
+                rights += 1
                 node = node.right
             else:
+                if self.profiler is not None:
+                    self.visits += lefts + rights + 1
+                    self.comparisons += lefts + 2 * rights + 2
                 return True  # Found it
+        if self.profiler is not None:
+            self.visits += lefts + rights
+            self.comparisons += lefts + 2 * rights
         return False  # Not found
-    
+
+    def findNode(self, value):
+        k = value if self.key_func is None else self.key_func(value)
+        node = self.root
+        lefts = rights = 0
+        while node is not None:
+            nk = node.sort_key
+            if k < nk:
+                lefts += 1
+                node = node.left
+            elif k > nk:
+                rights += 1
+                node = node.right
+            else:
+                if self.profiler is not None:
+                    self.visits += lefts + rights + 1
+                    self.comparisons += lefts + 2 * rights + 2
+                return node
+        if self.profiler is not None:
+            self.visits += lefts + rights
+            self.comparisons += lefts + 2 * rights
+        return None
+
 
 
     def checkRotations(self, node):
-        if node == None:
-            return 
-        
-        if node.parent != None: 
-            parent = node.parent
-        else:
-            parent = None 
-            return # no violations if no parent
-        
-        # No violation if parent is black
-        if parent.color == 'black':
-            return
-            
-        if parent.parent != None:
+        parent = node.parent
+        recolors = 0
+        # No violation while the parent is black (or node is the root)
+        while parent is not None and parent.red:
             grandparent = parent.parent
-        else:
-            grandparent = None
-            return  # parent is root and red, just recolor it
+            if grandparent is None:
+                break  # parent is the root; it is recoloured below
 
-        # determine uncle
-        uncle = None
-        if grandparent is not None:
-            if grandparent.left == parent:
+            if grandparent.left is parent:
                 uncle = grandparent.right
+                # Case 1: parent and uncle are red -> recolor and bubble up
+                if uncle is not None and uncle.red:
+                    parent.red = BLACK
+                    uncle.red = BLACK
+                    grandparent.red = RED
+                    recolors += 3
+                    node = grandparent
+                    parent = node.parent
+                    continue
+
+                # Case 2: Left-Right (node is right child, parent is left child)
+                if parent.right is node:
+                    self.rotateLeft(parent)
+                    # After rotation, continue with the old parent (now child)
+                    node, parent = parent, node
+
+                # Case 3: Left-Left (both are left children)
+                self.rotateRight(grandparent)
             else:
                 uncle = grandparent.left
-
-        # Case 1: parent and uncle are red -> recolor and bubble up
-        if uncle is not None and uncle.color == 'red':
-            parent.recolor_to_black()
-            uncle.recolor_to_black()
-            if not grandparent.isRoot:
-                grandparent.recolor_to_red()
-            # bubble up
-            self.checkRotations(grandparent)
-            print("case 1 executed")
-            return
-            
-
-        # At this point, uncle is black or None, and parent is red
-        
-        # Case 2: Left-Right (node is right child, parent is left child)
-        if node.is_right_child and not parent.is_right_child:
-            self.rotateLeft(parent)
-            # After rotation, continue with the old parent (now child)
-            node = parent
-            parent = node.parent
-            grandparent = parent.parent
-            print("case 2 executed")
-
-        # Case 2 mirrored: Right-Left (node is left child, parent is right child)
-        if not node.is_right_child and parent.is_right_child:
-            self.rotateRight(parent)
-            # After rotation, continue with the old parent (now child)
-            node = parent
-            parent = node.parent
-            grandparent = parent.parent
-            print("case 2 mirrored executed")
-
-        # Case 3: Left-Left (both are left children)
-        if not node.is_right_child and not parent.is_right_child:
-            self.rotateRight(grandparent)
-            parent.recolor_to_black()
-            grandparent.recolor_to_red()
-            print("case 3 executed")
-            return
-        
-        # Case 3 mirrored: Right-Right (both are right children)
-        if node.is_right_child and parent.is_right_child:
-            self.rotateLeft(grandparent)
-            parent.recolor_to_black()
-            grandparent.recolor_to_red()
-            print("case 3 mirrored executed")
-            return
+                # Case 1 mirrored
+                if uncle is not None and uncle.red:
+                    parent.red = BLACK
+                    uncle.red = BLACK
+                    grandparent.red = RED
+                    recolors += 3
+                    node = grandparent
+                    parent = node.parent
+                    continue
+
+                # Case 2 mirrored: Right-Left (node is left child, parent is right child)
+                if parent.left is node:
+                    self.rotateRight(parent)
+                    node, parent = parent, node
+
+                # Case 3 mirrored: Right-Right (both are right children)
+                self.rotateLeft(grandparent)
+
+            parent.red = BLACK
+            grandparent.red = RED
+            recolors += 2
+            break
+
+        # root must stay black
+        root = self.root
+        if root.red:
+            root.red = BLACK
+            recolors += 1
+        if self.profiler is not None:
+            self.recolors += recolors
 
 
     def rotateLeft(self, nodeToRotateOn):
         newRoot = nodeToRotateOn.right
-        nodeToRotateOn.right = newRoot.left
+        transferred = newRoot.left
+        nodeToRotateOn.right = transferred
 
-    # Update parent pointer for the transferred subtree
-        if newRoot.left is not None:
-            newRoot.left.parent = nodeToRotateOn
-            newRoot.left.is_right_child = True 
-        
         # Update parent pointer for the transferred subtree
-        if newRoot.left is not None:
-            newRoot.left.parent = nodeToRotateOn
-        
-        # Update newRoot's parent
-        newRoot.parent = nodeToRotateOn.parent
-        
-        # Update grandparent's child pointer
-        if nodeToRotateOn.parent is None:
+        if transferred is not None:
+            transferred.parent = nodeToRotateOn
+
+        # Update newRoot's parent and the grandparent's child pointer
+        parent = nodeToRotateOn.parent
+        newRoot.parent = parent
+        if parent is None:
             self.root = newRoot
-            newRoot.isRoot = True
-            nodeToRotateOn.isRoot = False
-        elif nodeToRotateOn.is_right_child:
-            nodeToRotateOn.parent.right = newRoot
-            newRoot.is_right_child = True
+        elif parent.right is nodeToRotateOn:
+            parent.right = newRoot
         else:
-            nodeToRotateOn.parent.left = newRoot
-            newRoot.is_right_child = False
-        
+            parent.left = newRoot
+
         # Complete the rotation
         newRoot.left = nodeToRotateOn
         nodeToRotateOn.parent = newRoot
-        nodeToRotateOn.is_right_child = False
+
+        # newRoot now spans the old subtree; nodeToRotateOn loses newRoot's
+        # subtree except for the transferred part
+        total = nodeToRotateOn.total
+        nodeToRotateOn.total = total - newRoot.total + (transferred.total if transferred is not None else 0)
+        newRoot.total = total
 
 
     def rotateRight(self, nodeToRotateOn):
         newRoot = nodeToRotateOn.left
-        nodeToRotateOn.left = newRoot.right
+        transferred = newRoot.right
+        nodeToRotateOn.left = transferred
 
-        if newRoot.right is not None:
-            newRoot.right.parent = nodeToRotateOn
-            newRoot.right.is_right_child = False 
-        
         # Update parent pointer for the transferred subtree
-        if newRoot.right is not None:
-            newRoot.right.parent = nodeToRotateOn
-        
-        # Update newRoot's parent
-        newRoot.parent = nodeToRotateOn.parent
-        
-        # Update grandparent's child pointer
-        if nodeToRotateOn.parent is None:
+        if transferred is not None:
+            transferred.parent = nodeToRotateOn
+
+        # Update newRoot's parent and the grandparent's child pointer
+        parent = nodeToRotateOn.parent
+        newRoot.parent = parent
+        if parent is None:
             self.root = newRoot
-            newRoot.isRoot = True
-            nodeToRotateOn.isRoot = False
-        elif nodeToRotateOn.is_right_child:
-            nodeToRotateOn.parent.right = newRoot
-            newRoot.is_right_child = True
+        elif parent.right is nodeToRotateOn:
+            parent.right = newRoot
         else:
-            nodeToRotateOn.parent.left = newRoot
-            newRoot.is_right_child = False
-        
+            parent.left = newRoot
+
         # Complete the rotation
         newRoot.right = nodeToRotateOn
         nodeToRotateOn.parent = newRoot
-        nodeToRotateOn.is_right_child = True
+
+        # newRoot now spans the old subtree; nodeToRotateOn loses newRoot's
+        # subtree except for the transferred part
+        total = nodeToRotateOn.total
+        nodeToRotateOn.total = total - newRoot.total + (transferred.total if transferred is not None else 0)
+        newRoot.total = total
 
 
     def insertInTree(self, value):
-        # new nodes are red by default in a red-black tree
+        if self.multiset:
+            self.add(value)
+            return
 
-        newNode = Node(value, 'red')
+        self.mutations += 1
+        # new nodes are red by default in a red-black tree
+        newNode = Node(value, RED)
+        if self.key_func is None:
+            k = value  # plain keys (e.g. ints) skip the key call entirely
+        else:
+            k = newNode.sort_key = self.key_func(value)
 
-        # insert as root if tree is empty
+        # insert as root if tree is empty (the root is always black)
         if self.root is None:
+            newNode.red = BLACK
             self.root = newNode
-            self.root.parent = None
             self.size = 1
-            self.root.isRoot = True
-            # ensure root is black
-            self.root.color = 'black'
             return
 
         nextNode = self.root
+        # one comparison per node on the way down
+        visits = 0
         while True:
-            if value < nextNode.value:
+            visits += 1
+            if k < nextNode.sort_key:
                 if nextNode.left is None:
                     nextNode.left = newNode
-                    newNode.parent = nextNode
-                    newNode.is_right_child = False
-                    if self.size == 0:
-                        newNode.isRoot = True
-                    self.size += 1
                     break
-                else:
-                    nextNode = nextNode.left
+                nextNode = nextNode.left
             else:
                 if nextNode.right is None:
                     nextNode.right = newNode
-                    newNode.parent = nextNode
-                    newNode.is_right_child = True
-                    if self.size == 0:
-                        newNode.isRoot = True
-                    self.size += 1
                     break
-                else:
-                    nextNode = nextNode.right
-
-        # increase size and rebalance
+                nextNode = nextNode.right
+        if self.profiler is not None:
+            self.visits += visits
+            self.comparisons += visits
+        newNode.parent = nextNode
+        # count the new node in every subtree above it (after linking, so a
+        # failed comparison leaves the totals alone)
+        up = nextNode
+        while up is not None:
+            up.total += 1
+            up = up.parent
+
+        # increase size and rebalance (a black parent needs no fixup)
         self.size += 1
-        self.checkRotations(newNode)
+        if nextNode.red:
+            self.checkRotations(newNode)
         return
-    
 
-    
-    def deleteFromTree(self, value):
+
+
+    def add(self, value, n=1):
+        """Multiset mode: add n copies of value.
+
+        An existing key only has its count bumped; a new key gets one node
+        holding all n copies.
+        """
+        self._requireMultiset()
+        if n < 1:
+            raise ValueError(f"n must be at least 1, got {n}")
+        self.mutations += 1
+        k = value if self.key_func is None else self.key_func(value)
+        parent = None
         node = self.root
-        # Find the node
-        while node and node.value != value:
-            node = node.left if value < node.value else node.right
+        lefts = rights = 0
+        while node is not None:
+            nk = node.sort_key
+            if k < nk:
+                lefts += 1
+                parent, node = node, node.left
+            elif k > nk:
+                rights += 1
+                parent, node = node, node.right
+            else:
+                if self.profiler is not None:
+                    self.visits += lefts + rights + 1
+                    self.comparisons += lefts + 2 * rights + 2
+                node.count += n
+                self.size += n
+                self._addToTotals(node, n)
+                return
+        # plus the side check against the parent below
+        if self.profiler is not None:
+            self.visits += lefts + rights
+            self.comparisons += lefts + 2 * rights + (parent is not None)
+
+        newNode = Node(value, RED)
+        newNode.sort_key = k
+        newNode.count = newNode.total = n
+        self.size += n
+        if parent is None:
+            newNode.red = BLACK
+            self.root = newNode
+            return
+        if k < parent.sort_key:
+            parent.left = newNode
+        else:
+            parent.right = newNode
+        newNode.parent = parent
+        self._addToTotals(parent, n)
+        if parent.red:
+            self.checkRotations(newNode)
+
+    def discard(self, value, n=1):
+        """Multiset mode: remove up to n copies of value and return how many were removed.
+
+        The node is only unlinked once its count drops to zero.
+        """
+        self._requireMultiset()
+        if n < 1:
+            raise ValueError(f"n must be at least 1, got {n}")
+        node = self.findNode(value)
+        if node is None:
+            return 0
+        self.mutations += 1
+        if node.count > n:
+            node.count -= n
+            self.size -= n
+            self._addToTotals(node, -n)
+            return n
+        removed = node.count
+        self._removeNode(node)
+        return removed
+
+    def count(self, value):
+        """Multiset mode: number of copies of value held by the tree."""
+        self._requireMultiset()
+        node = self.findNode(value)
+        return node.count if node is not None else 0
+
+    def rank(self, value):
+        """Number of stored elements (copies included) that sort strictly before value.
+
+        One descent using the subtree totals: O(log n).
+        """
+        k = value if self.key_func is None else self.key_func(value)
+        total = 0
+        node = self.root
+        while node is not None:
+            if node.sort_key < k:
+                # node and its whole left subtree sort before value
+                left = node.left
+                total += node.count if left is None else node.count + left.total
+                node = node.right
+            else:
+                # equal keys may sit on either side, so keep going left
+                node = node.left
+        return total
+
+    def irange(self, lo=None, hi=None):
+        """Yield the stored values from lo to hi inclusive, in order (copies repeated).
+
+        None leaves that end of the range open.
+        """
+        if self.key_func is not None:
+            lo = None if lo is None else self.key_func(lo)
+            hi = None if hi is None else self.key_func(hi)
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                # equal keys may sit on either side, hence the non-strict pruning
+                node = node.left if lo is None or node.sort_key >= lo else None
+            node = stack.pop()
+            k = node.sort_key
+            if hi is not None and k > hi:
+                return
+            if lo is None or k >= lo:
+                for _ in range(node.count):
+                    yield node.value
+            node = node.right
+
+    def _addToTotals(self, node, delta):
+        # node's count changed by delta: fix the totals from node up to the root
+        while node is not None:
+            node.total += delta
+            node = node.parent
+
+    def _requireMultiset(self):
+        if not self.multiset:
+            raise ValueError("count/add/discard need a tree created with multiset=True")
+
+    def deleteFromTree(self, value):
+        node = self.findNode(value)
         if node is None:
             print("Value not found")
             return
+        self.mutations += 1
+        if self.multiset and node.count > 1:
+            node.count -= 1
+            self.size -= 1
+            self._addToTotals(node, -1)
+            return
+        self._removeNode(node)
 
-        # Case 1: Node has two children
+    def _removeNode(self, node):
+        self.size -= node.count
+
+        # the unlinked node is node itself or, with two children, the
+        # predecessor whose contents move up into node
+        spliced = node
         if node.left and node.right:
-            # Find predecessor (max in left subtree)
-            pred = node.left
-            while pred.right:
-                pred = pred.right
+            spliced = node.left
+            while spliced.right:
+                spliced = spliced.right
+        # settle the totals before relinking: subtrees between the two lose
+        # the predecessor's copies, node and everything above lose node's own
+        delta = spliced.count
+        up = spliced.parent
+        while up is not None:
+            if up is node:
+                delta = node.count
+            up.total -= delta
+            up = up.parent
+
+        # Case 1: Node has two children
+        if spliced is not node:
+            pred = spliced
             node.value = pred.value  # Copy value
+            node.sort_key = pred.sort_key
+            node.count = pred.count
             node = pred  # Now delete the predecessor node
 
         # Now node has at most one child
@@ -259,32 +531,34 @@ class RBtree:
         # remember original parent for deletion fixup
         original_parent = node.parent
 
-        if node.parent is None:
+        if original_parent is None:
             # Node is root
             self.root = child
             if child:
                 child.parent = None
-                child.isRoot = True
         else:
-            if node == node.parent.left:
-                node.parent.left = child
+            if node is original_parent.left:
+                original_parent.left = child
             else:
-                node.parent.right = child
+                original_parent.right = child
             if child:
-                child.parent = node.parent
+                child.parent = original_parent
 
         # Optionally: clean up node's pointers
         node.left = node.right = node.parent = None
 
-        # Call deletion fixup with the replacement node and original parent
-        self.checkRotationsForDeletion(child, original_parent)
+        # Removing a red node cannot change any black height, so only a removed
+        # black node needs the deletion fixup (with the replacement node and
+        # original parent)
+        if not node.red:
+            self.checkRotationsForDeletion(child, original_parent)
+
+
 
- 
-        
 
     def findLargestFromLeftSubtree(self, node):
         nextNode = node.left
-        while nextNode.right is not None: 
+        while nextNode.right is not None:
             nextNode = nextNode.right
 
         return nextNode
@@ -301,7 +575,10 @@ class RBtree:
             if n is None:
                 return
             _rec(n.left)
-            result.append(n.value)
+            if n.count == 1:
+                result.append(n.value)
+            else:
+                result.extend([n.value] * n.count)
             _rec(n.right)
 
         _rec(self.root)
@@ -314,91 +591,100 @@ class RBtree:
         parent: the parent of x at the time of replacement (if x is None)
         Implements the classical CLRS delete-fixup algorithm.
         """
-        def is_black(n):
-            return (n is None) or (getattr(n, 'color', 'black') == 'black')
-
+        recolors = 0
         # If x is None, use the provided parent as the starting point
-        while (x is not None and x != self.root and x.color == 'black') or (x is None and parent is not None):
+        while (x is not None and x is not self.root and not x.red) or (x is None and parent is not None):
             if x is None:
                 p = parent
-                # If parent has no children, break
-                if p is None:
-                    break
                 # Determine side: if parent's left is None or was the replacement, treat as left
                 is_left = (p.left is None)
             else:
                 p = x.parent
                 if p is None:
                     break
-                is_left = (x == p.left)
-
-            if p is None:
-                break
+                is_left = (x is p.left)
 
             if is_left:
                 w = p.right
                 # Case 1: sibling is red
-                if w is not None and w.color == 'red':
-                    w.color = 'black'
-                    p.color = 'red'
+                if w is not None and w.red:
+                    w.red = BLACK
+                    p.red = RED
+                    recolors += 2
                     self.rotateLeft(p)
                     w = p.right
 
+                wl = w.left if w is not None else None
+                wr = w.right if w is not None else None
                 # Case 2: sibling's children are both black
-                if is_black(getattr(w, 'left', None)) and is_black(getattr(w, 'right', None)):
+                if (wl is None or not wl.red) and (wr is None or not wr.red):
                     if w is not None:
-                        w.color = 'red'
+                        w.red = RED
+                        recolors += 1
                     x = p
                     parent = x.parent
                 else:
                     # Case 3: sibling's right child is black
-                    if is_black(getattr(w, 'right', None)):
-                        if w is not None and w.left is not None:
-                            w.left.color = 'black'
-                        if w is not None:
-                            w.color = 'red'
-                            self.rotateRight(w)
-                            w = p.right
-                    # Case 4
-                    if w is not None:
-                        w.color = p.color
-                    p.color = 'black'
-                    if w is not None and w.right is not None:
-                        w.right.color = 'black'
+                    if wr is None or not wr.red:
+                        if wl is not None:
+                            wl.red = BLACK
+                            recolors += 1
+                        w.red = RED
+                        recolors += 1
+                        self.rotateRight(w)
+                        w = p.right
+                    # Case 4 (the black sibling takes the parent's colour)
+                    if p.red:
+                        w.red = RED
+                        p.red = BLACK
+                        recolors += 2
+                    if w.right is not None:
+                        w.right.red = BLACK
+                        recolors += 1
                     self.rotateLeft(p)
                     x = self.root
                     parent = None
             else:
                 # mirror cases: x is right child
                 w = p.left
-                if w is not None and w.color == 'red':
-                    w.color = 'black'
-                    p.color = 'red'
+                if w is not None and w.red:
+                    w.red = BLACK
+                    p.red = RED
+                    recolors += 2
                     self.rotateRight(p)
                     w = p.left
 
-                if is_black(getattr(w, 'left', None)) and is_black(getattr(w, 'right', None)):
+                wl = w.left if w is not None else None
+                wr = w.right if w is not None else None
+                if (wl is None or not wl.red) and (wr is None or not wr.red):
                     if w is not None:
-                        w.color = 'red'
+                        w.red = RED
+                        recolors += 1
                     x = p
                     parent = x.parent
                 else:
-                    if is_black(getattr(w, 'left', None)):
-                        if w is not None and w.right is not None:
-                            w.right.color = 'black'
-                        if w is not None:
-                            w.color = 'red'
-                            self.rotateLeft(w)
-                            w = p.left
-                    if w is not None:
-                        w.color = p.color
-                    p.color = 'black'
-                    if w is not None and w.left is not None:
-                        w.left.color = 'black'
+                    if wl is None or not wl.red:
+                        if wr is not None:
+                            wr.red = BLACK
+                            recolors += 1
+                        w.red = RED
+                        recolors += 1
+                        self.rotateLeft(w)
+                        w = p.left
+                    if p.red:
+                        w.red = RED
+                        p.red = BLACK
+                        recolors += 2
+                    if w.left is not None:
+                        w.left.red = BLACK
+                        recolors += 1
                     self.rotateRight(p)
                     x = self.root
                     parent = None
 
         # Ensure the node (if exists) is black
-        if x is not None:
-            x.color = 'black'
+        if x is not None and x.red:
+            x.red = BLACK
+            recolors += 1
+        if self.profiler is not None:
+            self.recolors += recolors
@@ -0,0 +1,826 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""Compiled RBtree / AVL kernels.
+
+Optional accelerated backend for `fasttrees`. The classes mirror `RBtree1.RBtree`
+/ `RBtree1.Node` and `avl.AVL` / `avl.AVLNode` operation for operation, but keep
+node links and colours/heights in C struct fields so descent and rebalancing
+avoid Python attribute lookups.
+
+The instance-shadowing modes (Bloom filter, lazy deletion, profiling, path
+histogram) need an instance dict, so their enable_* methods raise TypeError
+here; use the pure Python classes for those.
+
+Build in place with:
+    cythonize -i _treekernels.pyx
+"""
+import bloom_filter
+import lazy_delete
+import tree_profiler
+import tree_stats
+
+cdef bint RED = True
+cdef bint BLACK = False
+
+
+cdef class Node:
+    cdef public object value
+    cdef public object sort_key
+    cdef public Py_ssize_t count
+    cdef public Py_ssize_t total
+    cdef public bint red
+    cdef public Node left
+    cdef public Node right
+    cdef public Node parent
+
+    def __init__(self, value=None, color='red'):
+        self.value = value
+        self.sort_key = value
+        self.count = 1
+        self.total = 1
+        self.red = (color == 'red') if isinstance(color, str) else bool(color)
+        self.left = None
+        self.right = None
+        self.parent = None
+
+    @property
+    def color(self):
+        return 'red' if self.red else 'black'
+
+    @color.setter
+    def color(self, color):
+        self.red = (color == 'red') if isinstance(color, str) else bool(color)
+
+    @property
+    def is_right_child(self):
+        return self.parent is not None and self.parent.right is self
+
+    @property
+    def isRoot(self):
+        return self.parent is None
+
+    def recolor_to_black(self):
+        self.red = BLACK
+
+    def recolor_to_red(self):
+        self.red = self.parent is not None
+
+
+cdef class RBtree:
+    cdef public Node root
+    cdef public Py_ssize_t size
+    cdef public object leftSubtree
+    cdef public object rightSubtree
+    cdef public object key_func
+    cdef public bint multiset
+    cdef public Py_ssize_t mutations
+    cdef public object path_histogram
+    cdef public object _stats_cache
+
+    def __init__(self, key=None, multiset=False):
+        self.root = None
+        self.key_func = key
+        self.multiset = multiset
+        self.size = 0
+        self.leftSubtree = None
+        self.rightSubtree = None
+        self.mutations = 0
+        self.path_histogram = None
+        self._stats_cache = None
+
+    def is_empty(self):
+        return self.size == 0
+
+    def stats(self, max_staleness=0.1):
+        return tree_stats.tree_stats(self, max_staleness)
+
+    def freeze(self):
+        from frozen_index import freeze
+        return freeze(self)
+
+    # the mode modules raise TypeError for trees without an instance dict
+    def enable_bloom_filter(self, fp_rate=0.01, capacity=None):
+        return bloom_filter.enable_bloom_filter(self, fp_rate, capacity)
+
+    def enable_lazy_delete(self, threshold=0.25):
+        return lazy_delete.enable_lazy_delete(self, threshold)
+
+    def enable_profiling(self, capacity=65536):
+        return tree_profiler.enable_profiling(self, capacity)
+
+    def enable_path_histogram(self):
+        return tree_stats.enable_path_histogram(self)
+
+    def searchTree(self, valueToBeSearched):
+        cdef Node node = self.root
+        k = valueToBeSearched if self.key_func is None else self.key_func(valueToBeSearched)
+        while node is not None:
+            if k < node.sort_key:
+                node = node.left
+            elif k > node.sort_key:
+                node = node.right
+            else:
+                return True
+        return False
+
+    def findNode(self, value):
+        cdef Node node = self.root
+        k = value if self.key_func is None else self.key_func(value)
+        while node is not None:
+            if k < node.sort_key:
+                node = node.left
+            elif k > node.sort_key:
+                node = node.right
+            else:
+                return node
+        return None
+
+    cpdef rotateLeft(self, Node nodeToRotateOn):
+        cdef Node newRoot = nodeToRotateOn.right
+        cdef Node transferred = newRoot.left
+        cdef Node parent = nodeToRotateOn.parent
+        cdef Py_ssize_t total
+        nodeToRotateOn.right = transferred
+        if transferred is not None:
+            transferred.parent = nodeToRotateOn
+        newRoot.parent = parent
+        if parent is None:
+            self.root = newRoot
+        elif parent.right is nodeToRotateOn:
+            parent.right = newRoot
+        else:
+            parent.left = newRoot
+        newRoot.left = nodeToRotateOn
+        nodeToRotateOn.parent = newRoot
+        total = nodeToRotateOn.total
+        nodeToRotateOn.total = total - newRoot.total + (transferred.total if transferred is not None else 0)
+        newRoot.total = total
+
+    cpdef rotateRight(self, Node nodeToRotateOn):
+        cdef Node newRoot = nodeToRotateOn.left
+        cdef Node transferred = newRoot.right
+        cdef Node parent = nodeToRotateOn.parent
+        cdef Py_ssize_t total
+        nodeToRotateOn.left = transferred
+        if transferred is not None:
+            transferred.parent = nodeToRotateOn
+        newRoot.parent = parent
+        if parent is None:
+            self.root = newRoot
+        elif parent.right is nodeToRotateOn:
+            parent.right = newRoot
+        else:
+            parent.left = newRoot
+        newRoot.right = nodeToRotateOn
+        nodeToRotateOn.parent = newRoot
+        total = nodeToRotateOn.total
+        nodeToRotateOn.total = total - newRoot.total + (transferred.total if transferred is not None else 0)
+        newRoot.total = total
+
+    cpdef checkRotations(self, Node node):
+        cdef Node parent = node.parent
+        cdef Node grandparent, uncle
+        while parent is not None and parent.red:
+            grandparent = parent.parent
+            if grandparent is None:
+                break
+            if grandparent.left is parent:
+                uncle = grandparent.right
+                if uncle is not None and uncle.red:
+                    parent.red = BLACK
+                    uncle.red = BLACK
+                    grandparent.red = RED
+                    node = grandparent
+                    parent = node.parent
+                    continue
+                if parent.right is node:
+                    self.rotateLeft(parent)
+                    node, parent = parent, node
+                self.rotateRight(grandparent)
+            else:
+                uncle = grandparent.left
+                if uncle is not None and uncle.red:
+                    parent.red = BLACK
+                    uncle.red = BLACK
+                    grandparent.red = RED
+                    node = grandparent
+                    parent = node.parent
+                    continue
+                if parent.left is node:
+                    self.rotateRight(parent)
+                    node, parent = parent, node
+                self.rotateLeft(grandparent)
+            parent.red = BLACK
+            grandparent.red = RED
+            break
+        self.root.red = BLACK
+
+    def insertInTree(self, value):
+        cdef Node newNode
+        cdef Node nextNode
+        if self.multiset:
+            self.add(value)
+            return
+        self.mutations += 1
+        newNode = Node.__new__(Node)
+        newNode.value = value
+        newNode.red = RED
+        newNode.count = 1
+        newNode.total = 1
+        k = value if self.key_func is None else self.key_func(value)
+        newNode.sort_key = k
+
+        if self.root is None:
+            newNode.red = BLACK
+            self.root = newNode
+            self.size = 1
+            return
+
+        nextNode = self.root
+        while True:
+            if k < nextNode.sort_key:
+                if nextNode.left is None:
+                    nextNode.left = newNode
+                    break
+                nextNode = nextNode.left
+            else:
+                if nextNode.right is None:
+                    nextNode.right = newNode
+                    break
+                nextNode = nextNode.right
+        newNode.parent = nextNode
+        self._addToTotals(nextNode, 1)
+
+        self.size += 1
+        if nextNode.red:
+            self.checkRotations(newNode)
+
+    def add(self, value, Py_ssize_t n=1):
+        cdef Node parent = None
+        cdef Node node = self.root
+        cdef Node newNode
+        self._requireMultiset()
+        if n < 1:
+            raise ValueError(f"n must be at least 1, got {n}")
+        self.mutations += 1
+        k = value if self.key_func is None else self.key_func(value)
+        while node is not None:
+            if k < node.sort_key:
+                parent, node = node, node.left
+            elif k > node.sort_key:
+                parent, node = node, node.right
+            else:
+                node.count += n
+                self.size += n
+                self._addToTotals(node, n)
+                return
+
+        newNode = Node.__new__(Node)
+        newNode.value = value
+        newNode.sort_key = k
+        newNode.count = n
+        newNode.total = n
+        newNode.red = RED
+        self.size += n
+        if parent is None:
+            newNode.red = BLACK
+            self.root = newNode
+            return
+        if k < parent.sort_key:
+            parent.left = newNode
+        else:
+            parent.right = newNode
+        newNode.parent = parent
+        self._addToTotals(parent, n)
+        if parent.red:
+            self.checkRotations(newNode)
+
+    def discard(self, value, Py_ssize_t n=1):
+        cdef Node node
+        cdef Py_ssize_t removed
+        self._requireMultiset()
+        if n < 1:
+            raise ValueError(f"n must be at least 1, got {n}")
+        node = self.findNode(value)
+        if node is None:
+            return 0
+        self.mutations += 1
+        if node.count > n:
+            node.count -= n
+            self.size -= n
+            self._addToTotals(node, -n)
+            return n
+        removed = node.count
+        self._removeNode(node)
+        return removed
+
+    def count(self, value):
+        cdef Node node
+        self._requireMultiset()
+        node = self.findNode(value)
+        return node.count if node is not None else 0
+
+    def rank(self, value):
+        cdef Py_ssize_t total = 0
+        cdef Node node = self.root
+        k = value if self.key_func is None else self.key_func(value)
+        while node is not None:
+            if node.sort_key < k:
+                total += node.count
+                if node.left is not None:
+                    total += node.left.total
+                node = node.right
+            else:
+                node = node.left
+        return total
+
+    def irange(self, lo=None, hi=None):
+        """Yield the stored values from lo to hi inclusive, in order (copies repeated).
+
+        None leaves that end of the range open.
+        """
+        if self.key_func is not None:
+            lo = None if lo is None else self.key_func(lo)
+            hi = None if hi is None else self.key_func(hi)
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                # equal keys may sit on either side, hence the non-strict pruning
+                node = node.left if lo is None or node.sort_key >= lo else None
+            node = stack.pop()
+            k = node.sort_key
+            if hi is not None and k > hi:
+                return
+            if lo is None or k >= lo:
+                for _ in range(node.count):
+                    yield node.value
+            node = node.right
+
+    cdef _addToTotals(self, Node node, Py_ssize_t delta):
+        while node is not None:
+            node.total += delta
+            node = node.parent
+
+    def _requireMultiset(self):
+        if not self.multiset:
+            raise ValueError("count/add/discard need a tree created with multiset=True")
+
+    def deleteFromTree(self, value):
+        cdef Node node = self.findNode(value)
+        if node is None:
+            print("Value not found")
+            return
+        self.mutations += 1
+        if self.multiset and node.count > 1:
+            node.count -= 1
+            self.size -= 1
+            self._addToTotals(node, -1)
+            return
+        self._removeNode(node)
+
+    cdef _removeNode(self, Node node):
+        cdef Node pred, child, original_parent, up
+        cdef Py_ssize_t delta
+        self.size -= node.count
+
+        pred = node
+        if node.left is not None and node.right is not None:
+            pred = node.left
+            while pred.right is not None:
+                pred = pred.right
+        delta = pred.count
+        up = pred.parent
+        while up is not None:
+            if up is node:
+                delta = node.count
+            up.total -= delta
+            up = up.parent
+
+        if pred is not node:
+            node.value = pred.value
+            node.sort_key = pred.sort_key
+            node.count = pred.count
+            node = pred
+
+        child = node.left if node.left is not None else node.right
+        original_parent = node.parent
+
+        if original_parent is None:
+            self.root = child
+            if child is not None:
+                child.parent = None
+        else:
+            if node is original_parent.left:
+                original_parent.left = child
+            else:
+                original_parent.right = child
+            if child is not None:
+                child.parent = original_parent
+
+        node.left = node.right = node.parent = None
+
+        if not node.red:
+            self.checkRotationsForDeletion(child, original_parent)
+
+    def findLargestFromLeftSubtree(self, Node node):
+        cdef Node nextNode = node.left
+        while nextNode.right is not None:
+            nextNode = nextNode.right
+        return nextNode
+
+    def InOrderTraversal(self):
+        cdef list result = []
+        cdef list stack = []
+        cdef Node n = self.root
+        while stack or n is not None:
+            while n is not None:
+                stack.append(n)
+                n = n.left
+            n = <Node>stack.pop()
+            if n.count == 1:
+                result.append(n.value)
+            else:
+                result.extend([n.value] * n.count)
+            n = n.right
+        return result
+
+    cpdef checkRotationsForDeletion(self, Node x, Node parent=None):
+        cdef Node p, w, wl, wr
+        cdef bint is_left
+        while (x is not None and x is not self.root and not x.red) or (x is None and parent is not None):
+            if x is None:
+                p = parent
+                is_left = p.left is None
+            else:
+                p = x.parent
+                if p is None:
+                    break
+                is_left = x is p.left
+
+            if is_left:
+                w = p.right
+                if w is not None and w.red:
+                    w.red = BLACK
+                    p.red = RED
+                    self.rotateLeft(p)
+                    w = p.right
+
+                wl = w.left if w is not None else None
+                wr = w.right if w is not None else None
+                if (wl is None or not wl.red) and (wr is None or not wr.red):
+                    if w is not None:
+                        w.red = RED
+                    x = p
+                    parent = x.parent
+                else:
+                    if wr is None or not wr.red:
+                        if wl is not None:
+                            wl.red = BLACK
+                        w.red = RED
+                        self.rotateRight(w)
+                        w = p.right
+                    w.red = p.red
+                    p.red = BLACK
+                    if w.right is not None:
+                        w.right.red = BLACK
+                    self.rotateLeft(p)
+                    x = self.root
+                    parent = None
+            else:
+                w = p.left
+                if w is not None and w.red:
+                    w.red = BLACK
+                    p.red = RED
+                    self.rotateRight(p)
+                    w = p.left
+
+                wl = w.left if w is not None else None
+                wr = w.right if w is not None else None
+                if (wl is None or not wl.red) and (wr is None or not wr.red):
+                    if w is not None:
+                        w.red = RED
+                    x = p
+                    parent = x.parent
+                else:
+                    if wl is None or not wl.red:
+                        if wr is not None:
+                            wr.red = BLACK
+                        w.red = RED
+                        self.rotateLeft(w)
+                        w = p.left
+                    w.red = p.red
+                    p.red = BLACK
+                    if w.left is not None:
+                        w.left.red = BLACK
+                    self.rotateRight(p)
+                    x = self.root
+                    parent = None
+
+        if x is not None:
+            x.red = BLACK
+
+
+cdef class AVLNode:
+    cdef public object key
+    cdef public object sort_key
+    cdef public Py_ssize_t count
+    cdef public Py_ssize_t total
+    cdef public AVLNode left
+    cdef public AVLNode right
+    cdef public int height
+
+    def __init__(self, key):
+        self.key = key
+        self.sort_key = key
+        self.count = 1
+        self.total = 1
+        self.left = None
+        self.right = None
+        self.height = 1
+
+
+cdef inline int _h(AVLNode node):
+    return node.height if node is not None else 0
+
+
+cdef inline Py_ssize_t _t(AVLNode node):
+    return node.total if node is not None else 0
+
+
+cdef AVLNode _rotate_right(AVLNode y):
+    cdef AVLNode x = y.left
+    cdef int hy
+    y.left = x.right
+    x.right = y
+    hy = max(_h(y.left), _h(y.right)) + 1
+    y.height = hy
+    y.total = y.count + _t(y.left) + _t(y.right)
+    x.height = max(_h(x.left), hy) + 1
+    x.total = x.count + _t(x.left) + y.total
+    return x
+
+
+cdef AVLNode _rotate_left(AVLNode x):
+    cdef AVLNode y = x.right
+    cdef int hx
+    x.right = y.left
+    y.left = x
+    hx = max(_h(x.left), _h(x.right)) + 1
+    x.height = hx
+    x.total = x.count + _t(x.left) + _t(x.right)
+    y.height = max(hx, _h(y.right)) + 1
+    y.total = y.count + x.total + _t(y.right)
+    return y
+
+
+cdef AVLNode _rebalance(AVLNode node, int lh, int rh):
+    cdef AVLNode child
+    if lh - rh > 1:
+        child = node.left
+        if _h(child.right) > _h(child.left):
+            node.left = _rotate_left(child)
+        return _rotate_right(node)
+    if rh - lh > 1:
+        child = node.right
+        if _h(child.left) > _h(child.right):
+            node.right = _rotate_right(child)
+        return _rotate_left(node)
+    node.height = max(lh, rh) + 1
+    node.total = node.count + _t(node.left) + _t(node.right)
+    return node
+
+
+cdef void _add_along_path(AVLNode node, object sk, Py_ssize_t delta) except *:
+    while node is not None:
+        node.total += delta
+        if sk == node.sort_key:
+            return
+        node = node.left if sk < node.sort_key else node.right
+
+
+cdef class AVL:
+    cdef public AVLNode root
+    cdef public object key_func
+    cdef public bint multiset
+    cdef public Py_ssize_t size
+    cdef public Py_ssize_t mutations
+    cdef public object path_histogram
+    cdef public object _stats_cache
+
+    def __init__(self, key=None, multiset=False):
+        self.root = None
+        self.key_func = key
+        self.multiset = multiset
+        self.size = 0
+        self.mutations = 0
+        self.path_histogram = None
+        self._stats_cache = None
+
+    def stats(self, max_staleness=0.1):
+        return tree_stats.tree_stats(self, max_staleness)
+
+    def freeze(self):
+        from frozen_index import freeze
+        return freeze(self)
+
+    # the mode modules raise TypeError for trees without an instance dict
+    def enable_bloom_filter(self, fp_rate=0.01, capacity=None):
+        return bloom_filter.enable_bloom_filter(self, fp_rate, capacity)
+
+    def enable_lazy_delete(self, threshold=0.25):
+        return lazy_delete.enable_lazy_delete(self, threshold)
+
+    def enable_profiling(self, capacity=65536):
+        return tree_profiler.enable_profiling(self, capacity)
+
+    def enable_path_histogram(self):
+        return tree_stats.enable_path_histogram(self)
+
+    def search(self, key):
+        sk = key if self.key_func is None else self.key_func(key)
+        return self._find(sk) is not None
+
+    cdef AVLNode _find(self, object sk):
+        cdef AVLNode cur = self.root
+        while cur is not None:
+            if sk == cur.sort_key:
+                return cur
+            elif sk < cur.sort_key:
+                cur = cur.left
+            else:
+                cur = cur.right
+        return None
+
+    cdef AVLNode _new_node(self, object key, object sk, Py_ssize_t count):
+        cdef AVLNode node = AVLNode.__new__(AVLNode)
+        node.key = key
+        node.sort_key = sk
+        node.count = count
+        node.total = count
+        node.height = 1
+        return node
+
+    def insert(self, key):
+        if self.multiset:
+            self.add(key)
+            return
+        self.mutations += 1
+        sk = key if self.key_func is None else self.key_func(key)
+        self.root = self._insert_node(self.root, self._new_node(key, sk, 1))
+        self.size += 1
+
+    def _insert(self, node, new):
+        return self._insert_node(node, new)
+
+    cdef AVLNode _insert_node(self, AVLNode node, AVLNode new):
+        if node is None:
+            return new
+        if new.sort_key < node.sort_key:
+            node.left = self._insert_node(node.left, new)
+        else:
+            node.right = self._insert_node(node.right, new)
+        return _rebalance(node, _h(node.left), _h(node.right))
+
+    def _delete_min(self, AVLNode node):
+        return self._delete_min_node(node)
+
+    cdef tuple _delete_min_node(self, AVLNode node):
+        # (new subtree root, unlinked leftmost node)
+        cdef AVLNode left, detached
+        if node.left is None:
+            return node.right, node
+        left, detached = self._delete_min_node(node.left)
+        node.left = left
+        return _rebalance(node, _h(left), _h(node.right)), detached
+
+    def delete(self, key):
+        cdef AVLNode node
+        sk = key if self.key_func is None else self.key_func(key)
+        node = self._find(sk)
+        if node is None:
+            return
+        self.mutations += 1
+        if self.multiset and node.count > 1:
+            node.count -= 1
+            self.size -= 1
+            _add_along_path(self.root, sk, -1)
+            return
+        self.size -= node.count
+        self.root = self._delete_node(self.root, sk)
+
+    def _delete(self, node, sk):
+        return self._delete_node(node, sk)
+
+    cdef AVLNode _delete_node(self, AVLNode node, object sk):
+        cdef AVLNode succ
+        if node is None:
+            return None
+        if sk < node.sort_key:
+            node.left = self._delete_node(node.left, sk)
+        elif sk > node.sort_key:
+            node.right = self._delete_node(node.right, sk)
+        else:
+            if node.left is None:
+                return node.right
+            elif node.right is None:
+                return node.left
+            else:
+                # unlink the successor node itself: with a key function,
+                # another node below may share its sort key
+                node.right, succ = self._delete_min_node(node.right)
+                node.key = succ.key
+                node.sort_key = succ.sort_key
+                node.count = succ.count
+        return _rebalance(node, _h(node.left), _h(node.right))
+
+    def add(self, key, Py_ssize_t n=1):
+        cdef AVLNode node
+        self._require_multiset()
+        if n < 1:
+            raise ValueError(f"n must be at least 1, got {n}")
+        sk = key if self.key_func is None else self.key_func(key)
+        self.mutations += 1
+        self.size += n
+        node = self._find(sk)
+        if node is not None:
+            node.count += n
+            _add_along_path(self.root, sk, n)
+            return
+        self.root = self._insert_node(self.root, self._new_node(key, sk, n))
+
+    def discard(self, key, Py_ssize_t n=1):
+        cdef AVLNode node
+        cdef Py_ssize_t removed
+        self._require_multiset()
+        if n < 1:
+            raise ValueError(f"n must be at least 1, got {n}")
+        sk = key if self.key_func is None else self.key_func(key)
+        node = self._find(sk)
+        if node is None:
+            return 0
+        self.mutations += 1
+        if node.count > n:
+            node.count -= n
+            self.size -= n
+            _add_along_path(self.root, sk, -n)
+            return n
+        removed = node.count
+        self.size -= removed
+        self.root = self._delete_node(self.root, sk)
+        return removed
+
+    def count(self, key):
+        cdef AVLNode node
+        self._require_multiset()
+        node = self._find(key if self.key_func is None else self.key_func(key))
+        return node.count if node is not None else 0
+
+    def rank(self, key):
+        cdef Py_ssize_t total = 0
+        cdef AVLNode node = self.root
+        sk = key if self.key_func is None else self.key_func(key)
+        while node is not None:
+            if node.sort_key < sk:
+                total += node.count + _t(node.left)
+                node = node.right
+            else:
+                node = node.left
+        return total
+
+    def irange(self, lo=None, hi=None):
+        """Yield the stored keys from lo to hi inclusive, in order (copies repeated).
+
+        None leaves that end of the range open.
+        """
+        if self.key_func is not None:
+            lo = None if lo is None else self.key_func(lo)
+            hi = None if hi is None else self.key_func(hi)
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                # equal keys may sit on either side, hence the non-strict pruning
+                node = node.left if lo is None or node.sort_key >= lo else None
+            node = stack.pop()
+            k = node.sort_key
+            if hi is not None and k > hi:
+                return
+            if lo is None or k >= lo:
+                for _ in range(node.count):
+                    yield node.key
+            node = node.right
+
+    def _require_multiset(self):
+        if not self.multiset:
+            raise ValueError("count/add/discard need a tree created with multiset=True")
+
+    def insertInTree(self, key):
+        return self.insert(key)
+
+    def searchTree(self, key):
+        return self.search(key)
+
+    def deleteFromTree(self, key):
+        return self.delete(key)
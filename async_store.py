@@ -0,0 +1,144 @@
+"""Asyncio front end for RBtree / AVL with request batching.
+
+    store = AsyncTreeStore(RBtree())
+    async with store:
+        await store.put(5)
+        found = await store.get(5)
+        keys = await store.range(0, 10)
+
+Every call enqueues a request and awaits its future. A single worker task owns
+the tree: it wakes on the first queued request, waits `window` seconds (0
+just yields once to the event loop) so concurrent callers can pile on, then
+drains up to `max_batch` requests and runs them back to back in arrival
+order. The tree is only touched from that task, so no locks are needed, and
+every caller sees the effects of all requests queued before its own.
+
+Batching trades a little latency (at most `window`) for fewer event-loop
+round trips per request. Consecutive gets of the same key inside a batch are
+answered with a single tree search.
+"""
+import asyncio
+from collections import deque
+
+_GET, _PUT, _DELETE, _RANGE = range(4)
+
+
+class AsyncTreeStore:
+    def __init__(self, tree, window=0.0, max_batch=1024):
+        self.tree = tree
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = deque()
+        # resolved by _submit when the worker is idle and waiting for work
+        self._wakeup = None
+        self._worker = None
+        self._closing = False
+        # batching counters
+        self.requests = 0
+        self.batches = 0
+        self.largest_batch = 0
+
+    async def start(self):
+        if self._worker is None:
+            self._closing = False
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self):
+        """Finish every queued request, then stop the worker."""
+        if self._worker is None:
+            return
+        self._closing = True
+        self._wake()
+        await self._worker
+        self._worker = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _submit(self, op, key, arg=None):
+        if self._worker is None or self._closing:
+            raise RuntimeError("store is not running (use 'async with store' or await start())")
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((op, key, arg, future))
+        self._wake()
+        return future
+
+    def _wake(self):
+        wakeup = self._wakeup
+        if wakeup is not None and not wakeup.done():
+            wakeup.set_result(None)
+
+    async def get(self, key):
+        """True if key is stored."""
+        return await self._submit(_GET, key)
+
+    async def put(self, key):
+        await self._submit(_PUT, key)
+
+    async def delete(self, key):
+        """Remove one copy of key; True if there was one."""
+        return await self._submit(_DELETE, key)
+
+    async def range(self, lo=None, hi=None):
+        """List of stored keys from lo to hi inclusive (None leaves that end open)."""
+        return await self._submit(_RANGE, lo, hi)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        pending = self._pending
+        while True:
+            if not pending:
+                if self._closing:
+                    return
+                self._wakeup = loop.create_future()
+                await self._wakeup
+                self._wakeup = None
+                continue
+            # let concurrent callers add to the batch
+            await asyncio.sleep(self.window)
+            count = min(len(pending), self.max_batch)
+            self._execute([pending.popleft() for _ in range(count)])
+
+    def _execute(self, batch):
+        self.batches += 1
+        self.requests += len(batch)
+        if len(batch) > self.largest_batch:
+            self.largest_batch = len(batch)
+        tree = self.tree
+        # answers for gets since the last mutation in this batch
+        seen = {}
+        for op, key, arg, future in batch:
+            try:
+                if op == _GET:
+                    result = seen.get(key)
+                    if result is None:
+                        result = seen[key] = tree.searchTree(key)
+                elif op == _PUT:
+                    seen.clear()
+                    result = tree.insertInTree(key)
+                elif op == _DELETE:
+                    seen.clear()
+                    # RBtree prints a warning for missing values, so look first
+                    result = tree.searchTree(key)
+                    if result:
+                        tree.deleteFromTree(key)
+                else:
+                    result = list(tree.irange(key, arg))
+            except Exception as exc:
+                if not future.cancelled():
+                    future.set_exception(exc)
+                continue
+            if not future.cancelled():
+                future.set_result(result)
+
+    def batch_stats(self):
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'largest_batch': self.largest_batch,
+            'mean_batch': self.requests / self.batches if self.batches else 0.0,
+        }
@@ -0,0 +1,126 @@
+"""Load generator for `AsyncTreeStore`.
+
+Usage:
+    python3 async_store_benchmark.py [--n 100000] [--clients 256] [--requests 200000]
+
+Builds an RBtree and an AVL with n keys and then drives them from `clients`
+concurrent coroutines. Each client issues requests back to back: 90% get,
+5% put, 4% delete and 1% range scans of 20 keys. Reported per run:
+throughput, p50 / p99 / p99.9 latency, and mean batch size.
+
+The baseline ("direct") yields to the loop once per request and then calls
+the tree synchronously inside the client coroutine, which is what a handler
+calling `searchTree` per request does. Its latency includes the wait for the
+loop. The store runs use several batching windows.
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from RBtree1 import RBtree
+from avl import AVL
+from async_store import AsyncTreeStore
+
+WINDOWS = [0.0, 0.0005, 0.002]
+
+
+def make_requests(n, count, rng):
+    out = []
+    for _ in range(count):
+        r = rng.random()
+        key = rng.randrange(2 * n)
+        if r < 0.90:
+            out.append(('get', key))
+        elif r < 0.95:
+            out.append(('put', key))
+        elif r < 0.99:
+            out.append(('delete', key))
+        else:
+            out.append(('range', key))
+    return out
+
+
+async def direct_client(tree, requests, latencies):
+    for op, key in requests:
+        t0 = time.perf_counter()
+        # the request waits its turn on the event loop, like a handler would
+        await asyncio.sleep(0)
+        if op == 'get':
+            tree.searchTree(key)
+        elif op == 'put':
+            tree.insertInTree(key)
+        elif op == 'delete':
+            if tree.searchTree(key):
+                tree.deleteFromTree(key)
+        else:
+            list(tree.irange(key, key + 19))
+        latencies.append(time.perf_counter() - t0)
+
+
+async def store_client(store, requests, latencies):
+    for op, key in requests:
+        t0 = time.perf_counter()
+        if op == 'get':
+            await store.get(key)
+        elif op == 'put':
+            await store.put(key)
+        elif op == 'delete':
+            await store.delete(key)
+        else:
+            await store.range(key, key + 19)
+        latencies.append(time.perf_counter() - t0)
+
+
+async def run_load(tree, per_client, window=None):
+    """Drive `tree` directly (window None) or through a store; return (seconds, latencies, store)."""
+    latencies = []
+    store = None
+    if window is None:
+        clients = [direct_client(tree, reqs, latencies) for reqs in per_client]
+    else:
+        store = AsyncTreeStore(tree, window=window)
+        await store.start()
+        clients = [store_client(store, reqs, latencies) for reqs in per_client]
+    t0 = time.perf_counter()
+    await asyncio.gather(*clients)
+    elapsed = time.perf_counter() - t0
+    if store is not None:
+        await store.close()
+    return elapsed, latencies, store
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--n', type=int, default=100000, help='keys in the tree')
+    parser.add_argument('--clients', type=int, default=256)
+    parser.add_argument('--requests', type=int, default=200000, help='total requests per run')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    per_client = [make_requests(args.n, args.requests // args.clients, rng) for _ in range(args.clients)]
+    total = sum(len(reqs) for reqs in per_client)
+
+    for name, ctor in (('RBtree', RBtree), ('AVL', AVL)):
+        values = list(range(0, 2 * args.n, 2))
+        rng.shuffle(values)
+        for window in [None] + WINDOWS:
+            tree = ctor()
+            for v in values:
+                tree.insertInTree(v)
+            elapsed, latencies, store = asyncio.run(run_load(tree, per_client, window))
+            latencies.sort()
+            label = 'direct' if window is None else f'store window={window * 1e3:g}ms'
+            batch = '' if store is None else f", mean batch {store.batch_stats()['mean_batch']:.1f}"
+            print(f"{name:6s} {label:24s} {total / elapsed:9.0f} req/s  "
+                  f"p50 {percentile(latencies, 0.5) * 1e6:8.1f}us  "
+                  f"p99 {percentile(latencies, 0.99) * 1e6:8.1f}us  "
+                  f"p99.9 {percentile(latencies, 0.999) * 1e6:8.1f}us{batch}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,30 +1,59 @@
+import bloom_filter
+import lazy_delete
+import tree_profiler
+import tree_stats
+
+
 class AVLNode:
+    # sort_key is what the tree compares: key itself, or the tree's key
+    # function applied to it once on insert.
+    # count is the number of copies held by the node (only >1 in multiset mode)
+    # and total the copies held by the whole subtree rooted here (for rank)
+    __slots__ = ('key', 'sort_key', 'count', 'total', 'left', 'right', 'height')
+
     def __init__(self, key):
         self.key = key
+        self.sort_key = key
+        self.count = 1
+        self.total = 1
         self.left = None
         self.right = None
         self.height = 1
 
 
-def _height(node):
-    return node.height if node else 0
-
-
-def _update_height(node):
-    node.height = 1 + max(_height(node.left), _height(node.right))
-
-
-def _balance_factor(node):
-    return _height(node.left) - _height(node.right) if node else 0
-
+# The rotations and _rebalance below are on the insert/delete hot path, so child
+# heights are read into locals (None counts as height 0). Subtree totals are
+# recomputed from the children alongside the heights, since the node passed in
+# may have a stale total after its child changed.
 
 def _rotate_right(y):
     x = y.left
     T2 = x.right
     x.right = y
     y.left = T2
-    _update_height(y)
-    _update_height(x)
+    yr = y.right
+    if T2 is not None:
+        h2 = T2.height
+        ty = y.count + T2.total
+    else:
+        h2 = 0
+        ty = y.count
+    if yr is not None:
+        hr = yr.height
+        ty += yr.total
+    else:
+        hr = 0
+    hy = (h2 if h2 > hr else hr) + 1
+    y.height = hy
+    y.total = ty
+    xl = x.left
+    if xl is not None:
+        hl = xl.height
+        ty += xl.total
+    else:
+        hl = 0
+    x.height = (hl if hl > hy else hy) + 1
+    x.total = x.count + ty
     return x
 
 
@@ -33,99 +62,370 @@ def _rotate_left(x):
     T2 = y.left
     y.left = x
     x.right = T2
-    _update_height(x)
-    _update_height(y)
+    xl = x.left
+    if T2 is not None:
+        h2 = T2.height
+        tx = x.count + T2.total
+    else:
+        h2 = 0
+        tx = x.count
+    if xl is not None:
+        hl = xl.height
+        tx += xl.total
+    else:
+        hl = 0
+    hx = (hl if hl > h2 else h2) + 1
+    x.height = hx
+    x.total = tx
+    yr = y.right
+    if yr is not None:
+        hr = yr.height
+        tx += yr.total
+    else:
+        hr = 0
+    y.height = (hx if hx > hr else hr) + 1
+    y.total = y.count + tx
     return y
 
 
+def _rebalance(node, lh, rh):
+    """Fix node's height and balance given its children's heights; return the subtree root."""
+    if lh - rh > 1:
+        left = node.left
+        ll, lr = left.left, left.right
+        # Left Right: rotate the left child first
+        if (lr.height if lr is not None else 0) > (ll.height if ll is not None else 0):
+            node.left = _rotate_left(left)
+        # Left Left
+        return _rotate_right(node)
+    if rh - lh > 1:
+        right = node.right
+        rl, rr = right.left, right.right
+        # Right Left: rotate the right child first
+        if (rl.height if rl is not None else 0) > (rr.height if rr is not None else 0):
+            node.right = _rotate_right(right)
+        # Right Right
+        return _rotate_left(node)
+    node.height = (lh if lh > rh else rh) + 1
+    total = node.count
+    left = node.left
+    if left is not None:
+        total += left.total
+    right = node.right
+    if right is not None:
+        total += right.total
+    node.total = total
+    return node
+
+
+def _add_along_path(tree, sk, delta):
+    """Add delta to the totals on the search path for sk, down to the first node holding it."""
+    node = tree.root
+    visits = 0
+    while node is not None:
+        visits += 1
+        node.total += delta
+        k = node.sort_key
+        if sk == k:
+            break
+        node = node.left if sk < k else node.right
+    # == first: a match costs one comparison, a step two
+    if tree.profiler is not None:
+        tree.visits += visits
+        tree.comparisons += 2 * visits - 1
+
+
 class AVL:
     """AVL tree implementation with insert, delete, search, and RBtree-compatible wrappers."""
-    def __init__(self):
+    # search / insert / delete entry points wrapped by enable_path_histogram
+    PATH_OPS = {'search': 'search', 'insert': 'insert', 'delete': 'delete'}
+    # helpers timed as separate phases by enable_profiling (module functions included)
+    PROFILE_PHASES = ('_find', '_insert', '_delete', '_delete_min', '_rotate_left', '_rotate_right')
+
+    def __init__(self, key=None, multiset=False):
         self.root = None
+        # optional key function (like sorted(key=...)); None compares keys directly
+        self.key_func = key
+        # multiset mode keeps one node per distinct key and counts duplicates
+        # in node.count; size is then the total number of copies
+        self.multiset = multiset
+        self.size = 0
+        # telemetry: mutation counter for stats() caching, optional path histogram
+        self.mutations = 0
+        self.path_histogram = None
+        # telemetry for the profiler, counted only while one is attached: nodes
+        # whose key a descent compared, and the key comparisons it made
+        self.visits = 0
+        self.comparisons = 0
+        # optional counting Bloom filter in front of searches
+        self.bloom_filter = None
+        # tombstone state while lazy deletion is enabled
+        self.lazy_delete = None
+        # per-operation profiler while profiling is enabled
+        self.profiler = None
 
     def search(self, key):
+        sk = key if self.key_func is None else self.key_func(key)
         cur = self.root
-        while cur:
-            if key == cur.key:
+        visits = 0
+        while cur is not None:
+            visits += 1
+            k = cur.sort_key
+            if sk == k:
+                if self.profiler is not None:
+                    self.visits += visits
+                    self.comparisons += 2 * visits - 1
                 return True
-            elif key < cur.key:
+            elif sk < k:
                 cur = cur.left
             else:
                 cur = cur.right
+        if self.profiler is not None:
+            self.visits += visits
+            self.comparisons += 2 * visits
         return False
 
+    def _find(self, sk):
+        cur = self.root
+        visits = 0
+        while cur is not None:
+            visits += 1
+            k = cur.sort_key
+            if sk == k:
+                if self.profiler is not None:
+                    self.visits += visits
+                    self.comparisons += 2 * visits - 1
+                return cur
+            elif sk < k:
+                cur = cur.left
+            else:
+                cur = cur.right
+        if self.profiler is not None:
+            self.visits += visits
+            self.comparisons += 2 * visits
+        return None
+
     def insert(self, key):
-        self.root = self._insert(self.root, key)
+        if self.multiset:
+            self.add(key)
+            return
+        self.mutations += 1
+        new = AVLNode(key)
+        if self.key_func is not None:
+            # plain keys (e.g. ints) skip the key call entirely
+            new.sort_key = self.key_func(key)
+        self.root = self._insert(self.root, new)
+        self.size += 1
 
-    def _insert(self, node, key):
+    def _insert(self, node, new):
         if node is None:
-            return AVLNode(key)
-        if key < node.key:
-            node.left = self._insert(node.left, key)
+            return new
+        if self.profiler is not None:
+            # one comparison per level
+            self.visits += 1
+            self.comparisons += 1
+        if new.sort_key < node.sort_key:
+            left = node.left = self._insert(node.left, new)
+            right = node.right
         else:
-            node.right = self._insert(node.right, key)
+            right = node.right = self._insert(node.right, new)
+            left = node.left
 
-        _update_height(node)
-        bf = _balance_factor(node)
+        lh = left.height if left is not None else 0
+        rh = right.height if right is not None else 0
+        return _rebalance(node, lh, rh)
 
-        # Left Left
-        if bf > 1 and key < node.left.key:
-            return _rotate_right(node)
-        # Right Right
-        if bf < -1 and key > node.right.key:
-            return _rotate_left(node)
-        # Left Right
-        if bf > 1 and key > node.left.key:
-            node.left = _rotate_left(node.left)
-            return _rotate_right(node)
-        # Right Left
-        if bf < -1 and key < node.right.key:
-            node.right = _rotate_right(node.right)
-            return _rotate_left(node)
-
-        return node
-
-    def _find_min(self, node):
-        cur = node
-        while cur.left:
-            cur = cur.left
-        return cur
+    def _delete_min(self, node):
+        """Unlink the leftmost node of the subtree; return (new subtree root, that node)."""
+        left = node.left
+        if left is None:
+            return node.right, node
+        left, detached = self._delete_min(left)
+        node.left = left
+        right = node.right
+        lh = left.height if left is not None else 0
+        rh = right.height if right is not None else 0
+        return _rebalance(node, lh, rh), detached
 
     def delete(self, key):
-        self.root = self._delete(self.root, key)
+        sk = key if self.key_func is None else self.key_func(key)
+        node = self._find(sk)
+        if node is None:
+            return
+        self.mutations += 1
+        if self.multiset and node.count > 1:
+            node.count -= 1
+            self.size -= 1
+            _add_along_path(self, sk, -1)
+            return
+        self.size -= node.count
+        self.root = self._delete(self.root, sk)
 
-    def _delete(self, node, key):
+    def _delete(self, node, sk):
+        # sk is the precomputed sort key of the element to remove
         if node is None:
             return None
-        if key < node.key:
-            node.left = self._delete(node.left, key)
-        elif key > node.key:
-            node.right = self._delete(node.right, key)
+        counting = self.profiler is not None
+        k = node.sort_key
+        if sk < k:
+            if counting:
+                self.visits += 1
+                self.comparisons += 1
+            node.left = self._delete(node.left, sk)
+        elif sk > k:
+            if counting:
+                self.visits += 1
+                self.comparisons += 2
+            node.right = self._delete(node.right, sk)
         else:
+            if counting:
+                self.visits += 1
+                self.comparisons += 2
             # node to delete
             if node.left is None:
                 return node.right
             elif node.right is None:
                 return node.left
             else:
-                succ = self._find_min(node.right)
+                # unlink the successor node itself: with a key function,
+                # another node below may share its sort key
+                node.right, succ = self._delete_min(node.right)
                 node.key = succ.key
-                node.right = self._delete(node.right, succ.key)
-
-        _update_height(node)
-        bf = _balance_factor(node)
-
-        # Rebalance
-        if bf > 1:
-            if _balance_factor(node.left) < 0:
-                node.left = _rotate_left(node.left)
-            return _rotate_right(node)
-        if bf < -1:
-            if _balance_factor(node.right) > 0:
-                node.right = _rotate_right(node.right)
-            return _rotate_left(node)
-
-        return node
+                node.sort_key = succ.sort_key
+                node.count = succ.count
+
+        left = node.left
+        right = node.right
+        lh = left.height if left is not None else 0
+        rh = right.height if right is not None else 0
+        return _rebalance(node, lh, rh)
+
+    def add(self, key, n=1):
+        """Multiset mode: add n copies of key, bumping the count in place if present."""
+        self._require_multiset()
+        if n < 1:
+            raise ValueError(f"n must be at least 1, got {n}")
+        sk = key if self.key_func is None else self.key_func(key)
+        self.mutations += 1
+        self.size += n
+        node = self._find(sk)
+        if node is not None:
+            node.count += n
+            _add_along_path(self, sk, n)
+            return
+        new = AVLNode(key)
+        new.sort_key = sk
+        new.count = new.total = n
+        self.root = self._insert(self.root, new)
+
+    def discard(self, key, n=1):
+        """Multiset mode: remove up to n copies of key and return how many were removed."""
+        self._require_multiset()
+        if n < 1:
+            raise ValueError(f"n must be at least 1, got {n}")
+        sk = key if self.key_func is None else self.key_func(key)
+        node = self._find(sk)
+        if node is None:
+            return 0
+        self.mutations += 1
+        if node.count > n:
+            node.count -= n
+            self.size -= n
+            _add_along_path(self, sk, -n)
+            return n
+        removed = node.count
+        self.size -= removed
+        self.root = self._delete(self.root, sk)
+        return removed
+
+    def count(self, key):
+        """Multiset mode: number of copies of key held by the tree."""
+        self._require_multiset()
+        node = self._find(key if self.key_func is None else self.key_func(key))
+        return node.count if node is not None else 0
+
+    def rank(self, key):
+        """Number of stored elements (copies included) that sort strictly before key.
+
+        One descent using the subtree totals: O(log n).
+        """
+        sk = key if self.key_func is None else self.key_func(key)
+        total = 0
+        node = self.root
+        while node is not None:
+            if node.sort_key < sk:
+                # node and its whole left subtree sort before key
+                left = node.left
+                total += node.count if left is None else node.count + left.total
+                node = node.right
+            else:
+                # equal keys may sit on either side, so keep going left
+                node = node.left
+        return total
+
+    def irange(self, lo=None, hi=None):
+        """Yield the stored keys from lo to hi inclusive, in order (copies repeated).
+
+        None leaves that end of the range open.
+        """
+        if self.key_func is not None:
+            lo = None if lo is None else self.key_func(lo)
+            hi = None if hi is None else self.key_func(hi)
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                # equal keys may sit on either side, hence the non-strict pruning
+                node = node.left if lo is None or node.sort_key >= lo else None
+            node = stack.pop()
+            k = node.sort_key
+            if hi is not None and k > hi:
+                return
+            if lo is None or k >= lo:
+                for _ in range(node.count):
+                    yield node.key
+            node = node.right
+
+    def _require_multiset(self):
+        if not self.multiset:
+            raise ValueError("count/add/discard need a tree created with multiset=True")
+
+    def stats(self, max_staleness=0.1):
+        """Height, depth, node count and memory estimate (see tree_stats)."""
+        return tree_stats.tree_stats(self, max_staleness)
+
+    def enable_bloom_filter(self, fp_rate=0.01, capacity=None):
+        """Short-circuit definite misses with a counting Bloom filter (see bloom_filter)."""
+        return bloom_filter.enable_bloom_filter(self, fp_rate, capacity)
+
+    def disable_bloom_filter(self):
+        bloom_filter.disable_bloom_filter(self)
+
+    def enable_lazy_delete(self, threshold=0.25):
+        """Delete by marking tombstones and compact past a threshold (see lazy_delete)."""
+        return lazy_delete.enable_lazy_delete(self, threshold)
+
+    def disable_lazy_delete(self):
+        lazy_delete.disable_lazy_delete(self)
+
+    def enable_profiling(self, capacity=65536):
+        """Record phase timings and counts of every operation in a ring buffer (see tree_profiler)."""
+        return tree_profiler.enable_profiling(self, capacity)
+
+    def disable_profiling(self):
+        tree_profiler.disable_profiling(self)
+
+    def freeze(self):
+        """Read-only Eytzinger-layout snapshot for fast lookups (see frozen_index; needs NumPy)."""
+        from frozen_index import freeze
+        return freeze(self)
+
+    def enable_path_histogram(self):
+        return tree_stats.enable_path_histogram(self)
+
+    def disable_path_histogram(self):
+        tree_stats.disable_path_histogram(self)
 
     # Compatibility wrappers
     def insertInTree(self, key):
@@ -0,0 +1,247 @@
+"""Counting Bloom filter front for negative lookups on RBtree, AVL and BST.
+
+`tree.enable_bloom_filter(fp_rate=0.01)` attaches a `CountingBloomFilter`
+holding the tree's sort keys. The search entry point then answers "no" straight
+from the filter for keys it has definitely never seen. Only possible hits (and
+the fp_rate share of misses) walk the tree.
+
+Like path histograms, the filter works by shadowing the tree's lowest-level
+search / insert / delete methods (`PATH_OPS`) on the instance. In multiset
+mode it also shadows add / discard. Mutations update the counters by however
+much `tree.size` changed, so duplicate inserts and missing deletes keep the
+filter exact. When the tree outgrows the capacity the filter was sized for,
+the filter is rebuilt at twice the capacity. This keeps the false-positive
+rate near the target.
+
+Compiled trees are not supported, and the filter cannot be combined with
+the other instance-shadowing modes (see tree_modes).
+"""
+import math
+import random
+
+import tree_modes
+
+
+_BLOCK_BITS = 512
+# each key's probe mask is the OR of one entry from each of three tables
+_TABLE_SIZE = 4096
+_patterns_cache = {}
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+
+
+def _patterns(k):
+    """Three tables of random masks over one block, k bits in total, plus their bit positions."""
+    if k not in _patterns_cache:
+        rng = random.Random(k)
+        tables = []
+        for part in range(3):
+            bits = k // 3 + (part < k % 3)
+            positions = [tuple(rng.sample(range(_BLOCK_BITS), bits)) for _ in range(_TABLE_SIZE)]
+            masks = [sum(1 << b for b in pos) for pos in positions]
+            tables.append((masks, positions))
+        _patterns_cache[k] = tables
+    return _patterns_cache[k]
+
+
+def _mix(sk):
+    # hash(int) is the int itself; hashing it in a tuple scrambles the bits
+    return hash((sk, 0x9E3779B9)) & _MASK64
+
+
+def _blocked_fp(keys_per_block, k):
+    # false-positive rate when the number of keys per block is Poisson distributed
+    total = 0.0
+    p = math.exp(-keys_per_block)
+    j = 0
+    while True:
+        total += p * (1 - (1 - 1 / _BLOCK_BITS) ** (j * k)) ** k
+        j += 1
+        p *= keys_per_block / j
+        if j > keys_per_block and p < 1e-12:
+            return total
+
+
+class CountingBloomFilter:
+    """Blocked counting Bloom filter: removable keys, one word test per lookup.
+
+    The bits are split into 512-bit blocks, each kept as one Python int.
+    A key hashes to a block and a k-bit mask inside it, so a lookup is a
+    single `word & mask == mask`. Every bit also has an 8-bit saturating
+    counter so keys can be removed.
+
+    k = log2(1 / fp_rate). The number of blocks is the smallest for which
+    the Poisson-blocked false-positive rate at `capacity` keys stays below
+    0.75 * fp_rate. The margin covers the correlation that the pattern tables
+    add; measured rates land at or just under fp_rate.
+    """
+
+    def __init__(self, capacity=1024, fp_rate=0.01):
+        if not 0 < fp_rate < 1:
+            raise ValueError("fp_rate must be between 0 and 1")
+        self.capacity = max(1, capacity)
+        self.fp_rate = fp_rate
+        self.num_hashes = k = max(1, round(-math.log2(fp_rate)))
+        lo, hi = 1, self.capacity
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if _blocked_fp(self.capacity / mid, k) <= 0.75 * fp_rate:
+                hi = mid
+            else:
+                lo = mid + 1
+        self.num_blocks = lo
+        self.num_counters = lo * _BLOCK_BITS
+        self.words = [0] * lo
+        self.counters = bytearray(self.num_counters)
+        self._tables = _patterns(k)
+        self._masks = [masks for masks, _ in self._tables]
+        # elements currently represented (with multiplicity)
+        self.count = 0
+        # lookup counters: probes answered, and how many the filter rejected
+        self.checks = 0
+        self.rejected = 0
+
+    def _positions(self, sk):
+        x = _mix(sk)
+        block = (x >> 36) % self.num_blocks
+        bits = []
+        for shift, (_, positions) in zip((0, 12, 24), self._tables):
+            bits.extend(positions[(x >> shift) & 4095])
+        return block, bits
+
+    def add(self, sk, n=1):
+        block, bits = self._positions(sk)
+        counters = self.counters
+        base = block * _BLOCK_BITS
+        word = self.words[block]
+        for b in bits:
+            c = counters[base + b]
+            # a saturated counter stays at 255 for good (worst case: false positives)
+            if c != 255:
+                counters[base + b] = c + n if c + n < 255 else 255
+            word |= 1 << b
+        self.words[block] = word
+        self.count += n
+
+    def remove(self, sk, n=1):
+        block, bits = self._positions(sk)
+        counters = self.counters
+        base = block * _BLOCK_BITS
+        word = self.words[block]
+        for b in bits:
+            c = counters[base + b]
+            if c != 255:
+                c = counters[base + b] = c - n if c > n else 0
+                if not c:
+                    word &= ~(1 << b)
+        self.words[block] = word
+        self.count -= n
+
+    def might_contain(self, sk):
+        self.checks += 1
+        x = hash((sk, 0x9E3779B9)) & _MASK64
+        m1, m2, m3 = self._masks
+        mask = m1[x & 4095] | m2[(x >> 12) & 4095] | m3[(x >> 24) & 4095]
+        if self.words[(x >> 36) % self.num_blocks] & mask == mask:
+            return True
+        self.rejected += 1
+        return False
+
+    def stats(self):
+        return {
+            'capacity': self.capacity,
+            'fp_rate': self.fp_rate,
+            'counters': self.num_counters,
+            'hashes': self.num_hashes,
+            'elements': self.count,
+            'checks': self.checks,
+            'rejected': self.rejected,
+        }
+
+
+def _sort_keys(tree):
+    # (sort key, count) for every node, in no particular order
+    stack = [tree.root] if tree.root is not None else []
+    while stack:
+        node = stack.pop()
+        yield node.sort_key, node.count
+        if node.left is not None:
+            stack.append(node.left)
+        if node.right is not None:
+            stack.append(node.right)
+
+
+def _filled(tree, capacity, fp_rate):
+    bloom = CountingBloomFilter(capacity, fp_rate)
+    for sk, count in _sort_keys(tree):
+        bloom.add(sk, count)
+    return bloom
+
+
+def refill_bloom_filter(tree):
+    """Rebuild an attached filter from the tree's keys after a bulk change
+    that bypassed the shadowed mutators (e.g. `IntervalTree.load`)."""
+    bloom = tree.bloom_filter
+    capacity = bloom.capacity
+    while capacity < tree.size:
+        capacity *= 2
+    tree.bloom_filter = _filled(tree, capacity, bloom.fp_rate)
+
+
+def enable_bloom_filter(tree, fp_rate=0.01, capacity=None):
+    """Attach a counting Bloom filter to `tree` and return it.
+
+    capacity defaults to twice the current size (at least 1024).
+    """
+    if getattr(tree, 'bloom_filter', None) is not None:
+        return tree.bloom_filter
+    tree_modes.check_can_enable(tree, 'bloom_filter')
+    capacity = capacity or max(1024, 2 * tree.size)
+    tree.bloom_filter = _filled(tree, capacity, fp_rate)
+
+    key_func = tree.key_func
+    # depth of nested mutator calls; only the outermost one updates the filter
+    depth = [0]
+
+    def searching(method):
+        def wrapper(value):
+            sk = value if key_func is None else key_func(value)
+            if not tree.bloom_filter.might_contain(sk):
+                return False
+            return method(value)
+        return wrapper
+
+    def mutating(method):
+        def wrapper(value, *args):
+            before = tree.size
+            depth[0] += 1
+            try:
+                result = method(value, *args)
+            finally:
+                depth[0] -= 1
+            if depth[0] == 0:
+                delta = tree.size - before
+                bloom = tree.bloom_filter
+                sk = value if key_func is None else key_func(value)
+                if delta > 0:
+                    bloom.add(sk, delta)
+                    if bloom.count > bloom.capacity:
+                        grown = tree.bloom_filter = _filled(tree, 2 * bloom.capacity, bloom.fp_rate)
+                        grown.checks, grown.rejected = bloom.checks, bloom.rejected
+                elif delta < 0:
+                    bloom.remove(sk, -delta)
+            return result
+        return wrapper
+
+    for op, name in tree_modes.shadowed_methods(tree).items():
+        wrap = searching if op == 'search' else mutating
+        setattr(tree, name, wrap(getattr(tree, name)))
+    return tree.bloom_filter
+
+
+def disable_bloom_filter(tree):
+    """Drop the filter and restore the tree's own methods."""
+    if getattr(tree, 'bloom_filter', None) is None:
+        return
+    for name in tree_modes.shadowed_methods(tree).values():
+        delattr(tree, name)
+    tree.bloom_filter = None
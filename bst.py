@@ -1,43 +1,159 @@
+import bloom_filter
+import lazy_delete
+import tree_profiler
+import tree_stats
+
+
 class BSTNode:
+    # sort_key is what the tree compares: key itself, or the tree's key
+    # function applied to it once on insert.
+    # count is the number of copies held by the node (only >1 in multiset mode)
+    # and total the copies held by the whole subtree rooted here (for rank)
+    __slots__ = ('key', 'sort_key', 'count', 'total', 'left', 'right')
+
     def __init__(self, key):
         self.key = key
+        self.sort_key = key
+        self.count = 1
+        self.total = 1
         self.left = None
         self.right = None
 
 
+def _add_along_path(tree, sk, delta):
+    """Add delta to the totals on the search path for sk, down to the first node holding it."""
+    node = tree.root
+    visits = 0
+    while node is not None:
+        visits += 1
+        node.total += delta
+        k = node.sort_key
+        if sk == k:
+            break
+        node = node.left if sk < k else node.right
+    # == first: a match costs one comparison, a step two
+    if tree.profiler is not None:
+        tree.visits += visits
+        tree.comparisons += 2 * visits - 1
+
+
+def _count_new_leaf(tree, new, sk):
+    # count a just-linked leaf in every subtree above it; the comparisons
+    # already succeeded on the way down, so the totals cannot end up half done
+    cur = tree.root
+    visits = 0
+    while cur is not new:
+        visits += 1
+        cur.total += new.count
+        cur = cur.left if sk < cur.sort_key else cur.right
+    if tree.profiler is not None:
+        tree.visits += visits
+        tree.comparisons += visits
+
+
 class BST:
     """Simple unbalanced Binary Search Tree with insert, delete, search."""
-    def __init__(self):
+    # search / insert / delete entry points wrapped by enable_path_histogram
+    PATH_OPS = {'search': 'search', 'insert': 'insert', 'delete': 'delete'}
+    # helpers timed as separate phases by enable_profiling (module functions included)
+    PROFILE_PHASES = ('_find', '_delete_rec', '_find_min')
+
+    def __init__(self, key=None, multiset=False):
         self.root = None
+        # optional key function (like sorted(key=...)); None compares keys directly
+        self.key_func = key
+        # multiset mode keeps one node per distinct key and counts duplicates
+        # in node.count; size is then the total number of copies
+        self.multiset = multiset
+        self.size = 0
+        # telemetry: mutation counter for stats() caching, optional path histogram
+        self.mutations = 0
+        self.path_histogram = None
+        # telemetry for the profiler, counted only while one is attached: nodes
+        # whose key a descent compared, and the key comparisons it made
+        self.visits = 0
+        self.comparisons = 0
+        # optional counting Bloom filter in front of searches
+        self.bloom_filter = None
+        # tombstone state while lazy deletion is enabled
+        self.lazy_delete = None
+        # per-operation profiler while profiling is enabled
+        self.profiler = None
 
     def insert(self, key):
+        if self.multiset:
+            self.add(key)
+            return
+        self.mutations += 1
+        self.size += 1
+        new = BSTNode(key)
+        if self.key_func is None:
+            sk = key  # plain keys (e.g. ints) skip the key call entirely
+        else:
+            sk = new.sort_key = self.key_func(key)
         if self.root is None:
-            self.root = BSTNode(key)
+            self.root = new
             return
         cur = self.root
+        visits = 0
         while True:
-            if key < cur.key:
+            visits += 1
+            if sk < cur.sort_key:
                 if cur.left is None:
-                    cur.left = BSTNode(key)
-                    return
+                    cur.left = new
+                    break
                 cur = cur.left
             else:
                 if cur.right is None:
-                    cur.right = BSTNode(key)
-                    return
+                    cur.right = new
+                    break
                 cur = cur.right
+        if self.profiler is not None:
+            self.visits += visits
+            self.comparisons += visits
+        _count_new_leaf(self, new, sk)
 
     def search(self, key):
+        sk = key if self.key_func is None else self.key_func(key)
         cur = self.root
-        while cur:
-            if key == cur.key:
+        visits = 0
+        while cur is not None:
+            visits += 1
+            k = cur.sort_key
+            if sk == k:
+                if self.profiler is not None:
+                    self.visits += visits
+                    self.comparisons += 2 * visits - 1
                 return True
-            elif key < cur.key:
+            elif sk < k:
                 cur = cur.left
             else:
                 cur = cur.right
+        if self.profiler is not None:
+            self.visits += visits
+            self.comparisons += 2 * visits
         return False
 
+    def _find(self, sk):
+        cur = self.root
+        visits = 0
+        while cur is not None:
+            visits += 1
+            k = cur.sort_key
+            if sk == k:
+                if self.profiler is not None:
+                    self.visits += visits
+                    self.comparisons += 2 * visits - 1
+                return cur
+            elif sk < k:
+                cur = cur.left
+            else:
+                cur = cur.right
+        if self.profiler is not None:
+            self.visits += visits
+            self.comparisons += 2 * visits
+        return None
+
     def _find_min(self, node):
         cur = node
         while cur.left:
@@ -45,16 +161,39 @@ class BST:
         return cur
 
     def delete(self, key):
-        self.root = self._delete_rec(self.root, key)
+        sk = key if self.key_func is None else self.key_func(key)
+        node = self._find(sk)
+        if node is None:
+            return
+        self.mutations += 1
+        if self.multiset and node.count > 1:
+            node.count -= 1
+            self.size -= 1
+            _add_along_path(self, sk, -1)
+            return
+        self.size -= node.count
+        self.root = self._delete_rec(self.root, sk)
 
-    def _delete_rec(self, node, key):
+    def _delete_rec(self, node, sk):
+        # sk is the precomputed sort key of the element to remove
         if node is None:
             return None
-        if key < node.key:
-            node.left = self._delete_rec(node.left, key)
-        elif key > node.key:
-            node.right = self._delete_rec(node.right, key)
+        counting = self.profiler is not None
+        k = node.sort_key
+        if sk < k:
+            if counting:
+                self.visits += 1
+                self.comparisons += 1
+            node.left = self._delete_rec(node.left, sk)
+        elif sk > k:
+            if counting:
+                self.visits += 1
+                self.comparisons += 2
+            node.right = self._delete_rec(node.right, sk)
         else:
+            if counting:
+                self.visits += 1
+                self.comparisons += 2
             # node to delete
             if node.left is None:
                 return node.right
@@ -63,9 +202,166 @@ class BST:
             else:
                 succ = self._find_min(node.right)
                 node.key = succ.key
-                node.right = self._delete_rec(node.right, succ.key)
+                node.sort_key = succ.sort_key
+                node.count = succ.count
+                node.right = self._delete_rec(node.right, succ.sort_key)
+        total = node.count
+        if node.left is not None:
+            total += node.left.total
+        if node.right is not None:
+            total += node.right.total
+        node.total = total
         return node
 
+    def add(self, key, n=1):
+        """Multiset mode: add n copies of key, bumping the count in place if present."""
+        self._require_multiset()
+        if n < 1:
+            raise ValueError(f"n must be at least 1, got {n}")
+        sk = key if self.key_func is None else self.key_func(key)
+        self.mutations += 1
+        self.size += n
+        parent = None
+        cur = self.root
+        visits = 0
+        while cur is not None:
+            visits += 1
+            k = cur.sort_key
+            if sk == k:
+                if self.profiler is not None:
+                    self.visits += visits
+                    self.comparisons += 2 * visits - 1
+                cur.count += n
+                _add_along_path(self, sk, n)
+                return
+            parent = cur
+            cur = cur.left if sk < k else cur.right
+        # plus the side check against the parent below
+        if self.profiler is not None:
+            self.visits += visits
+            self.comparisons += 2 * visits + (parent is not None)
+        new = BSTNode(key)
+        new.sort_key = sk
+        new.count = new.total = n
+        if parent is None:
+            self.root = new
+            return
+        if sk < parent.sort_key:
+            parent.left = new
+        else:
+            parent.right = new
+        _count_new_leaf(self, new, sk)
+
+    def discard(self, key, n=1):
+        """Multiset mode: remove up to n copies of key and return how many were removed."""
+        self._require_multiset()
+        if n < 1:
+            raise ValueError(f"n must be at least 1, got {n}")
+        sk = key if self.key_func is None else self.key_func(key)
+        node = self._find(sk)
+        if node is None:
+            return 0
+        self.mutations += 1
+        if node.count > n:
+            node.count -= n
+            self.size -= n
+            _add_along_path(self, sk, -n)
+            return n
+        removed = node.count
+        self.size -= removed
+        self.root = self._delete_rec(self.root, sk)
+        return removed
+
+    def count(self, key):
+        """Multiset mode: number of copies of key held by the tree."""
+        self._require_multiset()
+        node = self._find(key if self.key_func is None else self.key_func(key))
+        return node.count if node is not None else 0
+
+    def rank(self, key):
+        """Number of stored elements (copies included) that sort strictly before key.
+
+        One descent using the subtree totals: O(height), which is only
+        O(log n) while the tree stays balanced.
+        """
+        sk = key if self.key_func is None else self.key_func(key)
+        total = 0
+        node = self.root
+        while node is not None:
+            if node.sort_key < sk:
+                # node and its whole left subtree sort before key
+                left = node.left
+                total += node.count if left is None else node.count + left.total
+                node = node.right
+            else:
+                # equal keys may sit on either side, so keep going left
+                node = node.left
+        return total
+
+    def irange(self, lo=None, hi=None):
+        """Yield the stored keys from lo to hi inclusive, in order (copies repeated).
+
+        None leaves that end of the range open.
+        """
+        if self.key_func is not None:
+            lo = None if lo is None else self.key_func(lo)
+            hi = None if hi is None else self.key_func(hi)
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                # equal keys may sit on either side, hence the non-strict pruning
+                node = node.left if lo is None or node.sort_key >= lo else None
+            node = stack.pop()
+            k = node.sort_key
+            if hi is not None and k > hi:
+                return
+            if lo is None or k >= lo:
+                for _ in range(node.count):
+                    yield node.key
+            node = node.right
+
+    def _require_multiset(self):
+        if not self.multiset:
+            raise ValueError("count/add/discard need a tree created with multiset=True")
+
+    def stats(self, max_staleness=0.1):
+        """Height, depth, node count and memory estimate (see tree_stats)."""
+        return tree_stats.tree_stats(self, max_staleness)
+
+    def enable_bloom_filter(self, fp_rate=0.01, capacity=None):
+        """Short-circuit definite misses with a counting Bloom filter (see bloom_filter)."""
+        return bloom_filter.enable_bloom_filter(self, fp_rate, capacity)
+
+    def disable_bloom_filter(self):
+        bloom_filter.disable_bloom_filter(self)
+
+    def enable_lazy_delete(self, threshold=0.25):
+        """Delete by marking tombstones and compact past a threshold (see lazy_delete)."""
+        return lazy_delete.enable_lazy_delete(self, threshold)
+
+    def disable_lazy_delete(self):
+        lazy_delete.disable_lazy_delete(self)
+
+    def enable_profiling(self, capacity=65536):
+        """Record phase timings and counts of every operation in a ring buffer (see tree_profiler)."""
+        return tree_profiler.enable_profiling(self, capacity)
+
+    def disable_profiling(self):
+        tree_profiler.disable_profiling(self)
+
+    def freeze(self):
+        """Read-only Eytzinger-layout snapshot for fast lookups (see frozen_index; needs NumPy)."""
+        from frozen_index import freeze
+        return freeze(self)
+
+    def enable_path_histogram(self):
+        return tree_stats.enable_path_histogram(self)
+
+    def disable_path_histogram(self):
+        tree_stats.disable_path_histogram(self)
+
     # Compatibility wrappers used by benchmark (match RBtree API names)
     def insertInTree(self, key):
         return self.insert(key)
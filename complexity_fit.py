@@ -0,0 +1,114 @@
+"""Fit measured cost curves to complexity models and find where curves cross.
+
+Each model is y = a + c * f(n) with f(n) one of log2 n, n or n log2 n: `c`
+is the constant in front of the growth term and `a` absorbs the fixed
+per-call overhead (interpreter dispatch, timer calls), which a pure c * f(n)
+fit would otherwise smear into c. The fit minimises relative error, so the
+small-n points count as much as the large-n ones over a sweep spanning
+several decades. Goodness of fit is reported as R^2 and as the RMS relative
+error.
+
+With a free intercept the models can fit a noisy or short sweep almost
+equally well, so a model is only declared best when every other model's
+relative error is at least `tie_ratio` times its own. Otherwise `best` is
+None and `tied` lists the models within that ratio, lowest error first.
+
+    fits = fit_models(sizes, seconds)
+    fits['best']                         # 'log n', or None on a tie
+    fits['models']['log n']['c']         # seconds per doubling of n
+    crossovers(fits_a, fits_b, lo, hi)   # n where the two fitted curves meet
+"""
+import math
+
+import numpy as np
+
+MODELS = {
+    'log n': lambda n: np.log2(n),
+    'n': lambda n: n,
+    'n log n': lambda n: n * np.log2(n),
+}
+
+
+def fit_model(sizes, values, model):
+    """Weighted least-squares fit of values ~ a + c * f(n) for one model."""
+    n = np.asarray(sizes, dtype=float)
+    y = np.asarray(values, dtype=float)
+    f = MODELS[model](n)
+    # dividing every row by y turns absolute residuals into relative ones
+    design = np.column_stack([np.ones_like(f), f]) / y[:, None]
+    (a, c), *_ = np.linalg.lstsq(design, np.ones_like(y), rcond=None)
+    predicted = a + c * f
+    ss_res = float(np.sum((y - predicted) ** 2))
+    ss_tot = float(np.sum((y - y.mean()) ** 2))
+    return {
+        'model': model,
+        'a': float(a),
+        'c': float(c),
+        'r2': 1.0 - ss_res / ss_tot if ss_tot > 0 else 1.0,
+        'rel_rmse': float(np.sqrt(np.mean(((y - predicted) / y) ** 2))),
+    }
+
+
+def fit_models(sizes, values, tie_ratio=1.25):
+    """Fit every model; return {'models': {name: fit}, 'ranked', 'best', 'tied'}.
+
+    ranked orders the models by relative error; best is ranked[0] if it wins
+    by tie_ratio, else None, and tied holds the models that are too close
+    to call (just [best] when there is a winner).
+    """
+    if len(sizes) < 3:
+        raise ValueError("need at least three sizes to compare two-parameter models")
+    models = {name: fit_model(sizes, values, name) for name in MODELS}
+    ranked = sorted(models, key=lambda name: models[name]['rel_rmse'])
+    lead = models[ranked[0]]['rel_rmse']
+    tied = [name for name in ranked if models[name]['rel_rmse'] <= tie_ratio * lead]
+    return {'models': models, 'ranked': ranked, 'best': ranked[0] if len(tied) == 1 else None, 'tied': tied}
+
+
+def predict(fit, n):
+    return fit['a'] + fit['c'] * MODELS[fit['model']](np.asarray(n, dtype=float))
+
+
+def crossovers(fits_a, fits_b, lo, hi, points=400):
+    """Sizes in [lo, hi] where the best-fit curves of a and b are equal.
+
+    The difference of the two curves is sampled on a geometric grid and
+    every sign change is refined by bisection in log n. Returns None when
+    either side has no decisive best model, since extrapolating a tie
+    says nothing.
+    """
+    if fits_a['best'] is None or fits_b['best'] is None:
+        return None
+    fa = fits_a['models'][fits_a['best']]
+    fb = fits_b['models'][fits_b['best']]
+    grid = np.geomspace(lo, hi, points)
+    diff = predict(fa, grid) - predict(fb, grid)
+    out = []
+    for i in range(points - 1):
+        if diff[i] == 0:
+            out.append(float(grid[i]))
+        elif diff[i] * diff[i + 1] < 0:
+            left, right = math.log(grid[i]), math.log(grid[i + 1])
+            for _ in range(60):
+                mid = (left + right) / 2
+                d = predict(fa, math.exp(mid)) - predict(fb, math.exp(mid))
+                if (d < 0) == (diff[i] < 0):
+                    left = mid
+                else:
+                    right = mid
+            out.append(math.exp((left + right) / 2))
+    return out
+
+
+def measured_crossovers(sizes, values_a, values_b):
+    """Sizes where the measured curves swap order, interpolated in log-log space."""
+    out = []
+    for i in range(len(sizes) - 1):
+        d0 = math.log(values_a[i]) - math.log(values_b[i])
+        d1 = math.log(values_a[i + 1]) - math.log(values_b[i + 1])
+        if d0 == 0:
+            out.append(float(sizes[i]))
+        elif d0 * d1 < 0:
+            t = d0 / (d0 - d1)
+            out.append(math.exp(math.log(sizes[i]) + t * (math.log(sizes[i + 1]) - math.log(sizes[i]))))
+    return out
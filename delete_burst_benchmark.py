@@ -0,0 +1,90 @@
+"""Delete-burst throughput with eager and lazy (tombstone) deletion.
+
+Usage:
+    python3 delete_burst_benchmark.py [--sizes 100000 1000000] [--fraction 0.5] [--trials 3]
+
+For RBtree, AVL and BST: build a tree from n shuffled keys, then delete a
+random `fraction` of them (the "delete half" phase of performance_analysis).
+Each tree runs in four modes:
+
+- eager: the tree's own deleteFromTree
+- lazy t=0.25 / t=0.5: tombstones, compacted automatically past that fraction
+- lazy, compact after: tombstones only, then one explicit compact() once the
+  burst is over
+
+Reported per mode: deletes per second over the whole burst (including any
+compactions), the time for one search of every surviving key right after the
+burst, and how many compactions ran. The best of `trials` runs is kept.
+"""
+import argparse
+import gc
+import random
+import time
+
+from RBtree1 import RBtree
+from avl import AVL
+from bst import BST
+
+MODES = [
+    ('eager', False, None),
+    ('lazy t=0.25', True, 0.25),
+    ('lazy t=0.5', True, 0.5),
+    ('lazy, compact after', True, None),
+]
+
+
+def run(ctor, values, to_delete, survivors, lazy, threshold):
+    tree = ctor()
+    for v in values:
+        tree.insertInTree(v)
+    if lazy:
+        tree.enable_lazy_delete(threshold)
+    delete = tree.deleteFromTree
+    gc.disable()
+    try:
+        t0 = time.perf_counter()
+        for v in to_delete:
+            delete(v)
+        if lazy and threshold is None:
+            tree.lazy_delete.compact()
+        burst = time.perf_counter() - t0
+        search = tree.searchTree
+        t0 = time.perf_counter()
+        for v in survivors:
+            search(v)
+        after = time.perf_counter() - t0
+    finally:
+        gc.enable()
+    compactions = tree.lazy_delete.compactions if lazy else 0
+    return burst, after, compactions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--fraction', type=float, default=0.5, help='share of the keys deleted')
+    parser.add_argument('--trials', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    for n in args.sizes:
+        values = list(range(n))
+        rng.shuffle(values)
+        to_delete = rng.sample(values, int(n * args.fraction))
+        gone = set(to_delete)
+        survivors = [v for v in values if v not in gone]
+        for name, ctor in (('RBtree', RBtree), ('AVL', AVL), ('BST', BST)):
+            for label, lazy, threshold in MODES:
+                best = None
+                for _ in range(args.trials):
+                    result = run(ctor, values, to_delete, survivors, lazy, threshold)
+                    if best is None or result[0] < best[0]:
+                        best = result
+                burst, after, compactions = best
+                print(f"n={n:<8d} {name:6s} {label:20s} {len(to_delete) / burst:10.0f} deletes/s  "
+                      f"search after {after / max(1, len(survivors)) * 1e6:5.2f}us  "
+                      f"compactions {compactions}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,22 @@
+"""Backend selection for the RBtree / AVL kernels.
+
+`from fasttrees import RBtree, AVL` gives the compiled classes from
+`_treekernels` when that extension has been built (see README), and the pure
+Python `RBtree1.RBtree` / `avl.AVL` otherwise. `BACKEND` reports which one
+was picked.
+
+Both backends share the core API: search / insert / delete, key= and
+multiset trees, rank, irange, stats and freeze. The Bloom filter, lazy
+deletion, profiling and path histogram modes only work on the pure Python
+classes; on the compiled ones their enable_* methods raise TypeError.
+"""
+
+try:
+    from _treekernels import RBtree, Node, AVL, AVLNode
+    BACKEND = 'cython'
+except ImportError:
+    from RBtree1 import RBtree, Node
+    from avl import AVL, AVLNode
+    BACKEND = 'python'
+
+__all__ = ['RBtree', 'Node', 'AVL', 'AVLNode', 'BACKEND']
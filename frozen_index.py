@@ -0,0 +1,163 @@
+"""Read-only, cache-friendly snapshot of RBtree, AVL and BST.
+
+`tree.freeze()` (or `freeze(tree)`) copies the tree's distinct sort keys into
+a NumPy array in Eytzinger (BFS) order: the root sits at index 1 and the
+children of slot i sit at 2i and 2i + 1. A search is a fixed sequence of
+`i = 2 * i + (a[i] < x)` steps over one contiguous array, with no node
+objects and no pointers. The first few levels share a handful of cache lines.
+
+The snapshot does not follow later changes to the tree. The batch lookups
+(`search_many`, `floor_many`, `ceiling_many`) take an array of keys and run
+every query down the layout together, one vectorized step per level, so a
+batch costs O(log n) NumPy calls in total. Walking the layout one query at
+a time in Python is slower than bisecting a list in C, so scalar lookups
+(`searchTree`, `floor`, `ceiling`) bisect a plain sorted list of the keys.
+"""
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+
+def _key_array(keys):
+    arr = np.asarray(keys)
+    if arr.ndim != 1 or arr.dtype.kind not in 'biufUSM':
+        # tuples, mixed or custom keys: keep the Python objects themselves
+        arr = np.fromiter(keys, dtype=object, count=len(keys))
+    return arr
+
+
+def _eytzinger_order(n):
+    """ranks[i] = in-order position of Eytzinger slot i (slot 0 maps to n)."""
+    ranks = [n] * (n + 1)
+    stack = []
+    i = 1
+    rank = 0
+    while stack or i <= n:
+        while i <= n:
+            stack.append(i)
+            i *= 2
+        i = stack.pop()
+        ranks[i] = rank
+        rank += 1
+        i = 2 * i + 1
+    return ranks
+
+
+class FrozenIndex:
+    """Immutable Eytzinger-layout index over a tree's keys.
+
+    `values` holds the stored keys in order, and `counts` holds how many
+    copies of each the tree had, so multiset trees freeze to their distinct
+    keys. The batch methods return positions into `values`.
+    """
+
+    def __init__(self, sort_keys, values, counts=None, key_func=None):
+        n = len(sort_keys)
+        self.key_func = key_func
+        self.values = list(values)
+        self.counts = counts
+        self.size = n if counts is None else sum(counts)
+        self.sorted_keys = _key_array(sort_keys)
+
+        ranks = _eytzinger_order(n)
+        self._ranks = np.asarray(ranks, dtype=np.int64)
+        layout = np.empty(n + 1, dtype=self.sorted_keys.dtype)
+        if n:
+            layout[1:] = self.sorted_keys[self._ranks[1:]]
+            # slot 0 is never compared; give it a valid value of the right type
+            layout[0] = layout[1]
+        self.layout = layout
+        self._sorted_list = list(sort_keys)
+        self._n = n
+
+    def __len__(self):
+        return self.size
+
+    def searchTree(self, key):
+        sk = key if self.key_func is None else self.key_func(key)
+        keys = self._sorted_list
+        i = bisect_left(keys, sk)
+        return i < self._n and keys[i] == sk
+
+    def ceiling(self, key):
+        """Smallest stored key whose sort key is >= key's, or None."""
+        sk = key if self.key_func is None else self.key_func(key)
+        rank = bisect_left(self._sorted_list, sk)
+        return self.values[rank] if rank < self._n else None
+
+    def floor(self, key):
+        """Largest stored key whose sort key is <= key's, or None."""
+        sk = key if self.key_func is None else self.key_func(key)
+        rank = bisect_right(self._sorted_list, sk) - 1
+        return self.values[rank] if rank >= 0 else None
+
+    def _slots(self, sort_keys, strict):
+        if self.layout.dtype == object:
+            q = np.fromiter(sort_keys, dtype=object, count=len(sort_keys))
+        else:
+            q = np.asarray(sort_keys)
+        a = self.layout
+        n = self._n
+        i = np.ones(q.shape, dtype=np.int64)
+        for _ in range(n.bit_length()):
+            active = i <= n
+            # finished queries read slot 0 and keep their index
+            probe = a[np.where(active, i, 0)]
+            step = (probe <= q) if strict else (probe < q)
+            i = np.where(active, 2 * i + step, i)
+        # undo the trailing right turns plus the last left turn
+        return i // (((~i) & (i + 1)) * 2), q
+
+    def _batch_keys(self, keys):
+        if self.key_func is None:
+            return keys
+        return [self.key_func(k) for k in keys]
+
+    def search_many(self, keys):
+        """Boolean array: is each of `keys` stored in the index?"""
+        slots, q = self._slots(self._batch_keys(keys), strict=False)
+        if not self._n:
+            return np.zeros(q.shape, dtype=bool)
+        return (slots != 0) & (self.layout[slots] == q)
+
+    def ceiling_many(self, keys):
+        """Position in `values` of each key's ceiling, -1 where there is none."""
+        slots, _ = self._slots(self._batch_keys(keys), strict=False)
+        ranks = self._ranks[slots]
+        return np.where(ranks < self._n, ranks, -1)
+
+    def floor_many(self, keys):
+        """Position in `values` of each key's floor, -1 where there is none."""
+        slots, _ = self._slots(self._batch_keys(keys), strict=True)
+        return self._ranks[slots] - 1
+
+
+def freeze(tree):
+    """Snapshot `tree` (RBtree, AVL or BST, pure or compiled) into a FrozenIndex."""
+    sort_keys = []
+    values = []
+    counts = []
+    stack = []
+    node = tree.root
+    while stack or node is not None:
+        while node is not None:
+            stack.append(node)
+            node = node.left
+        node = stack.pop()
+        if not node.count:
+            # tombstone left by lazy deletion
+            node = node.right
+            continue
+        sk = node.sort_key
+        value = node.value if hasattr(node, 'value') else node.key
+        if sort_keys and sort_keys[-1] == sk:
+            # equal keys in separate nodes (non-multiset trees allow duplicates)
+            counts[-1] += node.count
+        else:
+            sort_keys.append(sk)
+            values.append(value)
+            counts.append(node.count)
+        node = node.right
+    if all(c == 1 for c in counts):
+        counts = None
+    return FrozenIndex(sort_keys, values, counts, getattr(tree, 'key_func', None))
@@ -0,0 +1,191 @@
+"""Seeded differential fuzzer for RBtree, AVL and BST.
+
+Usage:
+    python3 fuzz_trees.py [--seeds 20] [--ops 50000] [--keys 2000] [--validate-every 1000]
+
+Each run replays a random insert / delete / search sequence against every
+structure and against a sorted Python list used as the oracle. Search answers
+are compared on every operation. Every `--validate-every` operations the tree
+is checked with `tree_invariants.validate` and its in-order contents are
+compared with the oracle.
+
+The report also tracks shape. For each structure it prints the worst height,
+the worst height / log2(n + 1) ratio, and the rotations per operation (where
+the structure counts them), so a change that keeps trees correct but makes
+them taller or churnier still shows up.
+"""
+import argparse
+import bisect
+import contextlib
+import io
+import math
+import random
+import time
+
+import avl
+from RBtree1 import RBtree
+from bst import BST
+from splay import SplayTree
+from treap import Treap
+from tree_invariants import validate
+
+
+class CountingRBtree(RBtree):
+    # RBtree that counts rotations for the shape report
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.rotations = 0
+
+    def rotateLeft(self, nodeToRotateOn):
+        self.rotations += 1
+        super().rotateLeft(nodeToRotateOn)
+
+    def rotateRight(self, nodeToRotateOn):
+        self.rotations += 1
+        super().rotateRight(nodeToRotateOn)
+
+
+class CountingAVL(avl.AVL):
+    # AVL rotations are module functions, so they are counted by wrapping
+    # them for the duration of each operation (see `counting_avl_rotations`)
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.rotations = 0
+
+
+class CountingBST(BST):
+    rotations = 0
+
+
+@contextlib.contextmanager
+def counting_avl_rotations(tree):
+    rotate_left, rotate_right = avl._rotate_left, avl._rotate_right
+
+    def counted_left(x):
+        tree.rotations += 1
+        return rotate_left(x)
+
+    def counted_right(y):
+        tree.rotations += 1
+        return rotate_right(y)
+
+    avl._rotate_left, avl._rotate_right = counted_left, counted_right
+    try:
+        yield
+    finally:
+        avl._rotate_left, avl._rotate_right = rotate_left, rotate_right
+
+
+def lazy(tree, threshold=0.25):
+    # tombstone deletes with compaction (see lazy_delete)
+    tree.enable_lazy_delete(threshold)
+    return tree
+
+
+STRUCTURES = [
+    ('RBtree', CountingRBtree),
+    ('AVL', CountingAVL),
+    ('BST', CountingBST),
+    ('RBtree-multiset', lambda: CountingRBtree(multiset=True)),
+    ('AVL-multiset', lambda: CountingAVL(multiset=True)),
+    ('BST-multiset', lambda: CountingBST(multiset=True)),
+    ('Splay', SplayTree),
+    ('Treap', lambda: Treap(seed=0)),
+    ('RBtree-lazy', lambda: lazy(CountingRBtree())),
+    ('AVL-lazy', lambda: lazy(CountingAVL())),
+    ('BST-multiset-lazy', lambda: lazy(CountingBST(multiset=True))),
+]
+
+
+def in_order(tree):
+    """Sort keys of `tree` in order, repeated by node count."""
+    out = []
+    stack = []
+    node = tree.root
+    while stack or node is not None:
+        while node is not None:
+            stack.append(node)
+            node = node.left
+        node = stack.pop()
+        out.extend([node.sort_key] * node.count)
+        node = node.right
+    return out
+
+
+def fuzz_one(name, ctor, seed, ops, key_space, validate_every):
+    """Run one seeded op sequence; return shape statistics or raise on divergence."""
+    rng = random.Random(seed)
+    tree = ctor()
+    oracle = []
+    max_height = 0
+    max_ratio = 0.0
+    quiet = io.StringIO()
+    avl_counter = counting_avl_rotations(tree) if isinstance(tree, avl.AVL) else contextlib.nullcontext()
+
+    with avl_counter, contextlib.redirect_stdout(quiet):
+        for step in range(1, ops + 1):
+            r = rng.random()
+            if r < 0.45:
+                v = rng.randrange(key_space)
+                tree.insertInTree(v)
+                bisect.insort(oracle, v)
+            elif r < 0.70 and oracle:
+                v = oracle[rng.randrange(len(oracle))]
+                tree.deleteFromTree(v)
+                del oracle[bisect.bisect_left(oracle, v)]
+            elif r < 0.75:
+                # missing (or possibly present) key: only delete it from the oracle if it was there
+                v = rng.randrange(key_space, 2 * key_space) if rng.random() < 0.5 else rng.randrange(key_space)
+                tree.deleteFromTree(v)
+                i = bisect.bisect_left(oracle, v)
+                if i < len(oracle) and oracle[i] == v:
+                    del oracle[i]
+            else:
+                v = rng.randrange(2 * key_space)
+                i = bisect.bisect_left(oracle, v)
+                expected = i < len(oracle) and oracle[i] == v
+                if tree.searchTree(v) != expected:
+                    raise AssertionError(f"{name} seed={seed} step={step}: searchTree({v}) != {expected}")
+
+            if step % validate_every == 0 or step == ops:
+                shape = validate(tree)
+                if in_order(tree) != oracle:
+                    raise AssertionError(f"{name} seed={seed} step={step}: contents differ from oracle")
+                height = shape['height']
+                max_height = max(max_height, height)
+                if shape['nodes']:
+                    max_ratio = max(max_ratio, height / math.log2(shape['nodes'] + 1))
+
+    return {'rotations': getattr(tree, 'rotations', None), 'max_height': max_height, 'max_ratio': max_ratio}
+
+
+def run_fuzz(seeds=20, ops=50000, key_space=2000, validate_every=1000, structures=STRUCTURES):
+    for name, ctor in structures:
+        t0 = time.perf_counter()
+        rotations = 0
+        max_height = 0
+        max_ratio = 0.0
+        for seed in range(seeds):
+            stats = fuzz_one(name, ctor, seed, ops, key_space, validate_every)
+            rotations = None if stats['rotations'] is None else rotations + stats['rotations']
+            max_height = max(max_height, stats['max_height'])
+            max_ratio = max(max_ratio, stats['max_ratio'])
+        total = seeds * ops
+        per_op = 'n/a' if rotations is None else f"{rotations / total:.3f}"
+        print(f"{name:18s} ok: {total} ops, max height {max_height}, "
+              f"max height/log2(n+1) {max_ratio:.2f}, rotations/op {per_op}, "
+              f"{time.perf_counter() - t0:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seeds', type=int, default=20)
+    parser.add_argument('--ops', type=int, default=50000, help='operations per seed')
+    parser.add_argument('--keys', type=int, default=2000, help='size of the key space')
+    parser.add_argument('--validate-every', type=int, default=1000)
+    args = parser.parse_args()
+    run_fuzz(args.seeds, args.ops, args.keys, args.validate_every)
+
+
+if __name__ == '__main__':
+    main()
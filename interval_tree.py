@@ -0,0 +1,245 @@
+"""Interval tree: an RBtree of (start, end) intervals augmented with subtree maxima.
+
+    tree = IntervalTree()
+    tree.load([(1, 5), (3, 9), (10, 12)])
+    tree.insertInTree((4, 4))
+    tree.overlap(5, 10)     # [(1, 5), (3, 9), (10, 12)]
+    tree.stab(4)            # [(1, 5), (3, 9), (4, 4)]
+
+Intervals are closed and ordered by (start, end). By default a stored value is
+a tuple whose first two items are its endpoints, so extra items can carry a
+payload (e.g. (start, end, event_id)). Pass `interval=` to pull the endpoints
+out of other objects. Searching and deleting match on the endpoints only.
+
+Every node also keeps `max_end`, the largest end point in its subtree. Insert
+raises it along the descent path, delete recomputes it along the spliced
+node's path, and `rotateLeft` / `rotateRight` recompute it for the two nodes
+they move, which covers every restructuring done by both fixup routines
+(recolouring does not affect it). An overlap query walks the tree in order
+and skips any subtree whose `max_end` is below the query start, stopping at
+the first interval that starts after the query end. It visits O(log n) nodes
+plus the subtrees that hold a result, which is O(log n + k) when the k
+results are close together in start order and O(k log n) at worst.
+"""
+import bloom_filter
+from RBtree1 import BLACK, RED, Node, RBtree
+from tree_rebuild import link_balanced
+
+
+class IntervalNode(Node):
+    # largest interval end in this node's subtree
+    __slots__ = ('max_end',)
+
+
+def _endpoints(value):
+    return (value[0], value[1])
+
+
+def _update(node):
+    """Recompute node.max_end from the node and its children."""
+    m = node.sort_key[1]
+    left, right = node.left, node.right
+    if left is not None and left.max_end > m:
+        m = left.max_end
+    if right is not None and right.max_end > m:
+        m = right.max_end
+    node.max_end = m
+
+
+class IntervalTree(RBtree):
+    """Red-black tree of intervals with overlap and stabbing queries (see module docstring)."""
+
+    def __init__(self, interval=None, multiset=False):
+        super().__init__(key=interval or _endpoints, multiset=multiset)
+
+    def _refresh(self, node):
+        # deletions can lower maxima anywhere above the change, so go all the way up
+        while node is not None:
+            _update(node)
+            node = node.parent
+
+    def rotateLeft(self, nodeToRotateOn):
+        super().rotateLeft(nodeToRotateOn)
+        _update(nodeToRotateOn)
+        _update(nodeToRotateOn.parent)
+
+    def rotateRight(self, nodeToRotateOn):
+        super().rotateRight(nodeToRotateOn)
+        _update(nodeToRotateOn)
+        _update(nodeToRotateOn.parent)
+
+    def insertInTree(self, value):
+        if self.multiset:
+            self.add(value)
+            return
+        self.mutations += 1
+        self._insert(value, 1)
+
+    def add(self, value, n=1):
+        """Multiset mode: add n copies of value."""
+        self._requireMultiset()
+        if n < 1:
+            raise ValueError(f"n must be at least 1, got {n}")
+        self.mutations += 1
+        self._insert(value, n)
+
+    def _insert(self, value, n):
+        k = self.key_func(value)
+        start, end = k
+        if end < start:
+            raise ValueError(f"interval {k!r} ends before it starts")
+        parent = None
+        node = self.root
+        multiset = self.multiset
+        # a left step costs one comparison, a right step 1 + multiset
+        lefts = rights = 0
+        while node is not None:
+            # the new interval ends up below every node on this path
+            if node.max_end < end:
+                node.max_end = end
+            nk = node.sort_key
+            if k < nk:
+                lefts += 1
+                parent, node = node, node.left
+            elif multiset and k == nk:
+                if self.profiler is not None:
+                    self.visits += lefts + rights + 1
+                    self.comparisons += lefts + 2 * rights + 2
+                node.count += n
+                self.size += n
+                self._addToTotals(node, n)
+                return
+            else:
+                rights += 1
+                parent, node = node, node.right
+        # plus the side check against the parent below
+        if self.profiler is not None:
+            self.visits += lefts + rights
+            self.comparisons += lefts + (1 + multiset) * rights + (parent is not None)
+
+        newNode = IntervalNode(value, RED)
+        newNode.sort_key = k
+        newNode.count = newNode.total = n
+        newNode.max_end = end
+        self.size += n
+        if parent is None:
+            newNode.red = BLACK
+            self.root = newNode
+            return
+        if k < parent.sort_key:
+            parent.left = newNode
+        else:
+            parent.right = newNode
+        newNode.parent = parent
+        self._addToTotals(parent, n)
+        if parent.red:
+            self.checkRotations(newNode)
+
+    def _removeNode(self, node):
+        # the node actually unlinked: node itself, or its in-order predecessor
+        # whose interval is copied into node
+        spliced = node
+        if node.left is not None and node.right is not None:
+            spliced = node.left
+            while spliced.right is not None:
+                spliced = spliced.right
+        parent = spliced.parent
+        super()._removeNode(node)
+        self._refresh(parent)
+
+    def checkRotationsForDeletion(self, x, parent=None):
+        # maxima above the removed node are stale until refreshed; fix them
+        # before the fixup rotates that path
+        self._refresh(x if x is not None else parent)
+        super().checkRotationsForDeletion(x, parent)
+
+    def load(self, values):
+        """Add many intervals at once, rebuilding the tree in O(n) after one sort.
+
+        Cheaper than inserting one at a time for large batches, and the
+        result is perfectly balanced. The loaded intervals bypass the
+        insert methods, so an attached Bloom filter is refilled afterwards,
+        and with lazy deletion on the rebuild drops every tombstone.
+        """
+        kf = self.key_func
+        entries = []
+        for v in values:
+            k = kf(v)
+            if k[1] < k[0]:
+                raise ValueError(f"interval {k!r} ends before it starts")
+            entries.append((k, v, 1))
+        if not entries:
+            return
+        entries.sort(key=lambda e: e[0])
+        old = []
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            if node.count:
+                old.append((node.sort_key, node.value, node.count))
+            node = node.right
+        if old:
+            # two sorted runs: the sort just merges them
+            entries = old + entries
+            entries.sort(key=lambda e: e[0])
+        if self.multiset:
+            merged = []
+            for k, v, c in entries:
+                if merged and merged[-1][0] == k:
+                    merged[-1][2] += c
+                else:
+                    merged.append([k, v, c])
+            entries = merged
+        self.mutations += 1
+        self.size = sum(e[2] for e in entries)
+        self.root = self._build(entries)
+        if self.lazy_delete is not None:
+            self.lazy_delete.tombstones = 0
+        if self.bloom_filter is not None:
+            bloom_filter.refill_bloom_filter(self)
+
+    @staticmethod
+    def _build(entries):
+        nodes = []
+        for k, v, c in entries:
+            node = IntervalNode(v, BLACK)
+            node.sort_key = k
+            node.count = node.total = c
+            # set so link_balanced sees the slot; it recomputes the maxima
+            node.max_end = k[1]
+            nodes.append(node)
+        return link_balanced(nodes)
+
+    def overlap(self, lo, hi):
+        """Stored values whose interval shares a point with [lo, hi], in (start, end) order."""
+        if hi < lo:
+            raise ValueError("overlap query needs lo <= hi")
+        out = []
+        stack = []
+        node = self.root
+        while True:
+            # subtrees whose intervals all end before lo cannot overlap
+            while node is not None and node.max_end >= lo:
+                stack.append(node)
+                node = node.left
+            if not stack:
+                return out
+            node = stack.pop()
+            start, end = node.sort_key
+            if start > hi:
+                # everything later in order starts even later
+                return out
+            if end >= lo:
+                if node.count == 1:
+                    out.append(node.value)
+                else:
+                    out.extend([node.value] * node.count)
+            node = node.right
+
+    def stab(self, point):
+        """Stored values whose interval contains point."""
+        return self.overlap(point, point)
@@ -0,0 +1,248 @@
+"""Lazy (tombstone) deletion for RBtree, AVL and BST.
+
+`enable_lazy_delete(tree, threshold=0.25)` (exposed as
+`tree.enable_lazy_delete()`) makes deletes mark the element's node as a
+tombstone instead of unlinking it. A tombstone is a node whose count is 0,
+so the delete is one O(log n) descent with no rotations, recolouring or
+height updates beyond taking its copies off the subtree totals of the
+nodes above it. Everything that sums or repeats counts (`rank`, `irange`,
+`InOrderTraversal`, `count`, `freeze`, IntervalTree queries) skips
+tombstones without changes. Search only answers True for a live node, and
+inserting a key that has a tombstone revives that node in place.
+
+Once tombstones exceed `threshold * (tombstones + tree.size)`, the tree is
+compacted: the live nodes are relinked into a perfectly balanced tree in
+O(n), with valid red-black colours, AVL heights, parent pointers and
+interval maxima. `tree.lazy_delete.compact()` does the same on demand, e.g.
+while the caller is idle after a delete burst. Pass `threshold=None` to
+compact only on demand.
+
+Like Bloom filters and path histograms, the mode works by shadowing the
+tree's search / insert / delete methods on the instance (see tree_modes).
+Compiled trees are not supported. `disable_lazy_delete` compacts the tree and restores the
+original methods.
+"""
+import tree_modes
+from tree_rebuild import link_balanced
+
+
+class LazyDelete:
+    """Tombstone bookkeeping for one tree (see module docstring)."""
+
+    def __init__(self, tree, threshold=0.25):
+        if threshold is not None and not 0 < threshold < 1:
+            raise ValueError("threshold must be between 0 and 1 (or None)")
+        self.tree = tree
+        self.threshold = threshold
+        self.tombstones = 0
+        self.compactions = 0
+
+    def _mark(self, node, path):
+        """Turn a live node into a tombstone; path lists its ancestors."""
+        tree = self.tree
+        removed = node.count
+        node.count = 0
+        node.total -= removed
+        _add_to_totals(path, -removed)
+        tree.size -= removed
+        tree.mutations += 1
+        self.tombstones += 1
+        threshold = self.threshold
+        if threshold is not None and self.tombstones > threshold * (self.tombstones + tree.size):
+            self.compact()
+
+    def compact(self):
+        """Drop every tombstone by relinking the live nodes into a balanced tree (O(n))."""
+        tree = self.tree
+        if not self.tombstones:
+            return
+        live = []
+        stack = []
+        node = tree.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            if node.count:
+                live.append(node)
+            node = node.right
+        tree.root = link_balanced(live)
+        tree.mutations += 1
+        self.tombstones = 0
+        self.compactions += 1
+
+    def stats(self):
+        return {
+            'tombstones': self.tombstones,
+            'threshold': self.threshold,
+            'compactions': self.compactions,
+        }
+
+
+def _find_equal(root, sk, live):
+    """A live (or, with live=False, a tombstoned) node with sort key sk, or None.
+
+    Every node with sort key sk lies below the first one a plain descent
+    meets, but they can sit on either side of it after rotations, so only
+    when that first node is in the wrong state are both subtrees searched.
+    """
+    node = root
+    while node is not None:
+        nk = node.sort_key
+        if sk < nk:
+            node = node.left
+        elif sk > nk:
+            node = node.right
+        elif (node.count > 0) == live:
+            return node
+        else:
+            return _find_with_path(node, sk, live)[0]
+    return None
+
+
+def _find_with_path(root, sk, live):
+    """Like _find_equal, but return (node, its ancestors from root down); node may be None.
+
+    Count changes have to reach the subtree totals of every ancestor, and
+    without parent pointers the descent is the only place to collect them.
+    """
+    path = []
+    node = root
+    while node is not None:
+        nk = node.sort_key
+        if sk < nk:
+            path.append(node)
+            node = node.left
+        elif sk > nk:
+            path.append(node)
+            node = node.right
+        elif (node.count > 0) == live:
+            return node, path
+        else:
+            break
+    if node is None:
+        return None, path
+    path.append(node)
+    # each entry is a subtree still to search and how much of path leads to it
+    stack = [(node.right, len(path)), (node.left, len(path))]
+    while stack:
+        node, depth = stack.pop()
+        del path[depth:]
+        while node is not None:
+            nk = node.sort_key
+            if sk < nk:
+                path.append(node)
+                node = node.left
+            elif sk > nk:
+                path.append(node)
+                node = node.right
+            else:
+                if (node.count > 0) == live:
+                    return node, path
+                path.append(node)
+                stack.append((node.right, len(path)))
+                node = node.left
+    return None, path
+
+
+def _add_to_totals(path, delta):
+    for node in path:
+        node.total += delta
+
+
+def enable_lazy_delete(tree, threshold=0.25):
+    """Switch `tree` to tombstone deletes and return its `LazyDelete` state."""
+    if getattr(tree, 'lazy_delete', None) is not None:
+        return tree.lazy_delete
+    tree_modes.check_can_enable(tree, 'lazy_delete')
+    state = LazyDelete(tree, threshold)
+    key_func = tree.key_func
+    names = tree_modes.shadowed_methods(tree)
+    value_attr = 'value' if names['search'] == 'searchTree' else 'key'
+
+    def search(value):
+        sk = value if key_func is None else key_func(value)
+        return _find_equal(tree.root, sk, True) is not None
+
+    def insert_with(method):
+        def insert(value):
+            if state.tombstones and not tree.multiset:
+                sk = value if key_func is None else key_func(value)
+                node, path = _find_with_path(tree.root, sk, False)
+                if node is not None:
+                    # revive the tombstone instead of adding a node
+                    setattr(node, value_attr, value)
+                    node.count = 1
+                    node.total += 1
+                    _add_to_totals(path, 1)
+                    tree.size += 1
+                    tree.mutations += 1
+                    state.tombstones -= 1
+                    return
+            # multiset trees route through add, which is wrapped below
+            return method(value)
+        return insert
+
+    def delete_with(method):
+        def delete(value):
+            sk = value if key_func is None else key_func(value)
+            node, path = _find_with_path(tree.root, sk, True)
+            if node is None:
+                if _find_equal(tree.root, sk, False) is None:
+                    # let the tree report a missing value its usual way
+                    method(value)
+                return
+            if node.count > 1:
+                node.count -= 1
+                node.total -= 1
+                _add_to_totals(path, -1)
+                tree.size -= 1
+                tree.mutations += 1
+                return
+            state._mark(node, path)
+        return delete
+
+    def add_with(method):
+        def add(value, n=1):
+            if n < 1:
+                raise ValueError(f"n must be at least 1, got {n}")
+            if state.tombstones:
+                sk = value if key_func is None else key_func(value)
+                # multiset trees hold one node per key, live or not
+                node = _find_equal(tree.root, sk, False)
+                if node is not None:
+                    setattr(node, value_attr, value)
+                    state.tombstones -= 1
+            return method(value, n)
+        return add
+
+    def discard_with(method):
+        def discard(value, n=1):
+            sk = value if key_func is None else key_func(value)
+            node, path = _find_with_path(tree.root, sk, True)
+            if node is None:
+                return 0
+            if node.count > n:
+                return method(value, n)
+            removed = node.count
+            state._mark(node, path)
+            return removed
+        return discard
+
+    wrappers = {'insert': insert_with, 'delete': delete_with, 'add': add_with, 'discard': discard_with}
+    for op, name in names.items():
+        setattr(tree, name, search if op == 'search' else wrappers[op](getattr(tree, name)))
+    tree.lazy_delete = state
+    return state
+
+
+def disable_lazy_delete(tree):
+    """Compact away every tombstone and restore the tree's own methods."""
+    state = getattr(tree, 'lazy_delete', None)
+    if state is None:
+        return
+    state.compact()
+    for name in tree_modes.shadowed_methods(tree).values():
+        delattr(tree, name)
+    tree.lazy_delete = None
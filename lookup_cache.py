@@ -0,0 +1,210 @@
+"""Bounded lookup cache in front of RBtree, AVL or BST.
+
+`CachedTree(tree, capacity=1024, policy='lru')` answers `searchTree` from a
+size-bounded cache of recent results (hits and misses alike), keyed by sort
+key, and falls through to the tree on a cache miss. Two eviction policies are
+available:
+
+- 'lru': evict the least recently used key (an OrderedDict)
+- 'lfu': evict the least frequently used key, oldest first among ties
+  (frequency buckets, O(1) per operation)
+
+Mutations through the wrapper (`insertInTree`, `deleteFromTree`, and `add` /
+`discard` on multiset trees) drop the cached answer for that key. If the tree
+is mutated behind the wrapper's back, `tree.mutations` no longer matches what
+the wrapper last saw and the whole cache is cleared on the next lookup, so a
+stale answer is never returned.
+
+Everything else (`stats`, `rank`, `root`, ...) is forwarded to the tree.
+"""
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LRUCache:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._data = OrderedDict()
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        data = self._data
+        value = data.get(key, _MISSING)
+        if value is not _MISSING:
+            data.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        data = self._data
+        data[key] = value
+        data.move_to_end(key)
+        if len(data) > self.capacity:
+            data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key):
+        return self._data.pop(key, _MISSING) is not _MISSING
+
+    def clear(self):
+        self._data.clear()
+
+
+class LFUCache:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        # key -> [value, frequency]
+        self._data = {}
+        # frequency -> keys with that frequency, least recently used first
+        self._buckets = {}
+        self._min_freq = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def _touch(self, key, entry):
+        freq = entry[1]
+        bucket = self._buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[freq]
+            if self._min_freq == freq:
+                self._min_freq = freq + 1
+        entry[1] = freq + 1
+        self._buckets.setdefault(freq + 1, OrderedDict())[key] = None
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        self._touch(key, entry)
+        return entry[0]
+
+    def put(self, key, value):
+        entry = self._data.get(key)
+        if entry is not None:
+            entry[0] = value
+            self._touch(key, entry)
+            return
+        if len(self._data) >= self.capacity:
+            bucket = self._buckets[self._min_freq]
+            victim, _ = bucket.popitem(last=False)
+            if not bucket:
+                del self._buckets[self._min_freq]
+            del self._data[victim]
+            self.evictions += 1
+        self._data[key] = [value, 1]
+        self._buckets.setdefault(1, OrderedDict())[key] = None
+        self._min_freq = 1
+
+    def pop(self, key):
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return False
+        freq = entry[1]
+        bucket = self._buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[freq]
+            # _min_freq may now point at an empty bucket; put() resets it and
+            # eviction only happens once the cache is full again
+            if self._min_freq == freq and self._buckets:
+                self._min_freq = min(self._buckets)
+        return True
+
+    def clear(self):
+        self._data.clear()
+        self._buckets.clear()
+        self._min_freq = 0
+
+
+POLICIES = {'lru': LRUCache, 'lfu': LFUCache}
+
+
+class CachedTree:
+    """Search-result cache wrapped around a tree (see module docstring)."""
+
+    def __init__(self, tree, capacity=1024, policy='lru'):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown cache policy {policy!r} (expected one of {sorted(POLICIES)})")
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.tree = tree
+        self.policy = policy
+        self.cache = POLICIES[policy](capacity)
+        # bound once: searchTree is the hot path
+        self._get = self.cache.get
+        self._put = self.cache.put
+        self._key_func = getattr(tree, 'key_func', None)
+        self._seen_mutations = tree.mutations
+        # hit-rate counters
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __getattr__(self, name):
+        # only called for attributes the wrapper does not define itself
+        return getattr(self.tree, name)
+
+    def _sort_key(self, key):
+        return key if self._key_func is None else self._key_func(key)
+
+    def searchTree(self, key):
+        tree = self.tree
+        if tree.mutations != self._seen_mutations:
+            # the tree was changed without going through the wrapper
+            self.cache.clear()
+            self.invalidations += 1
+            self._seen_mutations = tree.mutations
+        sk = key if self._key_func is None else self._key_func(key)
+        found = self._get(sk)
+        if found is _MISSING:
+            self.misses += 1
+            found = tree.searchTree(key)
+            self._put(sk, found)
+        else:
+            self.hits += 1
+        return found
+
+    def _mutate(self, method, key, *args):
+        clean = self.tree.mutations == self._seen_mutations
+        result = method(key, *args)
+        if self.cache.pop(self._sort_key(key)):
+            self.invalidations += 1
+        if clean:
+            # only this call changed the tree, and its key is handled above
+            self._seen_mutations = self.tree.mutations
+        return result
+
+    def insertInTree(self, key):
+        return self._mutate(self.tree.insertInTree, key)
+
+    def deleteFromTree(self, key):
+        return self._mutate(self.tree.deleteFromTree, key)
+
+    def add(self, key, n=1):
+        return self._mutate(self.tree.add, key, n)
+
+    def discard(self, key, n=1):
+        return self._mutate(self.tree.discard, key, n)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def cache_stats(self):
+        return {
+            'policy': self.policy,
+            'capacity': self.cache.capacity,
+            'entries': len(self.cache),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'evictions': self.cache.evictions,
+            'invalidations': self.invalidations,
+        }
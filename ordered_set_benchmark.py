@@ -0,0 +1,86 @@
+"""Head-to-head benchmark of the ordered-set engines.
+
+Usage:
+    python3 ordered_set_benchmark.py [--sizes 10000 100000] [--trials 3] [--width 100]
+
+Runs RBtree, AVL and BST against the chunked sorted list (`SortedChunkList`)
+and the skip list (`SkipList`) on the same random keys and prints per-op
+times for insert, search (hits) and delete (half of the keys), plus
+range-scan throughput: n / 10 scans of `width` consecutive keys, reported as
+keys yielded per second, using each structure's `irange`. The best of
+`trials` runs is kept.
+"""
+import argparse
+import random
+import time
+
+from RBtree1 import RBtree
+from avl import AVL
+from bst import BST
+from skiplist import SkipList
+from sorted_chunks import SortedChunkList
+
+STRUCTURES = [
+    ('RBtree', RBtree),
+    ('AVL', AVL),
+    ('BST', BST),
+    ('SortedChunks', SortedChunkList),
+    ('SkipList', SkipList),
+]
+
+
+def bench_one(ctor, values, width, trials=3):
+    """Best-of-trials seconds for each phase, and keys returned by the scans."""
+    n = len(values)
+    lookups = random.sample(values, min(n, 10000))
+    starts = [random.randrange(n) for _ in range(max(1, n // 10))]
+    to_delete = random.sample(values, n // 2)
+
+    best = {'insert': float('inf'), 'search': float('inf'),
+            'range': float('inf'), 'delete': float('inf')}
+    scanned = 0
+    for _ in range(trials):
+        ds = ctor()
+        t0 = time.perf_counter()
+        for v in values:
+            ds.insertInTree(v)
+        t1 = time.perf_counter()
+        for v in lookups:
+            ds.searchTree(v)
+        t2 = time.perf_counter()
+        scanned = 0
+        for lo in starts:
+            for _ in ds.irange(lo, lo + width - 1):
+                scanned += 1
+        t3 = time.perf_counter()
+        for v in to_delete:
+            ds.deleteFromTree(v)
+        t4 = time.perf_counter()
+        for phase, dt in (('insert', t1 - t0), ('search', t2 - t1),
+                          ('range', t3 - t2), ('delete', t4 - t3)):
+            best[phase] = min(best[phase], dt)
+    return best, len(lookups), scanned
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--trials', type=int, default=3)
+    parser.add_argument('--width', type=int, default=100, help='keys per range scan')
+    args = parser.parse_args()
+
+    random.seed(0)
+    for n in args.sizes:
+        values = list(range(n))
+        random.shuffle(values)
+        print(f"n={n}")
+        for name, ctor in STRUCTURES:
+            best, lookups, scanned = bench_one(ctor, values, args.width, args.trials)
+            print(f"  {name:12s} insert {best['insert'] / n * 1e6:7.3f}us/op  "
+                  f"search {best['search'] / lookups * 1e6:7.3f}us/op  "
+                  f"delete {best['delete'] / (n // 2) * 1e6:7.3f}us/op  "
+                  f"range scan {scanned / best['range'] / 1e6:6.2f}M keys/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,15 @@
-"""Benchmark runner comparing RBtree, BST, and AVL for insert/search/delete.
+"""Benchmark runner comparing RBtree, BST, AVL, splay tree, treap, chunked sorted list
+and skip list for insert/search/delete.
 
 Usage:
     python3 performance_analysis.py
 
 The script runs moderate-sized benchmarks, saves CSV summaries, and creates comparison plots.
+
+Distributions 'random', 'sorted' and 'reversed' set the insertion order and
+time 100 uniform lookups. 'zipf' and 'working_set' insert in random order and
+time n skewed lookups (see workloads.py), which is where the self-adjusting
+splay tree can beat RBtree/AVL.
 """
 import time
 import random
@@ -16,6 +22,11 @@ import sys
 from RBtree1 import RBtree
 from bst import BST
 from avl import AVL
+from splay import SplayTree
+from treap import Treap
+from sorted_chunks import SortedChunkList
+from skiplist import SkipList
+from workloads import zipf_lookups, working_set_lookups
 
 # increase recursion limit so recursive deletes on degenerate BSTs don't crash the run
 sys.setrecursionlimit(1000000)
@@ -38,7 +49,7 @@ def benchmark_one_structure(name, ctor, sizes, distributions, trials=3, out_dir=
             for n in sizes:
                 for trial in range(1, trials + 1):
                     # prepare values according to distribution
-                    if dist == 'random':
+                    if dist in ('random', 'zipf', 'working_set'):
                         values = list(range(n))
                         random.shuffle(values)
                     elif dist == 'sorted':
@@ -53,8 +64,13 @@ def benchmark_one_structure(name, ctor, sizes, distributions, trials=3, out_dir=
                     # measure insertion of all values
                     insert_time = timed(lambda: [ds.insertInTree(v) for v in values])
 
-                    # measure search: sample 100 targets (existing)
-                    sample_search = random.choices(values, k=min(100, max(1, n)))
+                    # measure search: sample 100 targets (existing), or n skewed lookups
+                    if dist == 'zipf':
+                        sample_search = zipf_lookups(values, n, rng=random)
+                    elif dist == 'working_set':
+                        sample_search = working_set_lookups(values, n, rng=random)
+                    else:
+                        sample_search = random.choices(values, k=min(100, max(1, n)))
                     search_time = timed(lambda: [ds.searchTree(v) for v in sample_search])
 
                     # measure deletion: delete half of the elements chosen at random
@@ -73,12 +89,12 @@ def benchmark_one_structure(name, ctor, sizes, distributions, trials=3, out_dir=
     return summary_path
 
 
-def aggregate_and_plot(output_dir='perf_outputs'):
+def aggregate_and_plot(output_dir='perf_outputs', structures=None, distributions=None):
     # read CSVs for each structure and plot insert/search/delete vs n for each distribution
-    structures = ['RBtree', 'BST', 'AVL']
+    structures = structures or ['RBtree', 'BST', 'AVL', 'Splay', 'Treap', 'SortedChunks', 'SkipList']
     files = {s: os.path.join(output_dir, f'summary_{s}.csv') for s in structures}
 
-    distributions = ['random', 'sorted', 'reversed']
+    distributions = distributions or ['random', 'sorted', 'reversed', 'zipf', 'working_set']
     metrics = ['insert_time', 'search_time', 'delete_time']
 
     for dist in distributions:
@@ -129,7 +145,7 @@ def aggregate_and_plot(output_dir='perf_outputs'):
 def main():
     random.seed(0)
     sizes = [100, 1000, 5000, 10000]
-    distributions = ['random', 'sorted', 'reversed']
+    distributions = ['random', 'sorted', 'reversed', 'zipf', 'working_set']
     trials = 3
     out_dir = 'perf_outputs'
 
@@ -138,12 +154,16 @@ def main():
         ('RBtree', RBtree),
         ('BST', BST),
         ('AVL', AVL),
+        ('Splay', SplayTree),
+        ('Treap', Treap),
+        ('SortedChunks', SortedChunkList),
+        ('SkipList', SkipList),
     ]
 
     for name, ctor in structures:
         benchmark_one_structure(name, ctor, sizes, distributions, trials=trials, out_dir=out_dir)
 
-    aggregate_and_plot(out_dir)
+    aggregate_and_plot(out_dir, [name for name, _ in structures], distributions)
 
 
 if __name__ == '__main__':
@@ -6,14 +6,24 @@ art. It does not modify tree data structures or implement RB-tree logic.
 API:
 - `PrettyPrinter.pretty_print(obj, use_color=False)`: print to stdout.
 - `PrettyPrinter.format_lines(obj, use_color=False)`: return list[str].
-
-This module expects tree/node objects that expose `value`, `color`, `left`,
-and `right` attributes. It will also accept an `RBtree` instance that exposes
-the `root` attribute.
+- `PrettyPrinter.iter_lines(obj, ...)`: generator yielding one line at a time.
+- `PrettyPrinter.write(obj, file, ...)`: stream the lines to a file-like object.
+
+All of them accept `max_depth` (subtrees below that depth are collapsed into a
+single elision line) and `max_nodes` (stop after that many nodes). Rendering
+is iterative: it keeps only the current root-to-node path in memory and does
+work proportional to the text it emits, so dumping a 100k-node tree neither
+recurses nor builds the whole picture first.
+
+This module expects tree/node objects that expose `left` and `right` and
+either `value` and `color` (RBtree nodes) or `key` (AVL / BST nodes, shown
+with their height when they have one). It will also accept a tree instance
+that exposes the `root` attribute.
 """
 
 from __future__ import annotations
-from typing import Optional, Any, List
+import sys
+from typing import Optional, Any, List, Iterator, TextIO
 
 from RBtree1 import RBtree, Node
 
@@ -32,74 +42,120 @@ class PrettyPrinter:
 
     @staticmethod
     def _node_label(node: Any, use_color: bool) -> str:
+        count = getattr(node, "count", 1)
+        suffix = f" x{count}" if count > 1 else ""
+        if not hasattr(node, "value") and hasattr(node, "key"):
+            # AVL / BST node
+            height = getattr(node, "height", None)
+            return f"{node.key}{suffix}" + (f" (h={height})" if height is not None else "")
+
         value = getattr(node, "value", None)
         color = getattr(node, "color", "black")
-        label = f"{value} ({'R' if color == 'red' else 'B'})"
+        label = f"{value}{suffix} ({'R' if color == 'red' else 'B'})"
         if use_color and color == "red":
             label = PrettyPrinter._color_text(label, "red", use_color)
         return label
 
     @staticmethod
-    def _format_lines(node_or_tree: Any, use_color: bool = False) -> List[str]:
-        """Return list of lines representing the tree/node.
-
-        This function is pure rendering: it does not change the tree.
-        It accepts either a node-like object or an `RBtree` instance.
+    def iter_lines(node_or_tree: Any, use_color: bool = False,
+                   max_depth: Optional[int] = None,
+                   max_nodes: Optional[int] = None) -> Iterator[str]:
+        """Yield the ASCII lines for the given tree/node one at a time.
+
+        Subtrees right (top) before left (bottom). A missing sibling is shown
+        as "(none)". Nodes deeper than `max_depth` (root = depth 0) are
+        replaced by one "..." line per collapsed subtree. Output stops with a
+        marker line once `max_nodes` nodes have been printed.
         """
-        # Accept RBtree instances by extracting root, but do not modify them
+        # Accept tree instances by extracting root, but do not modify them
         node = getattr(node_or_tree, "root", node_or_tree)
+        if node is None:
+            yield "(empty)"
+            return
+
+        # pieces[i] is the continuation prefix contributed at depth i; a node
+        # at depth d is printed under ''.join(pieces[:d - 1]) + its connector
+        pieces: List[str] = []
+        # entries: (node, depth, connector, continuation) or (None, depth, text, None)
+        stack: List[tuple] = [(node, 0, "", "")]
+        printed = 0
+        while stack:
+            n, depth, text, cont = stack.pop()
 
-        def rec(n: Optional[Any]) -> List[str]:
             if n is None:
-                return ["(empty)"]
-
-            # label for current node
-            label = PrettyPrinter._node_label(n, use_color)
+                # "(none)" placeholder or elision marker belonging to the node at `depth`
+                del pieces[depth:]
+                yield "".join(pieces) + text
+                continue
+
+            if max_nodes is not None and printed >= max_nodes:
+                yield f"... (output truncated after {printed} nodes)"
+                return
+            printed += 1
+
+            if depth:
+                del pieces[depth - 1:]
+                yield "".join(pieces) + text + PrettyPrinter._node_label(n, use_color)
+                pieces.append(cont)
+            else:
+                yield PrettyPrinter._node_label(n, use_color)
 
             left = getattr(n, "left", None)
             right = getattr(n, "right", None)
+            if left is None and right is None:
+                continue
+            if max_depth is not None and depth >= max_depth:
+                stack.append((None, depth, "└─ ...", None))
+                continue
+
+            # pushed in reverse: right subtree (top sibling) pops first, then left
+            for child, is_last in ((left, True), (right, left is None)):
+                if child is None:
+                    stack.append((None, depth, "(none)", None))
+                    continue
+                is_leaf = getattr(child, "left", None) is None and getattr(child, "right", None) is None
+                stack.append((child, depth + 1,
+                               "└─ " if is_leaf else "├─ ",
+                               "   " if is_last else "│  "))
 
-            # leaf
-            if (left is None) and (right is None):
-                return [label]
-
-            left_lines = rec(left) if left is not None else []
-            right_lines = rec(right) if right is not None else []
-
-            # Print right subtree first so the right sibling appears above the left
-            lines: List[str] = [label]
-
-            def add_side(prefix: str, lines_list: List[str], is_last_side: bool = False) -> None:
-                if not lines_list:
-                    lines.append(prefix + "(none)")
-                    return
-                for i, l in enumerate(lines_list):
-                    connector = "└─ " if i == len(lines_list) - 1 else "├─ "
-                    if i == 0:
-                        lines.append(prefix + connector + l)
-                    else:
-                        lines.append(prefix + ("   " if is_last_side else "│  ") + l)
-
-            # Right first (top sibling), then left (bottom sibling)
-            add_side("", right_lines, is_last_side=(len(left_lines) == 0))
-            add_side("", left_lines, is_last_side=True)
-
-            return lines
+    @staticmethod
+    def _format_lines(node_or_tree: Any, use_color: bool = False) -> List[str]:
+        """Return list of lines representing the tree/node.
 
-        return rec(node)
+        This function is pure rendering: it does not change the tree.
+        It accepts either a node-like object or a tree instance.
+        """
+        return list(PrettyPrinter.iter_lines(node_or_tree, use_color=use_color))
 
     @staticmethod
-    def format_lines(node_or_tree: Any, use_color: bool = False) -> List[str]:
+    def format_lines(node_or_tree: Any, use_color: bool = False,
+                     max_depth: Optional[int] = None,
+                     max_nodes: Optional[int] = None) -> List[str]:
         """Public: return ASCII lines for the given tree/node."""
-        return PrettyPrinter._format_lines(node_or_tree, use_color=use_color)
+        return list(PrettyPrinter.iter_lines(node_or_tree, use_color=use_color,
+                                             max_depth=max_depth, max_nodes=max_nodes))
+
+    @staticmethod
+    def write(node_or_tree: Any, file: Optional[TextIO] = None, use_color: bool = False,
+              max_depth: Optional[int] = None, max_nodes: Optional[int] = None) -> None:
+        """Stream the ASCII representation to `file` (stdout by default), line by line."""
+        out = sys.stdout if file is None else file
+        for line in PrettyPrinter.iter_lines(node_or_tree, use_color=use_color,
+                                             max_depth=max_depth, max_nodes=max_nodes):
+            out.write(line)
+            out.write("\n")
 
     @staticmethod
-    def pretty_print(node_or_tree: Any, use_color: bool = False) -> None:
+    def pretty_print(node_or_tree: Any, use_color: bool = False,
+                     max_depth: Optional[int] = None,
+                     max_nodes: Optional[int] = None) -> None:
         """Print the ASCII representation to stdout."""
-        for line in PrettyPrinter.format_lines(node_or_tree, use_color=use_color):
-            print(line)
+        PrettyPrinter.write(node_or_tree, use_color=use_color,
+                            max_depth=max_depth, max_nodes=max_nodes)
 
 
-def pretty_print(node_or_tree: Any, use_color: bool = False) -> None:
+def pretty_print(node_or_tree: Any, use_color: bool = False,
+                 max_depth: Optional[int] = None, max_nodes: Optional[int] = None) -> None:
     """Convenience wrapper: print the tree/node."""
-    PrettyPrinter.pretty_print(node_or_tree, use_color=use_color)
+    PrettyPrinter.pretty_print(node_or_tree, use_color=use_color,
+                               max_depth=max_depth, max_nodes=max_nodes)
@@ -0,0 +1,69 @@
+"""Micro-benchmark for the RBtree node layout.
+
+Usage:
+    python3 rbtree_node_benchmark.py
+
+Times bulk insert / delete-half on `RBtree` and on `legacy_rbtree.RBtree`, a
+frozen copy of the tree before the slotted-node rewrite, and compares the
+per-node memory of the two node layouts (slotted, bool colour vs dict-backed,
+string colour plus `is_right_child` / `isRoot` flags). The legacy insert path
+prints debug lines; they go to a buffer so only the tree work is timed.
+"""
+import contextlib
+import io
+import random
+import sys
+import time
+import tracemalloc
+
+import legacy_rbtree
+from RBtree1 import Node, RBtree
+
+
+def bytes_per_node(ctor, count=100000):
+    values = list(range(count))
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = [ctor(v, 'red') for v in values]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # do not count the list holding the nodes
+    return (after - before - sys.getsizeof(nodes)) / count
+
+
+def time_insert_delete(ctor, values, to_delete, trials=3):
+    best_insert = best_delete = float('inf')
+    for _ in range(trials):
+        tree = ctor()
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            for v in values:
+                tree.insertInTree(v)
+            t1 = time.perf_counter()
+            for v in to_delete:
+                tree.deleteFromTree(v)
+            t2 = time.perf_counter()
+        best_insert = min(best_insert, t1 - t0)
+        best_delete = min(best_delete, t2 - t1)
+    return best_insert, best_delete
+
+
+def main():
+    random.seed(0)
+    for n in [1000, 10000, 50000]:
+        values = list(range(n))
+        random.shuffle(values)
+        to_delete = random.sample(values, n // 2)
+        for label, ctor in (('legacy', legacy_rbtree.RBtree), ('slotted', RBtree)):
+            ins, dele = time_insert_delete(ctor, values, to_delete)
+            print(f"n={n} {label:7s}: insert {ins:.6f}s ({ins / n * 1e6:.3f}us/op), "
+                  f"delete half {dele:.6f}s ({dele / (n // 2) * 1e6:.3f}us/op)")
+
+    slotted = bytes_per_node(Node)
+    legacy = bytes_per_node(legacy_rbtree.Node)
+    print(f"memory per node: slotted {slotted:.1f} B, dict-based {legacy:.1f} B "
+          f"({(1 - slotted / legacy) * 100:.1f}% smaller)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,25 @@
+"""Search latency suites.
+
+Usage:
+    python3 search_time_suite.py          # per-search RBtree timings
+    python3 search_time_suite.py frozen   # live trees vs their freeze() snapshots
+    python3 search_time_suite.py bloom    # hit / miss latency with and without a Bloom filter
+    python3 search_time_suite.py cache    # Zipfian lookups through LRU / LFU caches
+"""
 import time
 import random
 import os
 import csv
+import gc
 import math
+import sys
 import matplotlib.pyplot as plt
 import numpy as np
 from RBtree1 import RBtree
+from avl import AVL
+from bst import BST
+from lookup_cache import CachedTree
+from workloads import zipf_lookups
 
 
 def run_search_suite():
@@ -69,6 +83,209 @@ def run_search_suite():
     plt.show()
 
 
+def run_frozen_suite():
+    """Average lookup latency: live tree vs frozen index (scalar and batch)."""
+    sizes = [1000, 10000, 100000, 1000000]
+    structures = [('RBtree', RBtree), ('AVL', AVL), ('BST', BST)]
+    out_dir = 'search_outputs'
+    os.makedirs(out_dir, exist_ok=True)
+    sample_size = 100000
+
+    rows = []
+    for n in sizes:
+        values = list(range(0, 2 * n, 2))
+        random.shuffle(values)
+        # half hits (even), half misses (odd)
+        samples = [random.randrange(2 * n) for _ in range(sample_size)]
+        batch = np.asarray(samples)
+        for name, ctor in structures:
+            tree = ctor()
+            for v in values:
+                tree.insertInTree(v)
+            frozen = tree.freeze()
+
+            t0 = time.perf_counter()
+            for v in samples:
+                tree.searchTree(v)
+            t1 = time.perf_counter()
+            for v in samples:
+                frozen.searchTree(v)
+            t2 = time.perf_counter()
+            frozen.search_many(batch)
+            t3 = time.perf_counter()
+
+            live, scalar, vector = [(b - a) / sample_size for a, b in ((t0, t1), (t1, t2), (t2, t3))]
+            rows.append((name, n, live, scalar, vector))
+            print(f"{name} n={n}: live {live * 1e9:.0f}ns, frozen {scalar * 1e9:.0f}ns, "
+                  f"frozen batch {vector * 1e9:.0f}ns per lookup")
+
+    csv_path = os.path.join(out_dir, 'frozen_vs_live.csv')
+    with open(csv_path, 'w', newline='') as csvf:
+        writer = csv.writer(csvf)
+        writer.writerow(['structure', 'n', 'live_seconds', 'frozen_seconds', 'frozen_batch_seconds'])
+        for name, n, live, scalar, vector in rows:
+            writer.writerow([name, n, f"{live:.6e}", f"{scalar:.6e}", f"{vector:.6e}"])
+
+    fig, ax = plt.subplots(1, 1, figsize=(8, 5))
+    for name, _ in structures:
+        mine = [r for r in rows if r[0] == name]
+        ax.plot(sizes, [r[2] for r in mine], 'o-', label=f'{name} live')
+    # the frozen index is the same for every tree, so plot it once
+    first = [r for r in rows if r[0] == structures[0][0]]
+    ax.plot(sizes, [r[3] for r in first], 's--', label='frozen')
+    ax.plot(sizes, [r[4] for r in first], '^--', label='frozen batch')
+    ax.set_xscale('log')
+    ax.set_yscale('log')
+    ax.set_xlabel('Number of elements (n)')
+    ax.set_ylabel('Time per lookup (seconds)')
+    ax.set_title('Live vs frozen search latency')
+    ax.legend()
+    ax.grid(True)
+    out_png = os.path.join(out_dir, 'frozen_vs_live.png')
+    plt.tight_layout()
+    plt.savefig(out_png)
+    print(f"Saved frozen comparison to: {out_png} (data: {csv_path})")
+    plt.show()
+
+
+def run_bloom_suite(fp_rate=0.01):
+    """Average hit and miss latency with and without a counting Bloom filter."""
+    sizes = [1000, 10000, 100000, 1000000]
+    structures = [('RBtree', RBtree), ('AVL', AVL), ('BST', BST)]
+    out_dir = 'search_outputs'
+    os.makedirs(out_dir, exist_ok=True)
+    sample_size = 50000
+
+    def per_lookup(tree, samples):
+        t0 = time.perf_counter()
+        for v in samples:
+            tree.searchTree(v)
+        return (time.perf_counter() - t0) / len(samples)
+
+    rows = []
+    for n in sizes:
+        values = list(range(0, 2 * n, 2))
+        random.shuffle(values)
+        hits = random.choices(values, k=sample_size)
+        misses = [2 * random.randrange(n) + 1 for _ in range(sample_size)]
+        for name, ctor in structures:
+            tree = ctor()
+            for v in values:
+                tree.insertInTree(v)
+            plain_hit, plain_miss = per_lookup(tree, hits), per_lookup(tree, misses)
+            bloom = tree.enable_bloom_filter(fp_rate)
+            bloom_hit = per_lookup(tree, hits)
+            rejected = bloom.rejected
+            bloom_miss = per_lookup(tree, misses)
+            false_positives = 1 - (bloom.rejected - rejected) / sample_size
+            rows.append((name, n, plain_hit, plain_miss, bloom_hit, bloom_miss))
+            print(f"{name} n={n}: hit {plain_hit * 1e9:.0f}ns -> {bloom_hit * 1e9:.0f}ns, "
+                  f"miss {plain_miss * 1e9:.0f}ns -> {bloom_miss * 1e9:.0f}ns with filter "
+                  f"({bloom.num_counters} counters, {false_positives:.2%} false positives)")
+
+    csv_path = os.path.join(out_dir, 'bloom_filter.csv')
+    with open(csv_path, 'w', newline='') as csvf:
+        writer = csv.writer(csvf)
+        writer.writerow(['structure', 'n', 'hit_seconds', 'miss_seconds',
+                         'bloom_hit_seconds', 'bloom_miss_seconds'])
+        for row in rows:
+            writer.writerow(list(row[:2]) + [f"{t:.6e}" for t in row[2:]])
+
+    fig, axes = plt.subplots(1, 2, figsize=(12, 5), sharey=True)
+    for ax, (title, plain, filtered) in zip(axes, (('Hits', 2, 4), ('Misses', 3, 5))):
+        for name, _ in structures:
+            mine = [r for r in rows if r[0] == name]
+            line, = ax.plot(sizes, [r[plain] for r in mine], 'o-', label=f'{name}')
+            ax.plot(sizes, [r[filtered] for r in mine], 's--', color=line.get_color(),
+                    label=f'{name} + Bloom')
+        ax.set_xscale('log')
+        ax.set_xlabel('Number of elements (n)')
+        ax.set_title(f'{title} (fp_rate={fp_rate})')
+        ax.grid(True)
+    axes[0].set_ylabel('Time per lookup (seconds)')
+    axes[0].legend()
+    out_png = os.path.join(out_dir, 'bloom_filter.png')
+    plt.tight_layout()
+    plt.savefig(out_png)
+    print(f"Saved Bloom filter comparison to: {out_png} (data: {csv_path})")
+    plt.show()
+
+
+def run_cache_suite(n=1000000, lookups=200000):
+    """Zipfian lookup latency and hit rate: plain tree vs LRU / LFU caches of several sizes."""
+    capacities = [64, 256, 1024, 4096, 16384]
+    structures = [('RBtree', RBtree), ('AVL', AVL), ('BST', BST)]
+    skews = [0.8, 1.1]
+    out_dir = 'search_outputs'
+    os.makedirs(out_dir, exist_ok=True)
+
+    def per_lookup(ds, samples):
+        # like timeit: cache bookkeeping allocates, and a collection would
+        # otherwise stop to scan every node of the million-node tree
+        gc.disable()
+        try:
+            t0 = time.perf_counter()
+            for v in samples:
+                ds.searchTree(v)
+            return (time.perf_counter() - t0) / len(samples)
+        finally:
+            gc.enable()
+
+    values = list(range(n))
+    random.shuffle(values)
+    rows = []
+    for s in skews:
+        samples = zipf_lookups(values, lookups, s=s, rng=random)
+        for name, ctor in structures:
+            tree = ctor()
+            for v in values:
+                tree.insertInTree(v)
+            plain = per_lookup(tree, samples)
+            print(f"{name} zipf s={s}: uncached {plain * 1e9:.0f}ns per lookup")
+            for policy in ('lru', 'lfu'):
+                for capacity in capacities:
+                    cached = CachedTree(tree, capacity, policy)
+                    dt = per_lookup(cached, samples)
+                    rows.append((name, s, policy, capacity, plain, dt, cached.hit_rate))
+                    print(f"  {policy} capacity={capacity}: {dt * 1e9:.0f}ns per lookup, "
+                          f"hit rate {cached.hit_rate:.1%}")
+
+    csv_path = os.path.join(out_dir, 'lookup_cache.csv')
+    with open(csv_path, 'w', newline='') as csvf:
+        writer = csv.writer(csvf)
+        writer.writerow(['structure', 'zipf_s', 'policy', 'capacity', 'uncached_seconds',
+                         'cached_seconds', 'hit_rate'])
+        for name, s, policy, capacity, plain, dt, rate in rows:
+            writer.writerow([name, s, policy, capacity, f"{plain:.6e}", f"{dt:.6e}", f"{rate:.4f}"])
+
+    fig, axes = plt.subplots(1, len(skews), figsize=(12, 5), sharey=True)
+    for ax, s in zip(axes, skews):
+        for name, _ in structures:
+            mine = [r for r in rows if r[0] == name and r[1] == s]
+            line, = ax.plot(capacities, [mine[0][4]] * len(capacities), ':', label=f'{name} uncached')
+            for policy, style in (('lru', 'o-'), ('lfu', 's--')):
+                ax.plot(capacities, [r[5] for r in mine if r[2] == policy], style,
+                        color=line.get_color(), label=f'{name} {policy}')
+        ax.set_xscale('log')
+        ax.set_xlabel('Cache capacity (entries)')
+        ax.set_title(f'Zipf s={s}, n={n}')
+        ax.grid(True)
+    axes[0].set_ylabel('Time per lookup (seconds)')
+    axes[0].legend(fontsize='small')
+    out_png = os.path.join(out_dir, 'lookup_cache.png')
+    plt.tight_layout()
+    plt.savefig(out_png)
+    print(f"Saved cache comparison to: {out_png} (data: {csv_path})")
+    plt.show()
+
+
 if __name__ == '__main__':
     random.seed(0)
-    run_search_suite()
+    if len(sys.argv) > 1 and sys.argv[1] == 'frozen':
+        run_frozen_suite()
+    elif len(sys.argv) > 1 and sys.argv[1] == 'bloom':
+        run_bloom_suite()
+    elif len(sys.argv) > 1 and sys.argv[1] == 'cache':
+        run_cache_suite()
+    else:
+        run_search_suite()
@@ -0,0 +1,251 @@
+"""Multi-process sharded tree store.
+
+    with ShardedTreeStore(workers=4, partition='range', boundaries=[250, 500, 750]) as store:
+        store.put_many(range(1000))
+        found = store.get_many([3, 1001])      # [True, False]
+        keys = store.range(10, 20)             # touches one shard
+
+Each worker process owns one RBtree or AVL and serves requests sent over a
+`multiprocessing` pipe. A request is a whole batch: the parent groups a batch
+of keys by shard, writes every shard's sub-batch before reading any reply,
+and then puts the answers back in the caller's order. The workers therefore
+search in parallel, and the pickling / pipe cost is paid once per batch
+instead of once per key.
+
+Two ways to assign keys to shards:
+
+- 'hash': shard from a multiplicative (Fibonacci) mix of hash(sort key).
+  The mix matters because hash(int) is the int itself, and keys with a
+  common stride would otherwise all land on one shard. Spreads any key
+  distribution evenly, but a range scan has to ask every shard and merge the results.
+- 'range': shard = bisect_right(boundaries, sort key), with workers - 1
+  sorted boundaries. A range scan only touches the shards whose key span
+  overlaps [lo, hi] and the pieces come back already in order.
+  `range_boundaries(sample, workers)` picks boundaries from a key sample.
+
+Keys and results must be picklable. `key` is applied in the parent to route
+requests, so it must be a picklable (module-level) function as well.
+
+A request that raises in a worker (e.g. a key that does not compare with
+the stored ones) does not stop the rest of its batch or the worker. Its
+exception is sent back in place of the result and, once every shard's reply
+has been read, the first one in the caller's key order is raised.
+"""
+import heapq
+import multiprocessing
+from bisect import bisect_right
+
+from RBtree1 import RBtree
+from avl import AVL
+
+TREES = {'rbtree': RBtree, 'avl': AVL}
+PARTITIONS = ('hash', 'range')
+
+_GET, _PUT, _DELETE, _RANGE, _SIZE = range(5)
+
+_MASK64 = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+
+
+class _Failure:
+    """Stands in for the result of a request that raised in a worker."""
+    __slots__ = ('exc',)
+
+    def __init__(self, exc):
+        self.exc = exc
+
+
+def _serve(conn, tree_cls, key):
+    """Worker loop: apply each batch of (op, key, arg) to a private tree."""
+    tree = tree_cls(key=key)
+    search, insert, delete = tree.searchTree, tree.insertInTree, tree.deleteFromTree
+    while True:
+        batch = conn.recv()
+        if batch is None:
+            break
+        results = []
+        for op, k, arg in batch:
+            try:
+                if op == _GET:
+                    result = search(k)
+                elif op == _PUT:
+                    result = insert(k)
+                elif op == _DELETE:
+                    # RBtree prints a warning for missing values, so look first
+                    result = search(k)
+                    if result:
+                        delete(k)
+                elif op == _RANGE:
+                    result = list(tree.irange(k, arg))
+                else:
+                    result = tree.size
+            except Exception as exc:
+                result = _Failure(exc)
+            results.append(result)
+        conn.send(results)
+    conn.close()
+
+
+def _raise_failure(results):
+    for result in results:
+        if type(result) is _Failure:
+            raise result.exc
+
+
+def range_boundaries(sample, workers):
+    """workers - 1 boundaries splitting the sorted sample into equal parts."""
+    ordered = sorted(sample)
+    if not ordered:
+        raise ValueError("need a non-empty sample to pick range boundaries")
+    return [ordered[len(ordered) * i // workers] for i in range(1, workers)]
+
+
+class ShardedTreeStore:
+    """Keys spread over worker processes, each with its own tree (see module docstring)."""
+
+    def __init__(self, workers=4, partition='hash', tree='rbtree', boundaries=None, key=None):
+        if partition not in PARTITIONS:
+            raise ValueError(f"unknown partition {partition!r} (expected one of {list(PARTITIONS)})")
+        if tree not in TREES:
+            raise ValueError(f"unknown tree {tree!r} (expected one of {sorted(TREES)})")
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if partition == 'range':
+            if boundaries is None or len(boundaries) != workers - 1:
+                raise ValueError("range partitioning needs workers - 1 boundaries")
+            boundaries = list(boundaries)
+            if boundaries != sorted(boundaries):
+                raise ValueError("boundaries must be sorted")
+        self.workers = workers
+        self.partition = partition
+        self.tree = tree
+        self.boundaries = boundaries
+        self.key_func = key
+        self._conns = []
+        self._procs = []
+        # batching counters
+        self.requests = 0
+        self.messages = 0
+
+    def start(self):
+        if self._procs:
+            return
+        for _ in range(self.workers):
+            parent, child = multiprocessing.Pipe()
+            proc = multiprocessing.Process(target=_serve, args=(child, TREES[self.tree], self.key_func),
+                                           daemon=True)
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(proc)
+
+    def close(self):
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except OSError:
+                # the worker is already gone
+                pass
+            conn.close()
+        for proc in self._procs:
+            proc.join()
+        self._conns = []
+        self._procs = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _sort_key(self, key):
+        return key if self.key_func is None else self.key_func(key)
+
+    def shard_of(self, key):
+        """Index of the worker that holds key."""
+        sk = self._sort_key(key)
+        if self.partition == 'hash':
+            return (((hash(sk) * _GOLDEN) & _MASK64) >> 32) % self.workers
+        return bisect_right(self.boundaries, sk)
+
+    def _exchange(self, per_shard):
+        """Send every non-empty sub-batch, then collect the replies by shard."""
+        if not self._procs:
+            raise RuntimeError("store is not running (use 'with store' or call start())")
+        for shard, batch in per_shard.items():
+            self._conns[shard].send(batch)
+        self.messages += len(per_shard)
+        return {shard: self._conns[shard].recv() for shard in per_shard}
+
+    def _scatter(self, op, keys):
+        """Run op on every key, routed by shard; results in the order of keys."""
+        keys = list(keys)
+        self.requests += len(keys)
+        per_shard = {}
+        slots = []
+        shard_of = self.shard_of
+        for k in keys:
+            shard = shard_of(k)
+            batch = per_shard.setdefault(shard, [])
+            slots.append((shard, len(batch)))
+            batch.append((op, k, None))
+        replies = self._exchange(per_shard)
+        results = [replies[shard][i] for shard, i in slots]
+        _raise_failure(results)
+        return results
+
+    def get_many(self, keys):
+        """For every key, True if it is stored."""
+        return self._scatter(_GET, keys)
+
+    def put_many(self, keys):
+        self._scatter(_PUT, keys)
+
+    def delete_many(self, keys):
+        """Remove one copy of every key; True for each key that was present."""
+        return self._scatter(_DELETE, keys)
+
+    def get(self, key):
+        return self.get_many([key])[0]
+
+    def put(self, key):
+        self.put_many([key])
+
+    def delete(self, key):
+        return self.delete_many([key])[0]
+
+    def shards_for_range(self, lo=None, hi=None):
+        """Workers whose keys may fall in [lo, hi] (None leaves that end open)."""
+        if self.partition == 'hash':
+            return list(range(self.workers))
+        first = 0 if lo is None else bisect_right(self.boundaries, self._sort_key(lo))
+        last = self.workers - 1 if hi is None else bisect_right(self.boundaries, self._sort_key(hi))
+        return list(range(first, last + 1))
+
+    def range(self, lo=None, hi=None):
+        """List of stored keys from lo to hi inclusive, in order."""
+        self.requests += 1
+        shards = self.shards_for_range(lo, hi)
+        replies = self._exchange({shard: [(_RANGE, lo, hi)] for shard in shards})
+        parts = [replies[shard][0] for shard in shards]
+        _raise_failure(parts)
+        if self.partition == 'range':
+            # shards are disjoint, consecutive key spans
+            return [k for part in parts for k in part]
+        return list(heapq.merge(*parts, key=self.key_func))
+
+    def shard_sizes(self):
+        """Number of stored keys on every worker."""
+        replies = self._exchange({shard: [(_SIZE, None, None)] for shard in range(self.workers)})
+        return [replies[shard][0] for shard in range(self.workers)]
+
+    def __len__(self):
+        return sum(self.shard_sizes())
+
+    def batch_stats(self):
+        return {
+            'requests': self.requests,
+            'messages': self.messages,
+            'requests_per_message': self.requests / self.messages if self.messages else 0.0,
+        }
@@ -0,0 +1,87 @@
+"""Throughput of `ShardedTreeStore` as the worker count grows.
+
+Usage:
+    python3 sharded_store_benchmark.py [--n 200000] [--lookups 200000] [--batch 1000]
+                                       [--workers 1 2 4 8] [--tree rbtree]
+
+Loads n random keys into the store and then times:
+- lookups: `get_many` batches of `batch` keys (half hits, half misses)
+- scans: n / 100 range scans of 100 consecutive stored keys
+
+for hash and range partitioning at every worker count. The single-process
+baseline runs the same lookups and scans on one tree in this process. Also
+printed: how many shards an average scan touched and the load imbalance
+(largest shard / mean shard). Speed-up is bounded by the number of cores
+(os.cpu_count() is printed with the results).
+"""
+import argparse
+import os
+import random
+import time
+
+from sharded_store import ShardedTreeStore, TREES, range_boundaries
+
+
+def chunks(seq, size):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+def time_lookups(get_many, lookups, batch):
+    t0 = time.perf_counter()
+    for part in chunks(lookups, batch):
+        get_many(part)
+    return time.perf_counter() - t0
+
+
+def time_scans(range_scan, starts):
+    t0 = time.perf_counter()
+    for lo in starts:
+        range_scan(lo, lo + 198)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--n', type=int, default=200000, help='keys in the store')
+    parser.add_argument('--lookups', type=int, default=200000)
+    parser.add_argument('--batch', type=int, default=1000, help='keys per get_many call')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--tree', choices=sorted(TREES), default='rbtree')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    # even keys are stored, odd keys miss
+    keys = list(range(0, 2 * args.n, 2))
+    rng.shuffle(keys)
+    lookups = [rng.randrange(2 * args.n) for _ in range(args.lookups)]
+    # 100 stored keys per scan
+    starts = [2 * rng.randrange(args.n - 100) for _ in range(args.n // 100)]
+    print(f"{args.tree}, n={args.n}, batch={args.batch}, {os.cpu_count()} CPUs")
+
+    tree = TREES[args.tree]()
+    for k in keys:
+        tree.insertInTree(k)
+    search = tree.searchTree
+    base_lookup = args.lookups / time_lookups(lambda part: [search(k) for k in part], lookups, args.batch)
+    base_scan = len(starts) / time_scans(lambda lo, hi: list(tree.irange(lo, hi)), starts)
+    print(f"{'single process':22s} {base_lookup:10.0f} lookups/s {base_scan:9.0f} scans/s")
+    del tree
+
+    for partition in ('hash', 'range'):
+        for workers in args.workers:
+            boundaries = range_boundaries(keys, workers) if partition == 'range' else None
+            with ShardedTreeStore(workers, partition, args.tree, boundaries=boundaries) as store:
+                for part in chunks(keys, 10000):
+                    store.put_many(part)
+                sizes = store.shard_sizes()
+                lookup_rate = args.lookups / time_lookups(store.get_many, lookups, args.batch)
+                scan_rate = len(starts) / time_scans(store.range, starts)
+                touched = sum(len(store.shards_for_range(lo, lo + 198)) for lo in starts) / len(starts)
+            print(f"{partition:5s} workers={workers:<3d}      {lookup_rate:10.0f} lookups/s "
+                  f"{scan_rate:9.0f} scans/s  x{lookup_rate / base_lookup:4.2f} lookups  "
+                  f"{touched:4.2f} shards/scan  imbalance {max(sizes) * workers / sum(sizes):4.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+import random
+
+
+class SkipNode:
+    # sort_key is what the list compares: key itself, or the list's key
+    # function applied to it once on insert; forward[i] is the next node on level i
+    __slots__ = ('key', 'sort_key', 'forward')
+
+    def __init__(self, key, level):
+        self.key = key
+        self.sort_key = key
+        self.forward = [None] * level
+
+
+class SkipList:
+    """Probabilistic ordered multiset (Pugh skip list) with insert, delete, search.
+
+    Each node is promoted to the next level with probability p, giving
+    expected O(log n) search / insert / delete with no rebalancing. Pass
+    `seed` for reproducible levels.
+    """
+
+    def __init__(self, key=None, p=0.25, max_level=32, seed=None):
+        # optional key function (like sorted(key=...)); None compares keys directly
+        self.key_func = key
+        self.p = p
+        self.max_level = max_level
+        self.size = 0
+        self.mutations = 0
+        self.level = 1
+        # sentinel head; its key is never compared
+        self.head = SkipNode(None, max_level)
+        self._random = random.Random(seed).random
+
+    def _random_level(self):
+        level = 1
+        rand, p = self._random, self.p
+        while level < self.max_level and rand() < p:
+            level += 1
+        return level
+
+    def _predecessors(self, sk):
+        """Last node before sk on every level (the head where nothing precedes it)."""
+        update = [self.head] * self.max_level
+        node = self.head
+        for i in range(self.level - 1, -1, -1):
+            nxt = node.forward[i]
+            while nxt is not None and nxt.sort_key < sk:
+                node = nxt
+                nxt = node.forward[i]
+            update[i] = node
+        return update
+
+    def search(self, key):
+        sk = key if self.key_func is None else self.key_func(key)
+        node = self.head
+        for i in range(self.level - 1, -1, -1):
+            nxt = node.forward[i]
+            while nxt is not None and nxt.sort_key < sk:
+                node = nxt
+                nxt = node.forward[i]
+        nxt = node.forward[0]
+        return nxt is not None and nxt.sort_key == sk
+
+    def insert(self, key):
+        self.mutations += 1
+        self.size += 1
+        new = SkipNode(key, self._random_level())
+        if self.key_func is None:
+            sk = key  # plain keys (e.g. ints) skip the key call entirely
+        else:
+            sk = new.sort_key = self.key_func(key)
+        # new node goes in front of any equal keys
+        update = self._predecessors(sk)
+        level = len(new.forward)
+        if level > self.level:
+            self.level = level
+        for i in range(level):
+            prev = update[i]
+            new.forward[i] = prev.forward[i]
+            prev.forward[i] = new
+
+    def delete(self, key):
+        sk = key if self.key_func is None else self.key_func(key)
+        update = self._predecessors(sk)
+        node = update[0].forward[0]
+        if node is None or node.sort_key != sk:
+            return
+        self.mutations += 1
+        self.size -= 1
+        for i in range(len(node.forward)):
+            update[i].forward[i] = node.forward[i]
+        head = self.head.forward
+        while self.level > 1 and head[self.level - 1] is None:
+            self.level -= 1
+
+    def irange(self, lo=None, hi=None):
+        """Yield the stored keys from lo to hi inclusive, in order.
+
+        None leaves that end of the range open.
+        """
+        if self.key_func is not None:
+            lo = None if lo is None else self.key_func(lo)
+            hi = None if hi is None else self.key_func(hi)
+        node = self.head.forward[0] if lo is None else self._predecessors(lo)[0].forward[0]
+        while node is not None and (hi is None or node.sort_key <= hi):
+            yield node.key
+            node = node.forward[0]
+
+    def InOrderTraversal(self):
+        """Return a list of all stored keys in order."""
+        return list(self.irange())
+
+    # Compatibility wrappers used by benchmark (match RBtree API names)
+    def insertInTree(self, key):
+        return self.insert(key)
+
+    def searchTree(self, key):
+        return self.search(key)
+
+    def deleteFromTree(self, key):
+        return self.delete(key)
@@ -0,0 +1,159 @@
+from bisect import bisect_left, bisect_right
+
+
+class SortedChunkList:
+    """Ordered multiset kept as a list of sorted Python lists ("chunks").
+
+    Lookups bisect the list of chunk maxima and then the chunk itself, so
+    nearly all the work happens inside C list operations instead of
+    pointer-chasing Python nodes. A chunk is split once it holds more than
+    2 * load keys and merged into a neighbour once it falls below load / 2,
+    which keeps insert / delete at O(log n + load) list-move cost.
+    """
+
+    def __init__(self, key=None, load=1000):
+        # optional key function (like sorted(key=...)); None compares keys directly
+        self.key_func = key
+        self.load = load
+        self.size = 0
+        self.mutations = 0
+        # chunks of sort keys, and chunks of the stored keys; without a key
+        # function both lists hold the very same chunk objects
+        self._keys = []
+        self._values = []
+        # last (largest) sort key of every chunk
+        self._maxes = []
+
+    def insert(self, key):
+        self.mutations += 1
+        self.size += 1
+        kf = self.key_func
+        sk = key if kf is None else kf(key)
+        maxes = self._maxes
+        if not maxes:
+            chunk = [sk]
+            self._keys.append(chunk)
+            self._values.append(chunk if kf is None else [key])
+            maxes.append(sk)
+            return
+        # equal keys go after the existing ones
+        i = bisect_right(maxes, sk)
+        if i == len(maxes):
+            i -= 1
+            keys = self._keys[i]
+            keys.append(sk)
+            if kf is not None:
+                self._values[i].append(key)
+            maxes[i] = sk
+        else:
+            keys = self._keys[i]
+            j = bisect_right(keys, sk)
+            keys.insert(j, sk)
+            if kf is not None:
+                self._values[i].insert(j, key)
+        if len(keys) > 2 * self.load:
+            self._split(i)
+
+    def _split(self, i):
+        load = self.load
+        keys = self._keys[i]
+        self._keys.insert(i + 1, keys[load:])
+        del keys[load:]
+        if self.key_func is None:
+            self._values.insert(i + 1, self._keys[i + 1])
+        else:
+            values = self._values[i]
+            self._values.insert(i + 1, values[load:])
+            del values[load:]
+        self._maxes.insert(i, keys[-1])
+
+    def _find(self, sk):
+        """(chunk index, position) of the first sort key equal to sk, or None."""
+        maxes = self._maxes
+        i = bisect_left(maxes, sk)
+        if i == len(maxes):
+            return None
+        keys = self._keys[i]
+        j = bisect_left(keys, sk)
+        # maxes[i] >= sk, so j is inside the chunk
+        if keys[j] != sk:
+            return None
+        return i, j
+
+    def search(self, key):
+        sk = key if self.key_func is None else self.key_func(key)
+        maxes = self._maxes
+        i = bisect_left(maxes, sk)
+        if i == len(maxes):
+            return False
+        keys = self._keys[i]
+        return keys[bisect_left(keys, sk)] == sk
+
+    def delete(self, key):
+        sk = key if self.key_func is None else self.key_func(key)
+        found = self._find(sk)
+        if found is None:
+            return
+        i, j = found
+        self.mutations += 1
+        self.size -= 1
+        keys = self._keys[i]
+        del keys[j]
+        if self.key_func is not None:
+            del self._values[i][j]
+        if not keys:
+            del self._keys[i], self._values[i], self._maxes[i]
+            return
+        if j == len(keys):
+            self._maxes[i] = keys[-1]
+        if len(keys) < self.load // 2 and len(self._keys) > 1:
+            self._merge(i)
+
+    def _merge(self, i):
+        # fold chunk i into its right neighbour (or the left one for the last chunk)
+        a = i if i + 1 < len(self._keys) else i - 1
+        keys = self._keys[a]
+        keys.extend(self._keys[a + 1])
+        if self.key_func is not None:
+            self._values[a].extend(self._values[a + 1])
+        del self._keys[a + 1], self._values[a + 1], self._maxes[a]
+        if len(keys) > 2 * self.load:
+            self._split(a)
+
+    def irange(self, lo=None, hi=None):
+        """Yield the stored keys from lo to hi inclusive, in order.
+
+        None leaves that end of the range open.
+        """
+        if self.key_func is not None:
+            lo = None if lo is None else self.key_func(lo)
+            hi = None if hi is None else self.key_func(hi)
+        if lo is None:
+            i = j = 0
+        else:
+            i = bisect_left(self._maxes, lo)
+            j = bisect_left(self._keys[i], lo) if i < len(self._maxes) else 0
+        key_chunks, value_chunks = self._keys, self._values
+        while i < len(key_chunks):
+            keys, values = key_chunks[i], value_chunks[i]
+            if hi is None or keys[-1] <= hi:
+                yield from values[j:] if j else values
+            else:
+                yield from values[j:bisect_right(keys, hi, j)]
+                return
+            i += 1
+            j = 0
+
+    def InOrderTraversal(self):
+        """Return a list of all stored keys in order."""
+        return [v for values in self._values for v in values]
+
+    # Compatibility wrappers used by benchmark (match RBtree API names)
+    def insertInTree(self, key):
+        return self.insert(key)
+
+    def searchTree(self, key):
+        return self.search(key)
+
+    def deleteFromTree(self, key):
+        return self.delete(key)
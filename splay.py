@@ -0,0 +1,171 @@
+import tree_stats
+
+
+class SplayNode:
+    # sort_key is what the tree compares: key itself, or the tree's key
+    # function applied to it once on insert
+    __slots__ = ('key', 'sort_key', 'left', 'right')
+    count = 1
+
+    def __init__(self, key):
+        self.key = key
+        self.sort_key = key
+        self.left = None
+        self.right = None
+
+
+class SplayTree:
+    """Self-adjusting (top-down splay) tree with insert, delete, search.
+
+    Every access splays the touched node to the root, so recently and
+    frequently used keys stay near the top; operations are O(log n)
+    amortized. Searches restructure the tree.
+    """
+    # search / insert / delete entry points wrapped by enable_path_histogram
+    PATH_OPS = {'search': 'search', 'insert': 'insert', 'delete': 'delete'}
+
+    def __init__(self, key=None):
+        self.root = None
+        # optional key function (like sorted(key=...)); None compares keys directly
+        self.key_func = key
+        self.size = 0
+        # telemetry: mutation counter for stats() caching, optional path histogram
+        self.mutations = 0
+        self.path_histogram = None
+        # scratch node reused by _splay to collect the left / right trees
+        self._header = SplayNode(None)
+
+    def _splay(self, t, sk):
+        """Top-down splay of subtree t around sk; return the new subtree root."""
+        header = self._header
+        header.left = header.right = None
+        left_max = right_min = header
+        while True:
+            k = t.sort_key
+            if sk < k:
+                y = t.left
+                if y is None:
+                    break
+                if sk < y.sort_key:
+                    # zig-zig: rotate right
+                    t.left = y.right
+                    y.right = t
+                    t = y
+                    if t.left is None:
+                        break
+                # link right
+                right_min.left = t
+                right_min = t
+                t = t.left
+            elif sk > k:
+                y = t.right
+                if y is None:
+                    break
+                if sk > y.sort_key:
+                    # zig-zig: rotate left
+                    t.right = y.left
+                    y.left = t
+                    t = y
+                    if t.right is None:
+                        break
+                # link left
+                left_max.right = t
+                left_max = t
+                t = t.right
+            else:
+                break
+        # assemble
+        left_max.right = t.left
+        right_min.left = t.right
+        t.left = header.right
+        t.right = header.left
+        return t
+
+    def _splay_max(self, t):
+        """Splay the largest node of subtree t to its root."""
+        header = self._header
+        header.right = None
+        left_max = header
+        while t.right is not None:
+            y = t.right
+            # rotate left, then link left
+            t.right = y.left
+            y.left = t
+            t = y
+            if t.right is None:
+                break
+            left_max.right = t
+            left_max = t
+            t = t.right
+        left_max.right = t.left
+        t.left = header.right
+        return t
+
+    def insert(self, key):
+        self.mutations += 1
+        self.size += 1
+        new = SplayNode(key)
+        if self.key_func is None:
+            sk = key  # plain keys (e.g. ints) skip the key call entirely
+        else:
+            sk = new.sort_key = self.key_func(key)
+        root = self.root
+        if root is None:
+            self.root = new
+            return
+        root = self._splay(root, sk)
+        # equal keys go right of the existing ones, as in BST
+        if sk < root.sort_key:
+            new.left = root.left
+            new.right = root
+            root.left = None
+        else:
+            new.right = root.right
+            new.left = root
+            root.right = None
+        self.root = new
+
+    def search(self, key):
+        root = self.root
+        if root is None:
+            return False
+        sk = key if self.key_func is None else self.key_func(key)
+        root = self.root = self._splay(root, sk)
+        return root.sort_key == sk
+
+    def delete(self, key):
+        root = self.root
+        if root is None:
+            return
+        sk = key if self.key_func is None else self.key_func(key)
+        root = self.root = self._splay(root, sk)
+        if root.sort_key != sk:
+            return
+        self.mutations += 1
+        self.size -= 1
+        if root.left is None:
+            self.root = root.right
+        else:
+            new_root = self._splay_max(root.left)
+            new_root.right = root.right
+            self.root = new_root
+
+    def stats(self, max_staleness=0.1):
+        """Height, depth, node count and memory estimate (see tree_stats)."""
+        return tree_stats.tree_stats(self, max_staleness)
+
+    def enable_path_histogram(self):
+        return tree_stats.enable_path_histogram(self)
+
+    def disable_path_histogram(self):
+        tree_stats.disable_path_histogram(self)
+
+    # Compatibility wrappers used by benchmark (match RBtree API names)
+    def insertInTree(self, key):
+        return self.insert(key)
+
+    def searchTree(self, key):
+        return self.search(key)
+
+    def deleteFromTree(self, key):
+        return self.delete(key)
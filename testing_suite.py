@@ -1,5 +1,6 @@
 from RBtree1 import Node, RBtree
 from pretty_printer import PrettyPrinter
+from tree_invariants import validate
 
 
 def smoke_test():
@@ -89,6 +90,602 @@ def TestLargeSet():
     print("--- Pretty print of large randomly inserted tree (with color) ---")
     PrettyPrinter.pretty_print(tree, use_color=True)
 
+def _in_order_keys(tree):
+    # in-order walk that works for both RBtree (value) and AVL (key) nodes
+    out = []
+    stack = []
+    node = tree.root
+    while stack or node is not None:
+        while node is not None:
+            stack.append(node)
+            node = node.left
+        node = stack.pop()
+        out.append(node.value if hasattr(node, 'value') else node.key)
+        node = node.right
+    return out
+
+
+def _run_trace(tree, trace):
+    # apply an operation trace and return the answers it produced
+    answers = []
+    for op, *args in trace:
+        if op == 'insert':
+            tree.insertInTree(*args)
+        elif op == 'delete':
+            tree.deleteFromTree(*args)
+        elif op == 'search':
+            answers.append(tree.searchTree(*args))
+        elif op == 'add':
+            tree.add(*args)
+        elif op == 'discard':
+            answers.append(tree.discard(*args))
+        elif op == 'count':
+            answers.append(tree.count(*args))
+        elif op == 'rank':
+            answers.append(tree.rank(*args))
+        else:
+            answers.append(list(tree.irange(*args)))
+    return answers
+
+
+def TestBackendParity(seeds=range(20), ops=2000):
+    ##runs identical operation traces against the pure Python and compiled backends:
+    ##plain, key= and multiset trees, including count / discard / rank / irange
+    import random
+    try:
+        import _treekernels
+    except ImportError:
+        print("_treekernels is not built; skipping backend parity test")
+        return
+    import avl
+
+    configs = [{}, {'key': abs}, {'multiset': True}, {'key': abs, 'multiset': True}]
+    for name, pure_ctor, fast_ctor in [('RBtree', RBtree, _treekernels.RBtree),
+                                       ('AVL', avl.AVL, _treekernels.AVL)]:
+        for config in configs:
+            sk = config.get('key') or (lambda v: v)
+            multiset = config.get('multiset', False)
+            for seed in seeds:
+                rng = random.Random(seed)
+                present = []
+                trace = []
+                for _ in range(ops):
+                    r = rng.random()
+                    v = rng.randrange(-ops // 2, ops // 2)
+                    if r < 0.4 or not present:
+                        present.append(v)
+                        trace.append(('insert', v))
+                    elif r < 0.6:
+                        # a stored value, so RBtree does not print a miss
+                        trace.append(('delete', present.pop(rng.randrange(len(present)))))
+                    elif r < 0.7 and multiset:
+                        n = rng.randrange(1, 4)
+                        trace.append(('add', v, n))
+                        present.extend([v] * n)
+                    elif r < 0.8 and multiset:
+                        n = rng.randrange(1, 4)
+                        trace.append(('discard', v, n))
+                        same = [i for i, p in enumerate(present) if sk(p) == sk(v)][:n]
+                        for i in reversed(same):
+                            del present[i]
+                        if rng.random() < 0.5:
+                            trace.append(('count', v))
+                    elif r < 0.85:
+                        trace.append(('rank', v))
+                    elif r < 0.9:
+                        trace.append(('irange', v, v + rng.randrange(50)))
+                    else:
+                        trace.append(('search', v))
+
+                pure, fast = pure_ctor(**config), fast_ctor(**config)
+                where = (name, config, seed)
+                assert _run_trace(pure, trace) == _run_trace(fast, trace), where
+                assert _in_order_keys(pure) == _in_order_keys(fast), where
+                assert sorted(map(sk, pure.irange())) == sorted(map(sk, present)), where
+                assert list(pure.irange()) == list(fast.irange()), where
+                assert pure.size == fast.size, where
+                assert validate(pure) == validate(fast), where
+        print(f"{name}: pure Python and compiled backends agree on {len(seeds)} traces x {len(configs)} configs")
+
+
+def TestInvariants():
+    ##short seeded fuzz run of every structure against a sorted-list oracle,
+    ##validating red-black / AVL / BST invariants along the way (see fuzz_trees.py)
+    from fuzz_trees import run_fuzz
+    run_fuzz(seeds=3, ops=3000, key_space=300, validate_every=50)
+
+
+def TestKeyFuncDuplicates(seeds=range(10), ops=2000):
+    ##trees with key= holding many elements per sort key: deletes must remove
+    ##exactly one element of that sort key and never duplicate or drop others
+    import random
+    from collections import Counter
+    import avl
+    import bst
+    structures = [('RBtree', RBtree), ('AVL', avl.AVL), ('BST', bst.BST)]
+    try:
+        import _treekernels
+        structures += [('RBtree (compiled)', _treekernels.RBtree), ('AVL (compiled)', _treekernels.AVL)]
+    except ImportError:
+        pass
+    first = lambda item: item[0]
+
+    # the two-child AVL delete used to remove a different node of the same sort key
+    tree = avl.AVL(key=first)
+    for item in [(2, 0), (1, 1), (2, 2), (1, 3), (2, 4), (2, 5)]:
+        tree.insertInTree(item)
+    tree.deleteFromTree((2, 5))
+    items = list(tree.irange())
+    assert len(set(items)) == 5 and Counter(k for k, _ in items) == {1: 2, 2: 3}, items
+
+    for name, ctor in structures:
+        for seed in seeds:
+            rng = random.Random(seed)
+            tree = ctor(key=first)
+            per_key = Counter()
+            next_id = 0
+            for _ in range(ops):
+                k = rng.randrange(20)
+                if rng.random() < 0.6 or not per_key[k]:
+                    tree.insertInTree((k, next_id))
+                    next_id += 1
+                    per_key[k] += 1
+                else:
+                    tree.deleteFromTree((k, None))
+                    per_key[k] -= 1
+            items = list(tree.irange())
+            assert len(set(items)) == len(items), (name, seed)
+            assert Counter(k for k, _ in items) == +per_key, (name, seed)
+            validate(tree)
+            ##rank counts every element of a smaller sort key, whichever side of a tie it sits on
+            for k in range(21):
+                assert tree.rank((k, None)) == sum(per_key[j] for j in range(k)), (name, seed, k)
+    print(f"key= trees: deletes with duplicate sort keys stay consistent on {len(seeds)} seeds")
+
+
+def TestBloomFilter(seeds=range(5), ops=3000):
+    ##identical traces against a tree with and without a Bloom filter in front
+    ##of its searches; a false negative from the filter shows up as a mismatch
+    import random
+    import avl
+    import bst
+    configs = [{}, {'multiset': True}, {'key': abs}, {'key': abs, 'multiset': True}]
+    for name, ctor in [('RBtree', RBtree), ('AVL', avl.AVL), ('BST', bst.BST)]:
+        for config in configs:
+            for seed in seeds:
+                rng = random.Random(seed)
+                plain, filtered = ctor(**config), ctor(**config)
+                # a small capacity forces the filter through several rebuilds
+                filtered.enable_bloom_filter(fp_rate=0.05, capacity=64)
+                present = []
+                for step in range(ops):
+                    r = rng.random()
+                    v = rng.randrange(-300, 300)
+                    if r < 0.45 or not present:
+                        for tree in (plain, filtered):
+                            tree.insertInTree(v)
+                        present.append(v)
+                    elif r < 0.7:
+                        v = present.pop(rng.randrange(len(present)))
+                        for tree in (plain, filtered):
+                            tree.deleteFromTree(v)
+                    elif r < 0.75 and config.get('multiset'):
+                        n = rng.randrange(1, 4)
+                        assert plain.discard(v, n) == filtered.discard(v, n), (name, config, seed, step)
+                        present = list(plain.irange())
+                    else:
+                        assert plain.searchTree(v) == filtered.searchTree(v), (name, config, seed, step)
+                assert list(plain.irange()) == list(filtered.irange()), (name, config, seed)
+                assert all(filtered.searchTree(v) for v in present), (name, config, seed)
+    print(f"Bloom filter: search answers match the unfiltered trees on {len(seeds)} seeds")
+
+
+def TestLookupCache(seeds=range(5), ops=4000):
+    ##a CachedTree must always answer like the tree it wraps: mutations through
+    ##the wrapper, mutations behind its back and evictions included
+    import random
+    import avl
+    from lookup_cache import CachedTree
+    configs = [(RBtree, {}), (avl.AVL, {'key': abs}), (avl.AVL, {'multiset': True})]
+    for policy in ('lru', 'lfu'):
+        for ctor, config in configs:
+            for seed in seeds:
+                rng = random.Random(seed)
+                tree = ctor(**config)
+                # far fewer slots than keys, so evictions happen all the time
+                cached = CachedTree(tree, capacity=16, policy=policy)
+                present = []
+                for step in range(ops):
+                    r = rng.random()
+                    v = rng.randrange(-100, 100)
+                    # half the mutations bypass the wrapper
+                    target = cached if rng.random() < 0.5 else tree
+                    if r < 0.2:
+                        target.insertInTree(v)
+                        present.append(v)
+                    elif r < 0.35 and present:
+                        target.deleteFromTree(present.pop(rng.randrange(len(present))))
+                    elif r < 0.4 and config.get('multiset'):
+                        target.add(v, rng.randrange(1, 3))
+                        target.discard(rng.randrange(-100, 100), rng.randrange(1, 3))
+                        present = list(tree.irange())
+                    else:
+                        assert cached.searchTree(v) == tree.searchTree(v), (policy, config, seed, step)
+                stats = cached.cache_stats()
+                assert stats['entries'] <= 16 and stats['evictions'] > 0, stats
+                if policy == 'lfu':
+                    cache = cached.cache
+                    assert sum(len(b) for b in cache._buckets.values()) == len(cache._data)
+    print(f"lookup cache: LRU and LFU answers match the wrapped trees on {len(seeds)} seeds")
+
+
+def TestAsyncStore(seeds=range(3), ops=3000):
+    ##concurrent requests to an AsyncTreeStore must see the same answers as the
+    ##same requests applied one by one in arrival order; a failing request
+    ##only fails its own caller
+    import asyncio
+    import random
+    import avl
+    from async_store import AsyncTreeStore
+
+    def replay(tree, op, key, arg):
+        if op == 'get':
+            return tree.searchTree(key)
+        if op == 'put':
+            return tree.insertInTree(key)
+        if op == 'delete':
+            found = tree.searchTree(key)
+            if found:
+                tree.deleteFromTree(key)
+            return found
+        return list(tree.irange(key, arg))
+
+    async def run(seed, ctor):
+        rng = random.Random(seed)
+        trace = []
+        for _ in range(ops):
+            op = rng.choice(['get', 'get', 'put', 'put', 'delete', 'range'])
+            key = rng.randrange(300)
+            trace.append((op, key, key + rng.randrange(20) if op == 'range' else None))
+        # one request that raises inside the worker
+        trace.insert(ops // 2, ('put', 'not comparable', None))
+        store = AsyncTreeStore(ctor(), window=0.0005, max_batch=64)
+        async with store:
+            calls = {'get': store.get, 'put': store.put, 'delete': store.delete}
+            # gather starts the coroutines in order, so they enqueue in trace order
+            results = await asyncio.gather(
+                *[store.range(key, arg) if op == 'range' else calls[op](key) for op, key, arg in trace],
+                return_exceptions=True)
+        oracle = ctor()
+        for (op, key, arg), got in zip(trace, results):
+            try:
+                expected = replay(oracle, op, key, arg)
+            except TypeError:
+                assert isinstance(got, TypeError), (seed, op, key, got)
+                continue
+            assert got == expected, (seed, op, key, got, expected)
+        assert list(store.tree.irange()) == list(oracle.irange()), seed
+        stats = store.batch_stats()
+        assert stats['batches'] > 1 and stats['largest_batch'] <= 64, stats
+
+    for ctor in (RBtree, avl.AVL):
+        for seed in seeds:
+            asyncio.run(run(seed, ctor))
+    print(f"AsyncTreeStore: batched answers match sequential replay on {len(seeds)} seeds")
+
+
+def TestShardedStore(seed=0, ops=2000):
+    ##hash- and range-partitioned stores against one in-process tree, including
+    ##a batch with a key that fails inside a worker
+    import random
+    from sharded_store import ShardedTreeStore
+    for partition, boundaries in (('hash', None), ('range', [250, 500, 750])):
+        rng = random.Random(seed)
+        oracle = RBtree()
+        with ShardedTreeStore(workers=4, partition=partition, boundaries=boundaries) as store:
+            store.put_many(range(0, 1000, 7))
+            for v in range(0, 1000, 7):
+                oracle.insertInTree(v)
+            for _ in range(ops // 100):
+                keys = [rng.randrange(1000) for _ in range(100)]
+                op = rng.choice(['get', 'put', 'delete', 'range'])
+                if op == 'get':
+                    assert store.get_many(keys) == [oracle.searchTree(k) for k in keys], partition
+                elif op == 'put':
+                    store.put_many(keys)
+                    for k in keys:
+                        oracle.insertInTree(k)
+                elif op == 'delete':
+                    expected = []
+                    for k in keys:
+                        expected.append(oracle.searchTree(k))
+                        if expected[-1]:
+                            oracle.deleteFromTree(k)
+                    assert store.delete_many(keys) == expected, partition
+                else:
+                    lo = keys[0]
+                    assert store.range(lo, lo + 100) == list(oracle.irange(lo, lo + 100)), partition
+            assert len(store) == oracle.size, partition
+
+            if partition == 'hash':
+                # every shard holds ints, so the str fails in whichever worker gets it;
+                # the rest of the batch still goes through and the workers survive
+                try:
+                    store.put_many([5000, 'not comparable', 5001])
+                except TypeError:
+                    pass
+                else:
+                    raise AssertionError("a failing request was not reported")
+                assert store.get_many([5000, 5001]) == [True, True]
+                assert len(store) == oracle.size + 2
+    print("ShardedTreeStore: hash and range partitions match an in-process tree")
+
+
+def _check_chunks(lst):
+    # chunk bookkeeping of a SortedChunkList: parallel lists, maxima and size bounds
+    assert len(lst._keys) == len(lst._values) == len(lst._maxes)
+    for i, keys in enumerate(lst._keys):
+        assert keys and keys == sorted(keys) and lst._maxes[i] == keys[-1]
+        assert len(keys) <= 2 * lst.load
+        assert len(lst._keys) == 1 or len(keys) >= lst.load // 2, [len(k) for k in lst._keys]
+        assert (lst._values[i] is keys) == (lst.key_func is None)
+    assert lst._maxes == sorted(lst._maxes)
+    assert sum(map(len, lst._keys)) == lst.size
+
+
+def _check_skip_levels(lst):
+    # every level of a SkipList is sorted and a sublist of the one below it,
+    # and lst.level is exactly the number of non-empty levels
+    assert len(lst.head.forward) == lst.max_level
+    below = None
+    for i in range(lst.max_level):
+        chain = []
+        node = lst.head.forward[i]
+        while node is not None:
+            assert len(node.forward) > i
+            chain.append(node)
+            node = node.forward[i]
+        keys = [node.sort_key for node in chain]
+        assert keys == sorted(keys)
+        if below is not None:
+            ids = set(map(id, below))
+            assert all(id(node) in ids for node in chain)
+        assert (i < lst.level) == (bool(chain) or i == 0), (i, lst.level)
+        if i == 0:
+            assert len(chain) == lst.size
+        below = chain
+
+
+def TestSortedEngines(seeds=range(5), ops=3000):
+    ##SortedChunkList and SkipList against a sorted-list oracle, with and without key=;
+    ##a small chunk load forces splits and merges, and a low level cap with p=0.5
+    ##makes skip-list nodes hit max_level; each trace grows and then drains to empty
+    import bisect
+    import random
+    from collections import Counter
+    from skiplist import SkipList
+    from sorted_chunks import SortedChunkList
+
+    first = lambda item: item[0]
+    engines = [
+        ('SortedChunkList', lambda seed, key: SortedChunkList(key=key, load=4), _check_chunks),
+        ('SkipList', lambda seed, key: SkipList(key=key, p=0.5, max_level=4, seed=seed), _check_skip_levels),
+    ]
+    for name, ctor, check in engines:
+        for key in (None, first):
+            splits = merges = top = 0
+            for seed in seeds:
+                rng = random.Random(seed)
+                lst = ctor(seed, key)
+                oracle = []
+                inserted = Counter()
+                next_id = 0
+                for step in range(ops):
+                    k = rng.randrange(60)
+                    r = rng.random()
+                    growing = step < ops // 2
+                    if r < (0.6 if growing else 0.2):
+                        item = k if key is None else (k, next_id)
+                        next_id += 1
+                        inserted[item] += 1
+                        chunks = len(getattr(lst, '_keys', ()))
+                        lst.insertInTree(item)
+                        splits += len(getattr(lst, '_keys', ())) > chunks
+                        top = max(top, getattr(lst, 'level', 0))
+                        bisect.insort(oracle, k)
+                    elif r < 0.9:
+                        if not growing and oracle and rng.random() < 0.7:
+                            ##drain: mostly delete a key that is present
+                            k = rng.choice(oracle)
+                        chunks = len(getattr(lst, '_keys', ()))
+                        lst.deleteFromTree(k if key is None else (k, None))
+                        merges += 0 < len(getattr(lst, '_keys', ())) < chunks
+                        i = bisect.bisect_left(oracle, k)
+                        if i < len(oracle) and oracle[i] == k:
+                            del oracle[i]
+                    else:
+                        assert lst.searchTree(k if key is None else (k, None)) == (k in oracle), (name, seed, k)
+                        lo, hi = sorted((k, rng.randrange(60)))
+                        got = list(lst.irange(*((lo, hi) if key is None else ((lo, None), (hi, None)))))
+                        want = oracle[bisect.bisect_left(oracle, lo):bisect.bisect_right(oracle, hi)]
+                        assert (got if key is None else [first(v) for v in got]) == want, (name, seed, lo, hi)
+                    if step % 100 == 0:
+                        check(lst)
+                        items = lst.InOrderTraversal()
+                        if key is not None:
+                            ##each stored element is one that was inserted, held once
+                            assert len(set(items)) == len(items) and all(inserted[v] for v in items)
+                            items = [first(v) for v in items]
+                        assert items == oracle, (name, seed, step)
+                ##drain whatever is left and check the empty structure
+                for k in list(oracle):
+                    lst.deleteFromTree(k if key is None else (k, None))
+                    oracle.remove(k)
+                    if len(oracle) % 25 == 0:
+                        check(lst)
+                items = lst.InOrderTraversal()
+                assert items == [] and lst.size == 0, (name, seed, items)
+                check(lst)
+                assert getattr(lst, 'level', 1) == 1, (name, seed)
+            if name == 'SortedChunkList':
+                assert splits and merges, (key, splits, merges)
+            else:
+                assert top == 4, (key, top)
+    print(f"SortedChunkList / SkipList: match a sorted list on {len(seeds)} seeds, with and without key=")
+
+
+def TestProfiler(seed=0, ops=2000):
+    ##the same trace with and without profiling: every record must carry the op
+    ##and rotations of the unprofiled call and the comparisons its keys saw, the
+    ##exports must parse and disabling must put the tree's own methods back
+    import contextlib
+    import os
+    import pstats
+    import random
+    import tempfile
+    import avl
+    from fuzz_trees import CountingAVL, CountingRBtree, counting_avl_rotations
+    from tree_stats import path_length
+
+    compared = [0]
+
+    class Key:
+        # sort key that counts the comparisons made on it
+        __slots__ = ('v',)
+        __hash__ = None
+
+        def __init__(self, v):
+            self.v = v
+
+        def __lt__(self, other):
+            compared[0] += 1
+            return self.v < other.v
+
+        def __gt__(self, other):
+            compared[0] += 1
+            return self.v > other.v
+
+        def __eq__(self, other):
+            compared[0] += 1
+            return self.v == other.v
+
+    for name, counting, ctor in [('RBtree', CountingRBtree, RBtree), ('AVL', CountingAVL, avl.AVL)]:
+        for multiset in (False, True):
+            rng = random.Random(seed)
+            trace = []
+            present = []
+            for _ in range(ops):
+                r = rng.random()
+                v = rng.randrange(300)
+                if r < 0.45 or not present:
+                    trace.append(('insert', 'insertInTree', v))
+                    present.append(v)
+                elif r < 0.7:
+                    # a stored value, so RBtree does not print a miss
+                    v = present.pop(rng.randrange(len(present)))
+                    trace.append(('delete', 'deleteFromTree', v))
+                elif r < 0.8 and multiset:
+                    trace.append(('add', 'add', v))
+                    present.append(v)
+                else:
+                    trace.append(('search', 'searchTree', v))
+
+            plain = counting(multiset=multiset)
+            rotations = []
+            for op, method, v in trace:
+                before = plain.rotations
+                with counting_avl_rotations(plain) if name == 'AVL' else contextlib.nullcontext():
+                    getattr(plain, method)(v)
+                rotations.append(plain.rotations - before)
+
+            tree = ctor(key=Key, multiset=multiset)
+            rotate_left = avl._rotate_left
+            profiler = tree.enable_profiling(capacity=ops)
+            expected = []
+            for (op, method, v), rotated in zip(trace, rotations):
+                # a search's visits are its path, measured off the record
+                path = path_length(tree, v) if op == 'search' else None
+                before = compared[0]
+                getattr(tree, method)(v)
+                expected.append((op, rotated, compared[0] - before, path))
+            tree.disable_profiling()
+            assert list(tree.irange()) == list(plain.irange()), (name, multiset)
+            records = profiler.records()
+            assert [(r.op, r.rotations, r.comparisons) for r in records] == [e[:3] for e in expected], (name, multiset)
+            for r, (op, rotated, comparisons, path) in zip(records, expected):
+                assert path is None or r.visits == path, (name, multiset, r)
+                assert 0 < r.visits <= r.comparisons or r.visits == r.comparisons == 0, (name, multiset, r)
+                assert (r.recolors is None) == (name == 'AVL'), (name, multiset, r)
+            assert sum(rotations) > 0, (name, multiset)
+            if name == 'RBtree':
+                assert sum(r.recolors for r in records) > 0, (name, multiset)
+
+            ##the trees only count while a profiler is attached
+            counters = (tree.visits, tree.comparisons)
+            tree.searchTree(0)
+            assert (tree.visits, tree.comparisons) == counters, (name, multiset)
+
+            ##every collapsed line is "frame;frame;... ns" rooted at an entry point
+            entries = {f"{type(tree).__name__}.{m}" for m in tree.PATH_OPS.values()} | {f"{type(tree).__name__}.add"}
+            lines = profiler.collapsed().splitlines()
+            assert lines, (name, multiset)
+            for line in lines:
+                stack, self_ns = line.rsplit(' ', 1)
+                frames = stack.split(';')
+                assert int(self_ns) >= 0 and frames[0] in entries and all(frames), line
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'profile.pstats')
+                profiler.write_pstats(path)
+                assert pstats.Stats(path).total_calls > 0, (name, multiset)
+
+            ##nothing shadowed is left behind, on the instance or in the module
+            assert tree.profiler is None
+            for method in list(tree.PATH_OPS.values()) + list(tree.PROFILE_PHASES) + ['add', 'discard']:
+                assert method not in tree.__dict__, (name, method)
+            assert tree.searchTree.__func__ is type(tree).searchTree
+            assert avl._rotate_left is rotate_left
+    print(f"Profiler: records match unprofiled rotations and counted comparisons over {ops} ops")
+
+
+def TestIntervalTree(seeds=range(5), ops=2000):
+    ##random inserts / deletes / batch loads checked against a brute-force list,
+    ##validating the max_end augmentation after every step
+    import random
+    from interval_tree import IntervalTree
+    for multiset in (False, True):
+        for seed in seeds:
+            rng = random.Random(seed)
+            tree = IntervalTree(multiset=multiset)
+            if seed % 2:
+                # load() bypasses insert, so the filter has to be refilled
+                tree.enable_bloom_filter(capacity=64)
+            stored = []
+            for _ in range(ops):
+                r = rng.random()
+                if r < 0.5:
+                    start = rng.randrange(500)
+                    iv = (start, start + rng.randrange(40))
+                    tree.insertInTree(iv)
+                    stored.append(iv)
+                elif r < 0.8 and stored:
+                    iv = stored.pop(rng.randrange(len(stored)))
+                    tree.deleteFromTree(iv)
+                elif r < 0.82:
+                    batch = [(s, s + rng.randrange(40)) for s in rng.sample(range(500), 20)]
+                    tree.load(batch)
+                    stored.extend(batch)
+                else:
+                    lo = rng.randrange(540)
+                    hi = lo + rng.randrange(30)
+                    expected = sorted(iv for iv in stored if iv[0] <= hi and iv[1] >= lo)
+                    assert tree.overlap(lo, hi) == expected, (multiset, seed, lo, hi)
+                    assert tree.stab(lo) == sorted(iv for iv in stored if iv[0] <= lo <= iv[1])
+                    if stored:
+                        assert tree.searchTree(rng.choice(stored)), (multiset, seed)
+                validate(tree)
+    print(f"IntervalTree: overlap / stab queries match brute force on {len(seeds)} seeds")
+
+
 if __name__ == '__main__':
     #TestOne()
     #TestTwo()
@@ -1,11 +1,47 @@
+"""Insert / search time complexity suites.
+
+Usage:
+    python3 time_complexity_suite.py           # per-insert timings and complexity plot
+    python3 time_complexity_suite.py profile   # phase-level profiles (see tree_profiler)
+    python3 time_complexity_suite.py scaling [max_n] [structure ...]
+                                               # fitted complexity curves and crossovers
+"""
 import time
 import random
 import csv
+import gc
+import json
+import os
+import sys
 import time
 import random
 import matplotlib.pyplot as plt
 import numpy as np
 from RBtree1 import RBtree
+from avl import AVL
+from bst import BST
+from splay import SplayTree
+from treap import Treap
+from sorted_chunks import SortedChunkList
+from skiplist import SkipList
+import fasttrees
+import tree_profiler
+from complexity_fit import fit_models, crossovers, measured_crossovers, predict
+
+SCALING_STRUCTURES = {
+    'RBtree': RBtree,
+    'AVL': AVL,
+    'BST': BST,
+    'Splay': SplayTree,
+    'Treap': Treap,
+    'SortedChunks': SortedChunkList,
+    'SkipList': SkipList,
+}
+if fasttrees.BACKEND == 'cython':
+    SCALING_STRUCTURES['RBtree (compiled)'] = fasttrees.RBtree
+    SCALING_STRUCTURES['AVL (compiled)'] = fasttrees.AVL
+
+SCALING_OPS = ('search', 'insert', 'delete', 'build')
 
 def plot_complexity():
     sizes = [100, 500, 1000, 2000, 5000, 10000, 20000, 50000]
@@ -75,5 +111,225 @@ def plot_complexity():
     plt.savefig('rbtree_complexity.png')
     plt.show()
 
+def _profile_trace(tree, values):
+    """Run the profile trace on tree; return the mean time per operation in us."""
+    n = len(values)
+    t0 = time.perf_counter_ns()
+    for v in values:
+        tree.insertInTree(v)
+    t1 = time.perf_counter_ns()
+    for v in values[:n // 2]:
+        tree.searchTree(v)
+    t2 = time.perf_counter_ns()
+    for v in values[n // 2:]:
+        tree.deleteFromTree(v)
+    t3 = time.perf_counter_ns()
+    return {'insert': (t1 - t0) / n / 1e3,
+            'search': (t2 - t1) / (n // 2) / 1e3,
+            'delete': (t3 - t2) / (n - n // 2) / 1e3}
+
+
+def run_profile_suite(n=100000, out_dir='timing_outputs', repeats=3):
+    """Profile n inserts, n / 2 searches and n / 2 deletes per tree.
+
+    Prints the mean time of every phase and the mean counts per operation,
+    checks the recorded totals against unprofiled runs of the same trace
+    (tree_profiler.compare_totals; both sides take the fastest of `repeats`
+    runs), and writes timing_outputs/profile_<tree>.collapsed (flamegraph.pl,
+    speedscope) and profile_<tree>.pstats (pstats, snakeviz) from the last
+    profiled run.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    values = list(range(n))
+    random.shuffle(values)
+    for name, ctor in (('RBtree', RBtree), ('AVL', AVL), ('BST', BST)):
+        unprofiled = {}
+        fastest = {}
+        gc.disable()
+        try:
+            for _ in range(repeats):
+                for op, us in _profile_trace(ctor(), values).items():
+                    unprofiled[op] = min(us, unprofiled.get(op, us))
+                tree = ctor()
+                profiler = tree.enable_profiling(capacity=2 * n)
+                _profile_trace(tree, values)
+                tree.disable_profiling()
+                for op, s in profiler.summary().items():
+                    if op not in fastest or s['total_us'] < fastest[op]['total_us']:
+                        fastest[op] = s
+        finally:
+            gc.enable()
+
+        print(f"--- {name}, n={n} ---")
+        checked = tree_profiler.compare_totals(fastest, unprofiled)
+        for op, s in fastest.items():
+            recolors = '' if s['recolors'] is None else f", recolors {s['recolors']:.2f}"
+            recorded, base, diff = checked[op]
+            print(f"{op:6s} {recorded:6.2f}us (unprofiled {base:.2f}us, {diff:+.0%})  visits {s['visits']:.1f}, "
+                  f"comparisons {s['comparisons']:.1f}, rotations {s['rotations']:.2f}{recolors}")
+            for phase, us in sorted(s['phases_us'].items(), key=lambda item: -item[1]):
+                print(f"    {phase:36s} {us:6.2f}us")
+        profiler.write_collapsed(os.path.join(out_dir, f'profile_{name}.collapsed'))
+        profiler.write_pstats(os.path.join(out_dir, f'profile_{name}.pstats'))
+
+
+def scaling_sizes(max_n, start=1000, per_decade=3):
+    """Geometric sizes from `start` up to and including max_n.
+
+    Small max_n lowers the start to max_n / 10 so there are always enough
+    sizes (at least four) to tell the two-parameter models apart.
+    """
+    if max_n < 30:
+        raise ValueError("the scaling sweep needs max_n of at least 30")
+    start = min(start, max_n // 10)
+    sizes = []
+    i = 0
+    while True:
+        n = int(round(start * 10 ** (i / per_decade)))
+        if n >= max_n:
+            break
+        sizes.append(n)
+        i += 1
+    sizes.append(max_n)
+    return sizes
+
+
+def measure_scaling(ctor, sizes, probes=10000, repeats=3, seed=0):
+    """Grow one structure through `sizes` and time its operations at each size.
+
+    Keys are the even numbers below 2 * max(sizes) in random order. At every
+    size, `probes` random resident keys are searched, then `probes` fresh odd
+    keys are inserted and deleted again, so the structure is back to n keys
+    before it keeps growing; the best of `repeats` such passes is kept.
+    Returns seconds per operation for search, insert
+    and delete, and the total seconds spent inserting the first n keys
+    ('build'). The collector is off while timing: with millions of live nodes
+    its full passes would add a cost that grows with n to every operation.
+    """
+    rng = random.Random(seed)
+    max_n = sizes[-1]
+    keys = list(range(0, 2 * max_n, 2))
+    rng.shuffle(keys)
+    ds = ctor()
+    insert, search, delete = ds.insertInTree, ds.searchTree, ds.deleteFromTree
+    result = {op: [] for op in SCALING_OPS}
+    built = 0
+    build_time = 0.0
+    gc.disable()
+    try:
+        for n in sizes:
+            t0 = time.perf_counter()
+            for k in keys[built:n]:
+                insert(k)
+            build_time += time.perf_counter() - t0
+            built = n
+            k = min(probes, n)
+            hits = [keys[rng.randrange(n)] for _ in range(k)]
+            fresh = [2 * rng.randrange(max_n) + 1 for _ in range(k)]
+            best = [float('inf')] * 3
+            for _ in range(repeats):
+                t0 = time.perf_counter()
+                for v in hits:
+                    search(v)
+                t1 = time.perf_counter()
+                for v in fresh:
+                    insert(v)
+                t2 = time.perf_counter()
+                for v in fresh:
+                    delete(v)
+                t3 = time.perf_counter()
+                best = [min(b, t) for b, t in zip(best, (t1 - t0, t2 - t1, t3 - t2))]
+            result['search'].append(best[0] / k)
+            result['insert'].append(best[1] / k)
+            result['delete'].append(best[2] / k)
+            result['build'].append(build_time)
+    finally:
+        gc.enable()
+    return result
+
+
+def run_scaling_suite(max_n=10_000_000, structures=None, probes=10000, out_dir='timing_outputs'):
+    """Sweep n geometrically up to max_n and fit c*log n, c*n and c*n log n curves.
+
+    For every structure and operation (search, insert, delete per operation,
+    build as the total for n inserts) the three models are fitted with
+    complexity_fit and the best one is reported with its constant and
+    goodness of fit, or the tie when no model wins clearly. For every pair of
+    structures the suite reports the sizes where the measured curves swap
+    order and, when both sides have a decisive model, where the fitted curves
+    cross, extrapolating the fits out to 100 * max_n. Results go to
+    timing_outputs/scaling_fits.json and scaling_fits.png.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    structures = structures or list(SCALING_STRUCTURES)
+    sizes = scaling_sizes(max_n)
+    measured = {}
+    fits = {}
+    for name in structures:
+        t0 = time.perf_counter()
+        measured[name] = measure_scaling(SCALING_STRUCTURES[name], sizes, probes)
+        fits[name] = {op: fit_models(sizes, measured[name][op]) for op in SCALING_OPS}
+        print(f"--- {name} ({time.perf_counter() - t0:.1f}s) ---")
+        for op in SCALING_OPS:
+            result = fits[name][op]
+            top = result['ranked'][0]
+            f = result['models'][top]
+            others = ', '.join(f"{m} {result['models'][m]['rel_rmse']:.1%}" for m in result['ranked'][1:])
+            unit = 's' if op == 'build' else 's/op'
+            verdict = f"best c*{top:8s}" if result['best'] else f"tie: {' ~ '.join(result['tied'])}, lowest c*{top}"
+            print(f"{op:6s} {verdict} c={f['c']:.3e} a={f['a']:.3e} {unit}  "
+                  f"R2={f['r2']:.4f} rel.err {f['rel_rmse']:.1%}  (others: {others})")
+        gc.collect()
+
+    pairs = {op: [] for op in SCALING_OPS}
+    for i, a in enumerate(structures):
+        for b in structures[i + 1:]:
+            for op in SCALING_OPS:
+                seen = measured_crossovers(sizes, measured[a][op], measured[b][op])
+                fitted = crossovers(fits[a][op], fits[b][op], sizes[0], 100 * max_n)
+                if seen or fitted:
+                    pairs[op].append({'a': a, 'b': b, 'measured_n': seen, 'fitted_n': fitted})
+    print("--- crossovers (measured within the sweep / fitted up to 100 * max_n) ---")
+    for op in SCALING_OPS:
+        for p in pairs[op]:
+            seen = ', '.join(f"{n:.3g}" for n in p['measured_n']) or '-'
+            if p['fitted_n'] is None:
+                fitted = 'no decisive fit'
+            else:
+                fitted = ', '.join(f"{n:.3g}" for n in p['fitted_n']) or '-'
+            print(f"{op:6s} {p['a']} / {p['b']}: measured n={seen}  fitted n={fitted}")
+
+    with open(os.path.join(out_dir, 'scaling_fits.json'), 'w') as fh:
+        json.dump({'sizes': sizes, 'probes': probes, 'measured': measured,
+                   'fits': fits, 'crossovers': pairs}, fh, indent=2)
+
+    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
+    grid = np.geomspace(sizes[0], max_n, 200)
+    for ax, op in zip(axes.flat, SCALING_OPS):
+        for name in structures:
+            result = fits[name][op]
+            top = result['ranked'][0]
+            label = f"c*{top}" if result['best'] else 'tie: ' + ' ~ '.join(result['tied'])
+            line, = ax.plot(sizes, measured[name][op], 'o', label=f"{name} ({label})")
+            ax.plot(grid, predict(result['models'][top], grid), '--', color=line.get_color())
+        ax.set_xscale('log')
+        ax.set_yscale('log')
+        ax.set_xlabel('Number of elements (n)')
+        ax.set_ylabel('Total time for n inserts (seconds)' if op == 'build' else 'Time per operation (seconds)')
+        ax.set_title(f'{op}: measured (points) and lowest-error fit (dashed)')
+        ax.legend(fontsize='small')
+        ax.grid(True, which='both', alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(os.path.join(out_dir, 'scaling_fits.png'))
+    plt.close(fig)
+    return fits, pairs
+
+
 if __name__ == '__main__':
-    plot_complexity()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == 'profile':
+        run_profile_suite()
+    elif len(sys.argv) > 1 and sys.argv[1] == 'scaling':
+        max_n = int(float(sys.argv[2])) if len(sys.argv) > 2 else 10_000_000
+        run_scaling_suite(max_n, sys.argv[3:] or None)
+    else:
+        plot_complexity()
\ No newline at end of file
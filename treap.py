@@ -0,0 +1,139 @@
+import random
+
+import tree_stats
+
+
+class TreapNode:
+    # sort_key is what the tree compares: key itself, or the tree's key
+    # function applied to it once on insert
+    __slots__ = ('key', 'sort_key', 'priority', 'left', 'right')
+    count = 1
+
+    def __init__(self, key, priority=0.0):
+        self.key = key
+        self.sort_key = key
+        self.priority = priority
+        self.left = None
+        self.right = None
+
+
+def _rotate_right(y):
+    x = y.left
+    y.left = x.right
+    x.right = y
+    return x
+
+
+def _rotate_left(x):
+    y = x.right
+    x.right = y.left
+    y.left = x
+    return y
+
+
+def _merge(a, b):
+    """Merge two treaps where every key of a sorts before every key of b."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a.priority > b.priority:
+        a.right = _merge(a.right, b)
+        return a
+    b.left = _merge(a, b.left)
+    return b
+
+
+class Treap:
+    """Randomized BST (max-heap on random priorities) with insert, delete, search.
+
+    Expected O(log n) depth regardless of insertion order; pass `seed` for a
+    reproducible shape.
+    """
+    # search / insert / delete entry points wrapped by enable_path_histogram
+    PATH_OPS = {'search': 'search', 'insert': 'insert', 'delete': 'delete'}
+
+    def __init__(self, key=None, seed=None):
+        self.root = None
+        # optional key function (like sorted(key=...)); None compares keys directly
+        self.key_func = key
+        self.size = 0
+        self._random = random.Random(seed).random
+        # telemetry: mutation counter for stats() caching, optional path histogram
+        self.mutations = 0
+        self.path_histogram = None
+
+    def search(self, key):
+        sk = key if self.key_func is None else self.key_func(key)
+        cur = self.root
+        while cur is not None:
+            k = cur.sort_key
+            if sk == k:
+                return True
+            elif sk < k:
+                cur = cur.left
+            else:
+                cur = cur.right
+        return False
+
+    def insert(self, key):
+        self.mutations += 1
+        self.size += 1
+        new = TreapNode(key, self._random())
+        if self.key_func is not None:
+            # plain keys (e.g. ints) skip the key call entirely
+            new.sort_key = self.key_func(key)
+        self.root = self._insert(self.root, new)
+
+    def _insert(self, node, new):
+        if node is None:
+            return new
+        if new.sort_key < node.sort_key:
+            left = node.left = self._insert(node.left, new)
+            if left.priority > node.priority:
+                return _rotate_right(node)
+        else:
+            right = node.right = self._insert(node.right, new)
+            if right.priority > node.priority:
+                return _rotate_left(node)
+        return node
+
+    def delete(self, key):
+        sk = key if self.key_func is None else self.key_func(key)
+        parent = None
+        cur = self.root
+        while cur is not None and cur.sort_key != sk:
+            parent = cur
+            cur = cur.left if sk < cur.sort_key else cur.right
+        if cur is None:
+            return
+        self.mutations += 1
+        self.size -= 1
+        # replace the node by the merge of its subtrees (priorities stay heap-ordered)
+        merged = _merge(cur.left, cur.right)
+        if parent is None:
+            self.root = merged
+        elif parent.left is cur:
+            parent.left = merged
+        else:
+            parent.right = merged
+
+    def stats(self, max_staleness=0.1):
+        """Height, depth, node count and memory estimate (see tree_stats)."""
+        return tree_stats.tree_stats(self, max_staleness)
+
+    def enable_path_histogram(self):
+        return tree_stats.enable_path_histogram(self)
+
+    def disable_path_histogram(self):
+        tree_stats.disable_path_histogram(self)
+
+    # Compatibility wrappers used by benchmark (match RBtree API names)
+    def insertInTree(self, key):
+        return self.insert(key)
+
+    def searchTree(self, key):
+        return self.search(key)
+
+    def deleteFromTree(self, key):
+        return self.delete(key)
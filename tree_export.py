@@ -0,0 +1,130 @@
+"""Graph export of RBtree, AVL and BST as Graphviz DOT or compact JSON.
+
+Both writers stream to a file-like object one node at a time, so exporting a
+multi-million-node tree never builds the whole document in memory. Either
+one can be limited to the hot region you want to look at:
+
+- `lo` / `hi`: only nodes from lo to hi inclusive, with the bounds mapped
+  through the tree's key function as in `irange` (descent is pruned outside
+  the range, so the cost is proportional to what is exported plus the height)
+- `subtree`: start at the node holding this key instead of the root
+- `max_depth` / `max_nodes`: bound the export below the starting node
+- `sample_rate` / `seed`: keep each in-range node with this probability
+
+When filtering drops nodes between two exported ones, the edge goes to the
+nearest exported ancestor and is marked as contracted (dashed in DOT,
+`contracted: 1` in JSON).
+
+Example:
+    with open('hot.dot', 'w') as f:
+        write_dot(tree, f, lo=1000, hi=2000)
+"""
+import json
+import random
+
+
+def _key(node):
+    return node.value if hasattr(node, 'value') else node.key
+
+
+def iter_export_nodes(tree, lo=None, hi=None, subtree=None, max_depth=None,
+                      max_nodes=None, sample_rate=None, seed=0):
+    """Yield (node, node_id, parent_id, side, contracted) for the selected nodes in pre-order.
+
+    parent_id is the id of the nearest exported ancestor (None for the first
+    exported node of a branch), side is 'L' / 'R' relative to that ancestor's
+    branch, and contracted tells whether nodes were skipped in between.
+    """
+    key_func = getattr(tree, 'key_func', None)
+    if key_func is not None:
+        lo = None if lo is None else key_func(lo)
+        hi = None if hi is None else key_func(hi)
+    start = tree.root
+    if subtree is not None:
+        k = subtree if key_func is None else key_func(subtree)
+        while start is not None and start.sort_key != k:
+            start = start.left if k < start.sort_key else start.right
+    if start is None:
+        return
+
+    rng = random.Random(seed) if sample_rate is not None else None
+    next_id = 0
+    # entries: (node, depth, nearest exported ancestor id, side, skipped since that ancestor)
+    stack = [(start, 0, None, None, False)]
+    while stack:
+        node, depth, parent_id, side, skipped = stack.pop()
+        k = node.sort_key
+        in_range = (lo is None or k >= lo) and (hi is None or k <= hi)
+        keep = in_range and (rng is None or rng.random() < sample_rate)
+
+        if keep:
+            if max_nodes is not None and next_id >= max_nodes:
+                return
+            node_id = next_id
+            next_id += 1
+            yield node, node_id, parent_id, side, skipped
+            child_parent, child_skipped = node_id, False
+        else:
+            child_parent, child_skipped = parent_id, parent_id is not None
+
+        if max_depth is not None and depth >= max_depth:
+            continue
+        # equal keys may sit on either side, hence the non-strict pruning
+        if node.right is not None and (hi is None or k <= hi):
+            stack.append((node.right, depth + 1, child_parent,
+                          'R' if keep else side, child_skipped))
+        if node.left is not None and (lo is None or k >= lo):
+            stack.append((node.left, depth + 1, child_parent,
+                          'L' if keep else side, child_skipped))
+
+
+def _dot_escape(text):
+    return str(text).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def write_dot(tree, file, name='tree', **select):
+    """Stream the (selected part of the) tree to `file` as a Graphviz digraph."""
+    file.write(f'digraph {name} {{\n')
+    file.write('  node [shape=circle, style=filled, fillcolor=white, fontname="Helvetica"];\n')
+    for node, node_id, parent_id, side, contracted in iter_export_nodes(tree, **select):
+        label = _dot_escape(_key(node))
+        count = getattr(node, 'count', 1)
+        if count > 1:
+            label += f'\\nx{count}'
+        attrs = f'label="{label}"'
+        if hasattr(node, 'red'):
+            attrs += ', fillcolor=red, fontcolor=white' if node.red else ', fillcolor=black, fontcolor=white'
+        elif hasattr(node, 'height'):
+            attrs += f', xlabel="h={node.height}"'
+        file.write(f'  n{node_id} [{attrs}];\n')
+        if parent_id is not None:
+            edge = f'tailport={"sw" if side == "L" else "se"}'
+            if contracted:
+                edge += ', style=dashed'
+            file.write(f'  n{parent_id} -> n{node_id} [{edge}];\n')
+    file.write('}\n')
+
+
+JSON_FIELDS = ['id', 'key', 'parent', 'side', 'contracted', 'count', 'color', 'height']
+
+
+def write_json(tree, file, **select):
+    """Stream the (selected part of the) tree to `file` as compact JSON.
+
+    The document is {"kind": ..., "fields": JSON_FIELDS, "nodes": [[...], ...]}
+    with one row per node, in pre-order. Rows refer to their parent by id,
+    so the rows form an adjacency list. color is "R" / "B" for red-black
+    nodes and null otherwise. height is null for non-AVL nodes. Keys that
+    JSON cannot represent are written with str().
+    """
+    file.write('{"kind": %s, "fields": %s, "nodes": [' % (
+        json.dumps(type(tree).__name__), json.dumps(JSON_FIELDS)))
+    encode = json.JSONEncoder(default=str).encode
+    first = True
+    for node, node_id, parent_id, side, contracted in iter_export_nodes(tree, **select):
+        color = ('R' if node.red else 'B') if hasattr(node, 'red') else None
+        row = [node_id, _key(node), parent_id, side, int(contracted),
+               getattr(node, 'count', 1), color, getattr(node, 'height', None)]
+        file.write(('\n' if first else ',\n') + encode(row))
+        first = False
+    file.write('\n]}\n')
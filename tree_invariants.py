@@ -0,0 +1,125 @@
+"""Structural invariant checks for RBtree, AVL and BST.
+
+`validate(tree)` walks the whole tree once (O(n), iteratively so degenerate
+BSTs are fine) and raises `InvariantError` on the first violation it finds:
+
+- every node's sort key lies between its ancestors' (BST order; equal keys
+  may sit on either side after rotations)
+- node counts are positive and `tree.size` matches the number of elements
+  (with lazy deletion, count-0 tombstones are allowed and must match the
+  tree's tombstone total)
+- subtree totals, on trees whose nodes keep them, equal the copies held by
+  the subtree
+- RBtree: black root, no red node with a red child, equal black height on
+  every path, and parent pointers that agree with the child links
+- AVL: stored heights are exact and every balance factor is in [-1, 1]
+- Treap: priorities are max-heap ordered
+- IntervalTree: every `max_end` is the largest end point in its subtree
+
+On success it returns the measured shape as a dict with `nodes`, `elements`,
+`height` and `black_height` (None for trees without colours).
+"""
+
+_UNBOUNDED = object()
+
+
+class InvariantError(AssertionError):
+    pass
+
+
+def validate(tree):
+    root = tree.root
+    is_rb = hasattr(root, 'red')
+    is_avl = hasattr(root, 'height')
+    is_treap = hasattr(root, 'priority')
+    is_interval = hasattr(root, 'max_end')
+    has_total = hasattr(root, 'total')
+
+    if is_rb:
+        if root.red:
+            raise InvariantError("root is red")
+        if root.parent is not None:
+            raise InvariantError("root has a parent")
+
+    lazy = getattr(tree, 'lazy_delete', None)
+    nodes = 0
+    elements = 0
+    tombstones = 0
+    # iterative post-order; finished subtrees leave (height, black height,
+    # element count) on `done`
+    stack = [(root, False, _UNBOUNDED, _UNBOUNDED)]
+    done = []
+    while stack:
+        node, visited, lo, hi = stack.pop()
+        if node is None:
+            done.append((0, 1, 0))
+            continue
+
+        k = node.sort_key
+        if not visited:
+            if (lo is not _UNBOUNDED and k < lo) or (hi is not _UNBOUNDED and k > hi):
+                raise InvariantError(f"key {k!r} is outside its subtree bounds ({lo!r}, {hi!r})")
+            stack.append((node, True, lo, hi))
+            stack.append((node.right, False, k, hi))
+            stack.append((node.left, False, lo, k))
+            continue
+
+        rh, rbh, rtotal = done.pop()
+        lh, lbh, ltotal = done.pop()
+        height = (lh if lh > rh else rh) + 1
+        black_height = 1
+
+        if node.count == 0 and lazy is not None:
+            tombstones += 1
+        elif node.count < 1:
+            raise InvariantError(f"node {k!r} has count {node.count}")
+        nodes += 1
+        elements += node.count
+        total = ltotal + node.count + rtotal
+        if has_total and node.total != total:
+            raise InvariantError(f"node {k!r} stores subtree total {node.total}, actual {total}")
+
+        if is_avl:
+            if node.height != height:
+                raise InvariantError(f"node {k!r} stores height {node.height}, actual {height}")
+            if lh - rh > 1 or rh - lh > 1:
+                raise InvariantError(f"node {k!r} is unbalanced ({lh} vs {rh})")
+
+        if is_treap:
+            for child in (node.left, node.right):
+                if child is not None and child.priority > node.priority:
+                    raise InvariantError(f"child {child.sort_key!r} outranks its parent {k!r}")
+
+        if is_interval:
+            expected = max([k[1]] + [c.max_end for c in (node.left, node.right) if c is not None])
+            if node.max_end != expected:
+                raise InvariantError(f"node {k!r} stores max_end {node.max_end!r}, actual {expected!r}")
+
+        if is_rb:
+            for child in (node.left, node.right):
+                if child is None:
+                    continue
+                if child.parent is not node:
+                    raise InvariantError(f"child {child.sort_key!r} of {k!r} has a stale parent pointer")
+                if node.red and child.red:
+                    raise InvariantError(f"red node {k!r} has red child {child.sort_key!r}")
+            if lbh != rbh:
+                raise InvariantError(f"node {k!r} has black heights {lbh} (left) and {rbh} (right)")
+            black_height = lbh + (0 if node.red else 1)
+
+        done.append((height, black_height, total))
+
+    height, black_height, _ = done.pop()
+    size = getattr(tree, 'size', None)
+    if size is not None and size != elements:
+        raise InvariantError(f"tree.size is {size} but the tree holds {elements} elements")
+
+    if lazy is not None and lazy.tombstones != tombstones:
+        raise InvariantError(f"tree records {lazy.tombstones} tombstones but holds {tombstones}")
+
+    return {
+        'nodes': nodes,
+        'elements': elements,
+        'height': height,
+        'black_height': black_height if is_rb else None,
+    }
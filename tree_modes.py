@@ -0,0 +1,41 @@
+"""Registry of the opt-in modes that shadow tree methods on the instance.
+
+Bloom filters, path histograms, lazy deletion and profiling each replace
+some of a tree's methods with wrappers stored in the instance dict and keep
+their state in one tree attribute (None while off). Two sets of wrappers
+would each see, or miss, the other's calls, so only one mode can be on at a
+time. Compiled trees have no instance dict and support none of them.
+"""
+
+# state attribute -> (name while on, name to enable, what is unsupported)
+MODES = {
+    'bloom_filter': ('the Bloom filter', 'a Bloom filter', 'Bloom filters'),
+    'path_histogram': ('the path histogram', 'a path histogram', 'path histograms'),
+    'lazy_delete': ('lazy deletion', 'lazy deletion', 'lazy deletion'),
+    'profiler': ('profiling', 'profiling', 'profiling'),
+}
+
+_MULTISET_OPS = ('add', 'discard')
+
+
+def check_can_enable(tree, attr):
+    """Raise unless the mode stored in `attr` can be switched on for `tree`."""
+    if not hasattr(tree, '__dict__'):
+        raise TypeError(f"{type(tree).__name__} ({type(tree).__module__}) does not support "
+                        f"{MODES[attr][2]}: compiled trees have no instance dict")
+    for other, (label, _, _) in MODES.items():
+        if other != attr and getattr(tree, other, None) is not None:
+            raise ValueError(f"disable {label} before enabling {MODES[attr][1]}")
+
+
+def shadowed_methods(tree, multiset_ops=True):
+    """{op: method name} for search / insert / delete, plus add / discard on multiset trees.
+
+    The names come from `tree.PATH_OPS`, the tree's lowest-level entry
+    points, so wrapped calls never nest.
+    """
+    names = dict(tree.PATH_OPS)
+    if multiset_ops and getattr(tree, 'multiset', False):
+        for op in _MULTISET_OPS:
+            names[op] = op
+    return names
@@ -0,0 +1,461 @@
+"""Per-operation profiling mode for RBtree, AVL and BST.
+
+`enable_profiling(tree, capacity=65536)` (exposed as `tree.enable_profiling()`)
+records every search / insert / delete (and add / discard on multiset trees)
+into a ring buffer holding the last `capacity` operations. Each record
+(`OpRecord`) has:
+
+- the total time of the call
+- self time and call count for every phase on the call path, keyed by stack.
+  Phases are the helper methods listed in the tree's `PROFILE_PHASES`, e.g.
+  RBtree.insertInTree -> checkRotations -> rotateLeft. Time not spent in a
+  listed helper counts as the entry point's own time, which for insert is
+  the descent. While a phase runs its own name is unwrapped again, so
+  recursion (AVL._insert calling itself) runs at full speed and is folded
+  into the one frame.
+- visits, comparisons and recolors: how far the tree's own counters
+  (`tree.visits`, `tree.comparisons`, and `tree.recolors` on red-black trees)
+  moved during the call. The descent loops and fixups count into locals and
+  add them to these only while a profiler is attached. A visit is a node
+  whose key the operation compared, comparisons are the key comparisons
+  actually executed and recolors the colour changes made by the fixups
+  (None for trees without colours).
+- rotations: calls of the rotation phases
+
+Each profiled frame costs a wrapper call on top of the real one. Like
+cProfile, the profiler measures that cost once per process on the same call
+path the trees take (an instance-dict wrapper around a bound method, or a
+swapped-in module function) and takes it back out of the recorded times.
+What it cannot take out is the cache disturbance of running its own code
+between and around the timed calls: recorded totals still come out about
+0.3 us per operation plus 0.5 us per phase frame above unprofiled timings
+(30-40% for searches, up to 90% for deletes). `compare_totals` checks that
+against unprofiled timings of the same trace, so use the phase times to
+compare phases with each other rather than as absolute costs.
+
+`collapsed()` / `write_collapsed(path)` export "frame;frame;frame self_ns"
+lines for flamegraph.pl, speedscope or inferno. `write_pstats(path)` writes a
+file that `pstats.Stats(path)` (and snakeviz, gprof2dot, ...) can load.
+`summary()` gives per-operation means.
+
+Like Bloom filters, path histograms and lazy deletion, profiling shadows the
+tree's methods on the instance (module-level helpers such as the AVL rotations
+are swapped only while a profiled call runs). It cannot be combined with
+those modes (see tree_modes), and compiled trees are not supported.
+"""
+import marshal
+import sys
+import warnings
+from array import array
+from collections import namedtuple
+from time import perf_counter_ns
+
+import tree_modes
+
+OpRecord = namedtuple('OpRecord', 'op total_ns frames visits comparisons rotations recolors')
+OpRecord.__doc__ = """One profiled call; frames maps a stack tuple to (calls, self_ns)."""
+
+# wrapper costs (ns), see _frame_bias
+_bias = None
+
+# largest relative difference compare_totals accepts between recorded and
+# unprofiled mean times (see the module docstring for what is typical)
+TOLERANCE = 1.0
+
+
+def _code_key(func):
+    """(filename, first line, name) for pstats, with a fallback for non-Python callables."""
+    code = getattr(func, '__code__', None)
+    if code is None:
+        return ('~', 0, getattr(func, '__qualname__', repr(func)))
+    return (code.co_filename, code.co_firstlineno, code.co_name)
+
+
+class TreeProfiler:
+    """Ring buffer of `OpRecord`s plus the exporters (see module docstring).
+
+    The ring is stored as preallocated columns and an operation's frames
+    dict is only created once it enters a phase, so recording a call
+    allocates next to nothing: objects kept per call would otherwise push
+    the tree's nodes out of the caches the profiled calls run in.
+    """
+
+    def __init__(self, capacity=65536):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        # per slot: (op, entry frame path), phase frames or None, and the
+        # numbers of the OpRecord (recolors -1 for None)
+        self._ops = [None] * capacity
+        self._phases = [None] * capacity
+        self._total_ns = array('q', bytes(8 * capacity))
+        self._visits = array('q', bytes(8 * capacity))
+        self._comparisons = array('q', bytes(8 * capacity))
+        self._rotation_counts = array('q', bytes(8 * capacity))
+        self._recolors = array('q', bytes(8 * capacity))
+        # total number of operations recorded so far
+        self.ops = 0
+        # frame name -> pstats function key
+        self.functions = {}
+        # state of the call in flight: frames as [name, path, child_ns]
+        self._stack = []
+        self._frames = None
+        self._rotations = 0
+        self._overhead = 0
+
+    def __len__(self):
+        return min(self.ops, self.capacity)
+
+    def _record(self, i):
+        (op, path), phases = self._ops[i], self._phases[i]
+        total = self._total_ns[i]
+        if phases is None:
+            frames = {path: (1, total)}
+        else:
+            # the self times of all frames add up to the total
+            frames = {path: (1, total - sum(self_ns for calls, self_ns in phases.values()))}
+            frames.update(phases)
+        recolors = self._recolors[i]
+        return OpRecord(op, total, frames, self._visits[i], self._comparisons[i],
+                        self._rotation_counts[i], recolors if recolors >= 0 else None)
+
+    def records(self):
+        """Buffered records, oldest first."""
+        if self.ops <= self.capacity:
+            slots = range(self.ops)
+        else:
+            start = self.ops % self.capacity
+            slots = list(range(start, self.capacity)) + list(range(start))
+        return [self._record(i) for i in slots]
+
+    def clear(self):
+        self._ops[:] = [None] * self.capacity
+        self._phases[:] = [None] * self.capacity
+        self.ops = 0
+
+    def summary(self):
+        """Per operation: count and mean total / per-phase time (us) and counts."""
+        out = {}
+        for r in self.records():
+            s = out.get(r.op)
+            if s is None:
+                s = out[r.op] = {'ops': 0, 'total_us': 0.0, 'phases_us': {}, 'visits': 0,
+                                 'comparisons': 0, 'rotations': 0, 'recolors': None}
+            s['ops'] += 1
+            s['total_us'] += r.total_ns / 1e3
+            for path, (calls, self_ns) in r.frames.items():
+                s['phases_us'][path[-1]] = s['phases_us'].get(path[-1], 0.0) + self_ns / 1e3
+            s['visits'] += r.visits
+            s['comparisons'] += r.comparisons
+            s['rotations'] += r.rotations
+            if r.recolors is not None:
+                s['recolors'] = (s['recolors'] or 0) + r.recolors
+        for s in out.values():
+            n = s['ops']
+            for name in ('total_us', 'visits', 'comparisons', 'rotations'):
+                s[name] /= n
+            if s['recolors'] is not None:
+                s['recolors'] /= n
+            s['phases_us'] = {name: t / n for name, t in s['phases_us'].items()}
+        return out
+
+    def _paths(self):
+        totals = {}
+        for r in self.records():
+            for path, (calls, self_ns) in r.frames.items():
+                t = totals.get(path)
+                if t is None:
+                    totals[path] = [calls, self_ns]
+                else:
+                    t[0] += calls
+                    t[1] += self_ns
+        return totals
+
+    def collapsed(self):
+        """Collapsed-stack text: one "frame;frame;frame self_ns" line per call path."""
+        # bias correction can leave a tiny frame slightly negative
+        lines = [f"{';'.join(path)} {max(0, self_ns)}" for path, (calls, self_ns) in sorted(self._paths().items())]
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def write_collapsed(self, path):
+        with open(path, 'w') as f:
+            f.write(self.collapsed())
+
+    def pstats_dict(self):
+        """The buffered calls in the marshal format `pstats.Stats` loads."""
+        stats = {}
+
+        def entry(name):
+            key = self.functions[name]
+            if key not in stats:
+                stats[key] = [0, 0, 0.0, 0.0, {}]
+            return stats[key]
+
+        for path, (calls, self_ns) in self._paths().items():
+            seconds = self_ns / 1e9
+            leaf = entry(path[-1])
+            leaf[0] += calls
+            leaf[1] += calls
+            leaf[2] += seconds
+            # the time is cumulative time of every frame on the path
+            for name in set(path):
+                entry(name)[3] += seconds
+            for caller, callee in zip(path, path[1:]):
+                edges = entry(callee)[4]
+                ck = self.functions[caller]
+                nc, cc, tt, ct = edges.get(ck, (0, 0, 0.0, 0.0))
+                if callee == path[-1]:
+                    nc, cc, tt = nc + calls, cc + calls, tt + seconds
+                edges[ck] = (nc, cc, tt, ct + seconds)
+        return {key: tuple(v) for key, v in stats.items()}
+
+    def write_pstats(self, path):
+        with open(path, 'wb') as f:
+            marshal.dump(self.pstats_dict(), f)
+
+
+def _frame(prof, name, func, bias, home, attr, rotation=False):
+    """Wrap func so calls made during a profiled operation are timed as phase `name`.
+
+    The wrapper is stored as home[attr] (the tree's instance dict, or the
+    module dict for module-level helpers) and puts func back there while the
+    frame runs. bias is (inner, outer): the wrapper cost inside this frame's
+    own timing window, taken off its self time, and the cost outside it,
+    taken off the caller's.
+    """
+    inner, outer = bias
+    both = inner + outer
+    stack = prof._stack
+
+    def wrapper(*args):
+        if not stack:
+            # called outside a profiled operation
+            return func(*args)
+        top = stack[-1]
+        path = top[1] + (name,)
+        current = [name, path, inner]
+        stack.append(current)
+        home[attr] = func
+        t0 = perf_counter_ns()
+        try:
+            return func(*args)
+        finally:
+            elapsed = perf_counter_ns() - t0
+            home[attr] = wrapper
+            stack.pop()
+            frames = prof._frames
+            if frames is None:
+                frames = prof._frames = {}
+            rec = frames.get(path)
+            if rec is None:
+                frames[path] = (1, elapsed - current[2])
+            else:
+                frames[path] = (rec[0] + 1, rec[1] + elapsed - current[2])
+            # the caller's self time excludes this frame and its wrapper cost
+            top[2] += elapsed + outer
+            prof._overhead += both
+            if rotation:
+                prof._rotations += 1
+    return wrapper
+
+
+class _Calibration:
+    def noop(self, a, b):
+        pass
+
+
+def _calibration_noop(a, b):
+    pass
+
+
+def _per_call(call, calls):
+    t0 = perf_counter_ns()
+    for _ in range(calls):
+        call(None, None)
+    return (perf_counter_ns() - t0) / calls
+
+
+def _frame_bias(calls=4000, rounds=9):
+    """{'method': (inner, outer), 'function': (inner, outer)} in ns, measured once per process.
+
+    Calibrated like cProfile's bias, but on the trees' real call paths: a
+    method phase is an instance-dict wrapper around a bound method, called
+    as inst.noop(a, b) and compared with the plain class method, and a
+    module phase a wrapper around a module function. `inner` is what the
+    wrapper records beyond a plain call and `outer` the rest of the extra
+    cost of a wrapped call. Every timing is the minimum over `rounds`, the
+    least disturbed sample.
+    """
+    global _bias
+    if _bias is None:
+        plain_inst = _Calibration()
+        best = {}
+
+        def keep(key, value):
+            if key not in best or value < best[key]:
+                best[key] = value
+
+        for _ in range(rounds):
+            # loop and lambda cost, taken off the plain per-call time
+            keep('empty', _per_call(lambda a, b: None, calls))
+            for kind in ('method', 'function'):
+                prof = TreeProfiler(1)
+                prof._frames = {}
+                prof._stack.append(['calibration', ('calibration',), 0])
+                if kind == 'method':
+                    inst = _Calibration()
+                    home = inst.__dict__
+                    home['noop'] = _frame(prof, 'noop', inst.noop, (0, 0), home, 'noop')
+                    # attribute lookups included, as in self.noop(a, b) inside the trees
+                    keep('method.plain', _per_call(lambda a, b: plain_inst.noop(a, b), calls))
+                    keep('method.wrapped', _per_call(lambda a, b: inst.noop(a, b), calls))
+                else:
+                    home = {}
+                    home['noop'] = wrapped = _frame(prof, 'noop', _calibration_noop, (0, 0), home, 'noop')
+                    keep('function.plain', _per_call(lambda a, b: _calibration_noop(a, b), calls))
+                    keep('function.wrapped', _per_call(lambda a, b: wrapped(a, b), calls))
+                keep(kind + '.recorded', prof._frames[('calibration', 'noop')][1] / calls)
+
+        _bias = {}
+        for kind in ('method', 'function'):
+            inner = max(0.0, best[kind + '.recorded'] - (best[kind + '.plain'] - best['empty']))
+            outer = max(0.0, best[kind + '.wrapped'] - best[kind + '.plain'] - inner)
+            _bias[kind] = (round(inner), round(outer))
+    return _bias
+
+
+def _phase_module(tree):
+    """Module of the class that declares PROFILE_PHASES, where its module-level phases live.
+
+    Subclasses defined elsewhere (e.g. in a script) inherit the phases but
+    not the helpers, so type(tree).__module__ would be the wrong place.
+    """
+    for cls in type(tree).__mro__:
+        if 'PROFILE_PHASES' in vars(cls):
+            return sys.modules[cls.__module__]
+    raise TypeError(f"{type(tree).__name__} does not declare PROFILE_PHASES")
+
+
+def _frame_name(tree, func):
+    qualname = getattr(func, '__qualname__', getattr(func, '__name__', repr(func)))
+    if '.' not in qualname:
+        # module-level helper
+        return f"{func.__module__}.{qualname}"
+    return qualname
+
+
+def enable_profiling(tree, capacity=65536):
+    """Start recording per-operation profiles on `tree` and return its `TreeProfiler`."""
+    if getattr(tree, 'profiler', None) is not None:
+        return tree.profiler
+    tree_modes.check_can_enable(tree, 'profiler')
+    prof = TreeProfiler(capacity)
+    module = _phase_module(tree)
+    has_colours = hasattr(tree, 'recolors')
+    # module-level helpers, swapped in only while a profiled call runs
+    swaps = []
+    bias = _frame_bias()
+    inner = bias['method'][0]
+
+    stack = prof._stack
+    capacity = prof.capacity
+    ops, phases, total_ns = prof._ops, prof._phases, prof._total_ns
+    visits_col, comparisons_col = prof._visits, prof._comparisons
+    rotations_col, recolors_col = prof._rotation_counts, prof._recolors
+
+    def entry(op_name, name, method_name, func):
+        # the entry wrapper stays in the instance dict, so a nested call
+        # does not unwrap itself
+        nested = _frame(prof, name, func, bias['method'], {}, method_name)
+        key = (op_name, (name,))
+        current = [name, key[1], inner]
+
+        # kept lean, like the ring: whatever this does around the timed call
+        # also evicts the tree's nodes from the caches the call runs in
+        def wrapper(value, *args):
+            if stack:
+                # e.g. a multiset insertInTree calling add
+                return nested(value, *args)
+            visits = tree.visits
+            comparisons = tree.comparisons
+            recolors = tree.recolors if has_colours else 0
+            if swaps:
+                for mod_name, wrapped, _ in swaps:
+                    setattr(module, mod_name, wrapped)
+            prof._frames = None
+            prof._rotations = 0
+            prof._overhead = inner
+            current[2] = inner
+            stack.append(current)
+            t0 = perf_counter_ns()
+            try:
+                return func(value, *args)
+            finally:
+                elapsed = perf_counter_ns() - t0
+                stack.pop()
+                if swaps:
+                    for mod_name, _, original in swaps:
+                        setattr(module, mod_name, original)
+                i = prof.ops % capacity
+                ops[i] = key
+                phases[i] = prof._frames
+                total_ns[i] = elapsed - prof._overhead
+                visits_col[i] = tree.visits - visits
+                comparisons_col[i] = tree.comparisons - comparisons
+                rotations_col[i] = prof._rotations
+                recolors_col[i] = tree.recolors - recolors if has_colours else -1
+                prof.ops += 1
+        return wrapper
+
+    for phase in tree.PROFILE_PHASES:
+        rotation = 'rotate' in phase.lower()
+        if hasattr(type(tree), phase):
+            func = getattr(tree, phase)
+            name = _frame_name(tree, getattr(type(tree), phase))
+            prof.functions[name] = _code_key(getattr(type(tree), phase))
+            setattr(tree, phase, _frame(prof, name, func, bias['method'], tree.__dict__, phase, rotation))
+        else:
+            func = getattr(module, phase)
+            name = _frame_name(tree, func)
+            prof.functions[name] = _code_key(func)
+            swaps.append((phase, _frame(prof, name, func, bias['function'], vars(module), phase, rotation), func))
+
+    for op, method_name in tree_modes.shadowed_methods(tree).items():
+        func = getattr(type(tree), method_name)
+        name = _frame_name(tree, func)
+        prof.functions[name] = _code_key(func)
+        setattr(tree, method_name, entry(op, name, method_name, getattr(tree, method_name)))
+
+    tree.profiler = prof
+    return prof
+
+
+def disable_profiling(tree):
+    """Stop recording and restore the tree's own methods (the profiler keeps its records)."""
+    if getattr(tree, 'profiler', None) is None:
+        return
+    for name in list(tree_modes.shadowed_methods(tree).values()) + list(tree.PROFILE_PHASES):
+        if name in tree.__dict__:
+            delattr(tree, name)
+    tree.profiler = None
+
+
+def compare_totals(summary, unprofiled_us, tolerance=TOLERANCE):
+    """Check recorded mean times against unprofiled ones for the same trace.
+
+    summary is `TreeProfiler.summary()`, unprofiled_us maps an operation to
+    its mean unprofiled time in us. Returns {op: (recorded_us, unprofiled_us,
+    relative difference)} and warns for every operation whose difference
+    exceeds `tolerance`.
+    """
+    out = {}
+    for op, base in unprofiled_us.items():
+        if op not in summary:
+            continue
+        recorded = summary[op]['total_us']
+        diff = (recorded - base) / base
+        out[op] = (recorded, base, diff)
+        if abs(diff) > tolerance:
+            warnings.warn(f"profiled {op} records {recorded:.2f}us against {base:.2f}us unprofiled "
+                          f"({diff:+.0%}, tolerance {tolerance:.0%})", stacklevel=2)
+    return out
@@ -0,0 +1,58 @@
+"""Relink in-order nodes into a perfectly balanced tree in O(n).
+
+Used by lazy deletion's compaction and by `IntervalTree.load`. The node
+type decides which bookkeeping is refreshed: parent pointers and red-black
+colours for RBtree nodes, heights for AVL nodes, `max_end` for interval
+nodes. Every node type gets its links and its subtree `total`.
+"""
+
+
+def link_balanced(nodes):
+    """Link the in-order list `nodes` into a perfectly balanced tree and return its root."""
+    if not nodes:
+        return None
+    first = nodes[0]
+    has_colour = hasattr(first, 'red')
+    has_height = hasattr(first, 'height')
+    has_max_end = hasattr(first, 'max_end')
+    n = len(nodes)
+    # midpoint splits fill every level but the deepest; colouring that
+    # partial level red gives every path the same black height
+    red_depth = n.bit_length() - 1 if n & (n + 1) else -1
+
+    def build(lo, hi, depth):
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        node = nodes[mid]
+        left = node.left = build(lo, mid, depth + 1)
+        right = node.right = build(mid + 1, hi, depth + 1)
+        if has_colour:
+            node.red = depth == red_depth
+            if left is not None:
+                left.parent = node
+            if right is not None:
+                right.parent = node
+        total = node.count
+        if left is not None:
+            total += left.total
+        if right is not None:
+            total += right.total
+        node.total = total
+        if has_height:
+            lh = left.height if left is not None else 0
+            rh = right.height if right is not None else 0
+            node.height = (lh if lh > rh else rh) + 1
+        if has_max_end:
+            m = node.sort_key[1]
+            if left is not None and left.max_end > m:
+                m = left.max_end
+            if right is not None and right.max_end > m:
+                m = right.max_end
+            node.max_end = m
+        return node
+
+    root = build(0, n, 0)
+    if has_colour:
+        root.parent = None
+    return root
@@ -0,0 +1,187 @@
+"""Shape and depth telemetry for RBtree, AVL and BST.
+
+`tree_stats(tree)` (exposed as `tree.stats()`) reports:
+- height, and black height for red-black trees
+- average and max node depth, i.e. the comparisons a successful search makes
+- node and element counts
+- an estimate of the memory used by the nodes
+
+The full O(n) walk is cached on the tree and only redone once the tree has
+seen more than `max_staleness * nodes` mutations since the last walk, so
+calling `stats()` per request costs O(1) amortized.
+
+`enable_path_histogram(tree)` (exposed as `tree.enable_path_histogram()`)
+additionally records the path length of every search / insert / delete in
+a `PathHistogram`. Recording costs an extra descent per operation, so it is
+off by default. Disabled trees run their normal methods untouched.
+`format_prometheus` renders both in the Prometheus text format for
+metrics pipelines.
+"""
+import sys
+from collections import Counter
+
+import tree_modes
+
+
+def _walk(tree):
+    root = tree.root
+    nodes = 0
+    elements = 0
+    depth_sum = 0
+    max_depth = 0
+    stack = [(root, 1)] if root is not None else []
+    while stack:
+        node, depth = stack.pop()
+        nodes += 1
+        elements += node.count
+        depth_sum += depth
+        if depth > max_depth:
+            max_depth = depth
+        if node.left is not None:
+            stack.append((node.left, depth + 1))
+        if node.right is not None:
+            stack.append((node.right, depth + 1))
+
+    black_height = None
+    if hasattr(root, 'red'):
+        # every root-to-leaf path has the same number of black nodes, so follow the left spine
+        black_height = 0
+        node = root
+        while node is not None:
+            black_height += not node.red
+            node = node.left
+
+    node_bytes = sys.getsizeof(root) if root is not None else 0
+    return {
+        'nodes': nodes,
+        'elements': elements,
+        'height': max_depth,
+        'black_height': black_height,
+        'avg_depth': depth_sum / nodes if nodes else 0.0,
+        'max_depth': max_depth,
+        # node objects only; the stored values themselves are not counted
+        'memory_bytes': nodes * node_bytes + sys.getsizeof(tree),
+    }
+
+
+def tree_stats(tree, max_staleness=0.1):
+    """Return shape statistics for `tree`, re-walking it only when the cache is too stale.
+
+    `stale_ops` in the result is the number of mutations since the walk the
+    numbers come from; pass `max_staleness=0` to force an exact walk.
+    """
+    mutations = tree.mutations
+    cached = getattr(tree, '_stats_cache', None)
+    if cached is None or mutations - cached[0] > max_staleness * cached[1]['nodes']:
+        cached = tree._stats_cache = (mutations, _walk(tree))
+    walked_at, stats = cached
+    result = dict(stats, stale_ops=mutations - walked_at)
+    histogram = getattr(tree, 'path_histogram', None)
+    if histogram is not None:
+        result['paths'] = histogram.summary()
+    lazy = getattr(tree, 'lazy_delete', None)
+    if lazy is not None:
+        # live count, unlike nodes / elements above, which may be stale
+        result['tombstones'] = lazy.tombstones
+    return result
+
+
+class PathHistogram:
+    """Per-operation histograms of path length (nodes visited from the root)."""
+
+    def __init__(self):
+        self.counts = {'search': Counter(), 'insert': Counter(), 'delete': Counter()}
+
+    def record(self, op, length):
+        self.counts[op][length] += 1
+
+    def reset(self):
+        for counter in self.counts.values():
+            counter.clear()
+
+    def summary(self):
+        out = {}
+        for op, counter in self.counts.items():
+            total = sum(counter.values())
+            out[op] = {
+                'ops': total,
+                'avg': sum(k * v for k, v in counter.items()) / total if total else 0.0,
+                'max': max(counter) if counter else 0,
+            }
+        return out
+
+
+def path_length(tree, value):
+    """Number of nodes visited by a descent for `value` (stopping at an equal key)."""
+    k = value if tree.key_func is None else tree.key_func(value)
+    length = 0
+    node = tree.root
+    while node is not None:
+        length += 1
+        nk = node.sort_key
+        if k < nk:
+            node = node.left
+        elif k > nk:
+            node = node.right
+        else:
+            break
+    return length
+
+
+def enable_path_histogram(tree):
+    """Start recording path lengths on `tree` and return its `PathHistogram`.
+
+    `tree.PATH_OPS` names the tree's lowest-level search / insert / delete
+    methods (so wrapped calls never nest). Each one is shadowed on the
+    instance by a recording wrapper. Compiled trees are not supported and
+    the other instance-shadowing modes must be off (see tree_modes).
+    """
+    if getattr(tree, 'path_histogram', None) is not None:
+        return tree.path_histogram
+    tree_modes.check_can_enable(tree, 'path_histogram')
+    histogram = PathHistogram()
+    for op, name in tree_modes.shadowed_methods(tree, multiset_ops=False).items():
+        setattr(tree, name, _recording(tree, histogram, op, getattr(tree, name)))
+    tree.path_histogram = histogram
+    return histogram
+
+
+def disable_path_histogram(tree):
+    """Stop recording and restore the tree's own methods."""
+    if getattr(tree, 'path_histogram', None) is None:
+        return
+    for name in tree_modes.shadowed_methods(tree, multiset_ops=False).values():
+        delattr(tree, name)
+    tree.path_histogram = None
+
+
+def _recording(tree, histogram, op, method):
+    def wrapper(value, *args):
+        histogram.record(op, path_length(tree, value))
+        return method(value, *args)
+    return wrapper
+
+
+def format_prometheus(stats, histogram=None, prefix='tree', labels=None):
+    """Render a `tree_stats` result, and optionally a `PathHistogram`, as Prometheus text."""
+    label_text = ','.join(f'{k}="{v}"' for k, v in (labels or {}).items())
+    lines = []
+    for name in ('nodes', 'elements', 'height', 'black_height', 'avg_depth',
+                 'max_depth', 'memory_bytes', 'stale_ops'):
+        value = stats.get(name)
+        if value is None:
+            continue
+        lines.append(f'{prefix}_{name}{{{label_text}}} {value}')
+
+    if histogram is not None:
+        metric = f'{prefix}_path_length'
+        for op, counter in histogram.counts.items():
+            op_labels = ','.join(filter(None, [label_text, f'op="{op}"']))
+            cumulative = 0
+            for length in sorted(counter):
+                cumulative += counter[length]
+                lines.append(f'{metric}_bucket{{{op_labels},le="{length}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{{op_labels},le="+Inf"}} {cumulative}')
+            lines.append(f'{metric}_sum{{{op_labels}}} {sum(k * v for k, v in counter.items())}')
+            lines.append(f'{metric}_count{{{op_labels}}} {cumulative}')
+    return '\n'.join(lines) + '\n'
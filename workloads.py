@@ -0,0 +1,37 @@
+"""Skewed lookup workloads for the benchmarks.
+
+Both generators draw lookup keys from `values` (the keys stored in the tree)
+with a seeded `random.Random`, so runs are reproducible.
+"""
+import itertools
+import random
+
+
+def zipf_lookups(values, k, s=1.1, rng=None):
+    """k lookups whose popularity follows a Zipf law with exponent s.
+
+    The i-th most popular key (popularity order is a random permutation of
+    `values`) is drawn with probability proportional to 1 / i**s.
+    """
+    rng = rng or random.Random(0)
+    ranked = list(values)
+    rng.shuffle(ranked)
+    cum_weights = list(itertools.accumulate(1.0 / (i ** s) for i in range(1, len(ranked) + 1)))
+    return rng.choices(ranked, cum_weights=cum_weights, k=k)
+
+
+def working_set_lookups(values, k, set_size=None, phases=10, rng=None):
+    """k lookups that stay inside a small hot set which moves `phases` times.
+
+    Each phase draws uniformly from `set_size` keys (default 1% of `values`,
+    at least one) picked at random for that phase.
+    """
+    rng = rng or random.Random(0)
+    values = list(values)
+    set_size = set_size or max(1, len(values) // 100)
+    out = []
+    per_phase = -(-k // phases)
+    while len(out) < k:
+        hot = rng.sample(values, min(set_size, len(values)))
+        out.extend(rng.choices(hot, k=min(per_phase, k - len(out))))
+    return out